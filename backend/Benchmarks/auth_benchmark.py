@@ -0,0 +1,61 @@
+# Cost of authenticating one request: a full JWT verification, which is what
+# every endpoint paid before, against the cached get_principal dependency.
+#
+#   python -m Benchmarks.auth_benchmark --requests 20000 --tokens 1 100 10000
+#
+# --tokens is the number of distinct tokens the requests rotate through; more
+# tokens than AUTH_TOKEN_CACHE_SIZE shows the cost once the cache thrashes.
+import argparse
+import asyncio
+import time
+
+from Utils.auth import STUDENT, get_principal, token_cache
+from Utils.jwt_logic import create_access_token, verify_access_token
+
+
+def per_request_us(run, requests: int) -> float:
+    started = time.perf_counter()
+    run(requests)
+    return (time.perf_counter() - started) / requests * 1_000_000
+
+
+def run_level(requests: int, distinct_tokens: int) -> dict:
+    headers = [
+        "Bearer " + create_access_token({"sub": str(number + 1), "role": STUDENT})
+        for number in range(distinct_tokens)
+    ]
+    tokens = [header.split(" ")[1] for header in headers]
+
+    def uncached(count: int):
+        for number in range(count):
+            verify_access_token(tokens[number % distinct_tokens])
+
+    def cached(count: int):
+        async def requests_in_order():
+            for number in range(count):
+                await get_principal(headers[number % distinct_tokens])
+        asyncio.run(requests_in_order())
+
+    token_cache.clear()
+    token_cache.hits = token_cache.misses = 0
+    report = {
+        "tokens": distinct_tokens,
+        "verify_us": per_request_us(uncached, requests),
+        "cached_us": per_request_us(cached, requests),
+    }
+    report["hit_rate"] = token_cache.hits / max(token_cache.hits + token_cache.misses, 1)
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--tokens", type=int, nargs="+", default=[1, 100, 10000])
+    args = parser.parse_args()
+
+    for distinct_tokens in args.tokens:
+        report = run_level(args.requests, distinct_tokens)
+        print(
+            f"tokens={report['tokens']:<6} verify={report['verify_us']:.1f}us/request "
+            f"cached={report['cached_us']:.1f}us/request hit rate={report['hit_rate']:.0%}"
+        )
@@ -0,0 +1,211 @@
+# End-to-end latency of the PDF chat and summarize endpoints under load.
+#
+#   python -m Benchmarks.fake_llm_server --port 8900 &
+#   LLM_PROVIDER=fake uvicorn main:app --port 8000 &
+#   python -m Benchmarks.chat_benchmark --mode stream --concurrency 1 8 32 --requests 200
+#
+# The app and this script must share SECRET_KEY so the minted token is
+# accepted. All requests come from one student, so start the app with
+# LLM_MAX_CONCURRENCY_PER_USER at least as high as the largest --concurrency.
+# Without --pdf-id a generated PDF is uploaded for the student and the run
+# waits for its ingestion. Every chat request asks a different question with
+# bypass_cache set, so the answer cache does not hide the model path; pass
+# --allow-cache to measure cached answers instead. Summarize requests each
+# upload a freshly generated PDF for the same reason. Prompt token counts come
+# from the fake server's /stats and are skipped for other providers.
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import time
+
+import httpx
+import numpy as np
+
+from Benchmarks.extraction_benchmark import make_pdf
+from Utils.jwt_logic import create_access_token
+
+QUESTION_TOPICS = ["proof", "matrix", "gradient", "market", "treaty", "algorithm", "membrane", "graph"]
+
+
+async def upload_and_wait(client: httpx.AsyncClient, headers: dict, pages: int) -> int:
+    with tempfile.TemporaryDirectory() as workdir:
+        path = os.path.join(workdir, "benchmark.pdf")
+        make_pdf(path, pages, seed=time.time_ns())
+        with open(path, "rb") as pdf:
+            response = await client.post("/upload_student_pdf", headers=headers,
+                                         files={"file": ("benchmark.pdf", pdf, "application/pdf")})
+    response.raise_for_status()
+    upload = response.json()
+
+    while True:
+        job = (await client.get(f"/pdf_jobs/{upload['job_id']}", headers=headers)).json()
+        if job["status"] == "done":
+            return upload["pdf_id"]
+        if job["status"] == "failed":
+            raise RuntimeError(f"ingestion failed: {job['error']}")
+        await asyncio.sleep(0.5)
+
+
+async def read_events(response: httpx.Response, started: float) -> tuple[float | None, bool]:
+    # returns the time to the first event and whether the stream ended with done
+    first_event = None
+    finished = False
+    async for line in response.aiter_lines():
+        if first_event is None and line.startswith("data: "):
+            first_event = time.perf_counter() - started
+        if line == "event: error":
+            return first_event, False
+        if line == "event: done":
+            finished = True
+    return first_event, finished
+
+
+async def one_request(client: httpx.AsyncClient, args, headers: dict, number: int, pdf_files: list[bytes]):
+    question = {
+        "message": f"Question {number}: what does the document say about {QUESTION_TOPICS[number % len(QUESTION_TOPICS)]}?",
+        "bypass_cache": not args.allow_cache,
+    }
+    started = time.perf_counter()
+
+    if args.mode == "chat":
+        response = await client.post(f"/view_pdf_by_id/{args.pdf_id}/chat", headers=headers, json=question)
+        return time.perf_counter() - started, None, response.status_code == 200
+
+    if args.mode == "stream":
+        request = client.build_request("POST", f"/view_pdf_by_id/{args.pdf_id}/chat/stream",
+                                       headers=headers, json=question)
+    else:
+        request = client.build_request("POST", "/pdf_analyzer", headers=headers,
+                                       files={"file": (f"{number}.pdf", pdf_files[number], "application/pdf")})
+
+    response = await client.send(request, stream=True)
+    try:
+        if response.status_code != 200:
+            return time.perf_counter() - started, None, False
+        first_event, finished = await read_events(response, started)
+        return time.perf_counter() - started, first_event, finished
+    finally:
+        await response.aclose()
+
+
+def generate_pdfs(count: int, pages: int) -> list[bytes]:
+    pdf_files = []
+    with tempfile.TemporaryDirectory() as workdir:
+        for number in range(count):
+            path = os.path.join(workdir, f"{number}.pdf")
+            make_pdf(path, pages, seed=time.time_ns())
+            with open(path, "rb") as pdf:
+                pdf_files.append(pdf.read())
+    return pdf_files
+
+
+async def run_level(client: httpx.AsyncClient, llm_stats: httpx.AsyncClient | None, args, headers: dict,
+                    concurrency: int) -> dict:
+    # summarize requests get new documents on every level, the summary store
+    # would answer repeats without calling the model
+    pdf_files = generate_pdfs(args.requests, args.pages) if args.mode == "summarize" else []
+    if llm_stats:
+        await llm_stats.post("/stats/reset")
+
+    slots = asyncio.Semaphore(concurrency)
+
+    async def bounded(number: int):
+        async with slots:
+            try:
+                return await one_request(client, args, headers, number, pdf_files)
+            except httpx.HTTPError:
+                return None, None, False
+
+    started = time.perf_counter()
+    results = await asyncio.gather(*(bounded(number) for number in range(args.requests)))
+    elapsed = time.perf_counter() - started
+
+    ok = [result for result in results if result[2]]
+    latencies = np.array([result[0] for result in ok]) * 1000
+    first_events = np.array([result[1] for result in ok if result[1] is not None]) * 1000
+
+    report = {
+        "concurrency": concurrency,
+        "requests": args.requests,
+        "errors": args.requests - len(ok),
+        "throughput_rps": len(ok) / elapsed,
+    }
+    if len(latencies):
+        report.update({
+            f"latency_p{q}_ms": float(np.percentile(latencies, q)) for q in (50, 95, 99)
+        })
+    if len(first_events):
+        report.update({
+            f"first_event_p{q}_ms": float(np.percentile(first_events, q)) for q in (50, 95, 99)
+        })
+    if llm_stats:
+        stats = (await llm_stats.get("/stats")).json()
+        report.update({
+            "llm_calls": stats["requests"],
+            "prompt_tokens_mean": stats["prompt_tokens_mean"],
+            "prompt_tokens_total": stats["prompt_tokens_total"],
+        })
+    return report
+
+
+def print_report(report: dict):
+    line = (
+        f"c={report['concurrency']:<4} ok={report['requests'] - report['errors']:<5} err={report['errors']:<4} "
+        f"rps={report['throughput_rps']:<8.2f}"
+    )
+    if "latency_p50_ms" in report:
+        line += " latency p50/p95/p99={:.0f}/{:.0f}/{:.0f}ms".format(
+            report["latency_p50_ms"], report["latency_p95_ms"], report["latency_p99_ms"])
+    if "first_event_p50_ms" in report:
+        line += " first event p50/p95/p99={:.0f}/{:.0f}/{:.0f}ms".format(
+            report["first_event_p50_ms"], report["first_event_p95_ms"], report["first_event_p99_ms"])
+    if "prompt_tokens_mean" in report:
+        line += f" llm calls={report['llm_calls']} prompt tokens mean={report['prompt_tokens_mean']:.0f}"
+    print(line)
+
+
+async def main(args):
+    headers = {"Authorization": "Bearer " + create_access_token({"sub": str(args.student_id)})}
+    timeout = httpx.Timeout(args.timeout)
+    limits = httpx.Limits(max_connections=max(args.concurrency) * 2)
+
+    async with httpx.AsyncClient(base_url=args.app_url, timeout=timeout, limits=limits) as client:
+        llm_stats = httpx.AsyncClient(base_url=args.llm_stats_url) if args.llm_stats_url else None
+        try:
+            if args.mode != "summarize" and args.pdf_id is None:
+                args.pdf_id = await upload_and_wait(client, headers, args.pages)
+                print(f"uploaded pdf {args.pdf_id} ({args.pages} pages)")
+
+            reports = []
+            for concurrency in args.concurrency:
+                report = await run_level(client, llm_stats, args, headers, concurrency)
+                print_report(report)
+                reports.append(report)
+        finally:
+            if llm_stats:
+                await llm_stats.aclose()
+
+    if args.json:
+        with open(args.json, "w") as output:
+            json.dump({"mode": args.mode, "reports": reports}, output, indent=2)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--app-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--llm-stats-url", default="http://127.0.0.1:8900",
+                        help="fake LLM server to read prompt token counts from, empty to skip")
+    parser.add_argument("--mode", choices=["chat", "stream", "summarize"], default="chat")
+    parser.add_argument("--student-id", type=int, default=1)
+    parser.add_argument("--pdf-id", type=int, default=None)
+    parser.add_argument("--pages", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--requests", type=int, default=100, help="requests per concurrency level")
+    parser.add_argument("--timeout", type=float, default=120)
+    parser.add_argument("--allow-cache", action="store_true")
+    parser.add_argument("--json", help="also write the reports to this file")
+    args = parser.parse_args()
+
+    asyncio.run(main(args))
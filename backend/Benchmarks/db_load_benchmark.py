@@ -0,0 +1,97 @@
+# Throughput of the database backed read endpoints under many concurrent users.
+#
+#   uvicorn main:app --port 8000 &
+#   python -m Benchmarks.db_load_benchmark --users 500 --requests 5000
+#
+# The app and this script must share SECRET_KEY so the minted tokens are
+# accepted. Every simulated user gets its own token and loops over --paths
+# until the run has sent --requests requests in total. Run it once against
+# each build to compare them; the numbers only mean something relative to a
+# run on the same machine and database.
+import argparse
+import asyncio
+import json
+import time
+
+import httpx
+import numpy as np
+
+from Utils.auth import STUDENT
+from Utils.jwt_logic import create_access_token
+
+DEFAULT_PATHS = ["/fetch_your_pdfs", "/fetch_classrooms_for_students", "/fetch_your_enrolled_classes"]
+
+
+async def run_user(client: httpx.AsyncClient, headers: dict, paths: list[str], budget: list[int], results: list):
+    number = 0
+    while budget[0] > 0:
+        budget[0] -= 1
+        path = paths[number % len(paths)]
+        number += 1
+        started = time.perf_counter()
+        try:
+            response = await client.get(path, headers=headers)
+            ok = response.status_code == 200
+        except httpx.HTTPError:
+            ok = False
+        results.append((time.perf_counter() - started, ok))
+
+
+async def run_level(args, users: int) -> dict:
+    tokens = [
+        {"Authorization": "Bearer " + create_access_token({"sub": str(user + 1), "role": STUDENT})}
+        for user in range(users)
+    ]
+    limits = httpx.Limits(max_connections=users, max_keepalive_connections=users)
+    results = []
+    budget = [args.requests]
+
+    async with httpx.AsyncClient(base_url=args.app_url, timeout=httpx.Timeout(args.timeout), limits=limits) as client:
+        # one request per user first so connection setup is not measured
+        await asyncio.gather(*(client.get(args.paths[0], headers=headers) for headers in tokens))
+        started = time.perf_counter()
+        await asyncio.gather(*(run_user(client, headers, args.paths, budget, results) for headers in tokens))
+        elapsed = time.perf_counter() - started
+
+    latencies = np.array([latency for latency, ok in results if ok]) * 1000
+    report = {
+        "users": users,
+        "requests": len(results),
+        "errors": sum(1 for _, ok in results if not ok),
+        "throughput_rps": len(latencies) / elapsed,
+    }
+    if len(latencies):
+        report.update({f"latency_p{q}_ms": float(np.percentile(latencies, q)) for q in (50, 95, 99)})
+    return report
+
+
+async def main(args):
+    reports = []
+    for users in args.users:
+        report = await run_level(args, users)
+        line = (
+            f"users={report['users']:<5} ok={report['requests'] - report['errors']:<6} err={report['errors']:<5} "
+            f"rps={report['throughput_rps']:<8.1f}"
+        )
+        if "latency_p50_ms" in report:
+            line += " latency p50/p95/p99={:.0f}/{:.0f}/{:.0f}ms".format(
+                report["latency_p50_ms"], report["latency_p95_ms"], report["latency_p99_ms"])
+        print(line)
+        reports.append(report)
+
+    if args.json:
+        with open(args.json, "w") as output:
+            json.dump({"paths": args.paths, "reports": reports}, output, indent=2)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--app-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--users", type=int, nargs="+", default=[50, 500])
+    parser.add_argument("--requests", type=int, default=5000, help="requests per user level, across all users")
+    parser.add_argument("--paths", nargs="+", default=DEFAULT_PATHS)
+    parser.add_argument("--timeout", type=float, default=120)
+    parser.add_argument("--json", help="also write the reports to this file")
+    args = parser.parse_args()
+
+    asyncio.run(main(args))
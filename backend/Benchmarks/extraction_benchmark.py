@@ -0,0 +1,76 @@
+# Pages/sec of serial vs process-pool text extraction on synthetic PDFs.
+#
+#   python -m Benchmarks.extraction_benchmark --pages 10 100 1000
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from pypdf import PdfWriter
+from pypdf.generic import DecodedStreamObject, DictionaryObject, NameObject
+
+from Utils import text_extractor
+from Utils.text_extractor import extract_pdf_file, shutdown_extraction_pool
+
+WORDS = (
+    "cell membrane protein energy gradient equation theorem proof matrix vector "
+    "market supply demand history empire treaty algorithm complexity graph tree"
+).split()
+
+
+def make_pdf(path: str, page_count: int, lines_per_page: int = 45, seed: int | None = None):
+    writer = PdfWriter()
+    font = writer._add_object(DictionaryObject({
+        NameObject("/Type"): NameObject("/Font"),
+        NameObject("/Subtype"): NameObject("/Type1"),
+        NameObject("/BaseFont"): NameObject("/Helvetica"),
+    }))
+    rng = random.Random(page_count if seed is None else seed)
+
+    for _ in range(page_count):
+        page = writer.add_blank_page(612, 792)
+        page[NameObject("/Resources")] = DictionaryObject({
+            NameObject("/Font"): DictionaryObject({NameObject("/F1"): font})
+        })
+        operations = []
+        for line in range(lines_per_page):
+            text = " ".join(rng.choice(WORDS) for _ in range(12))
+            operations.append(f"BT /F1 10 Tf 40 {760 - line * 16} Td ({text}) Tj ET")
+        content = DecodedStreamObject()
+        content.set_data("\n".join(operations).encode())
+        page[NameObject("/Contents")] = writer._add_object(content)
+
+    with open(path, "wb") as output:
+        writer.write(output)
+
+
+def pages_per_second(path: str, page_count: int, parallel: bool) -> float:
+    started = time.perf_counter()
+    extracted = extract_pdf_file(path, parallel=parallel)
+    elapsed = time.perf_counter() - started
+    assert [page["page"] for page in extracted] == list(range(1, page_count + 1))
+    return page_count / elapsed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pages", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--processes", type=int, default=text_extractor.EXTRACTION_PROCESSES)
+    args = parser.parse_args()
+
+    text_extractor.EXTRACTION_PROCESSES = args.processes
+    # warm the pool up so process start-up is not billed to the first document
+    text_extractor.get_extraction_pool().submit(os.getpid).result()
+
+    print(f"processes={args.processes}")
+    print(f"{'pages':>6} {'serial p/s':>12} {'parallel p/s':>14} {'speedup':>8}")
+    with tempfile.TemporaryDirectory() as workdir:
+        for page_count in args.pages:
+            path = os.path.join(workdir, f"{page_count}.pdf")
+            make_pdf(path, page_count)
+            serial = pages_per_second(path, page_count, parallel=False)
+            parallel = pages_per_second(path, page_count, parallel=True)
+            print(f"{page_count:>6} {serial:>12.1f} {parallel:>14.1f} {parallel / serial:>7.2f}x")
+
+    shutdown_extraction_pool()
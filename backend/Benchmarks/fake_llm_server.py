@@ -0,0 +1,137 @@
+# A local stand-in for the OpenAI chat-completions API, streaming included,
+# so the chat and summarize paths can be load tested without a real provider.
+#
+#   python -m Benchmarks.fake_llm_server --port 8900 --latency-ms 400 --tokens-per-sec 60
+#   LLM_PROVIDER=fake FAKE_LLM_URL=http://127.0.0.1:8900/v1 uvicorn main:app
+#
+# Answers are derived from a hash of the request, so the same prompt always
+# gets the same answer. --latency-ms is the time to the first token and
+# --tokens-per-sec paces the rest. GET /stats returns the request and token
+# counts seen so far; POST /stats/reset clears them.
+import argparse
+import asyncio
+import hashlib
+import json
+import random
+import time
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+from Utils.bm25_index import tokenize
+
+WORDS = (
+    "the page explains how the method works and why the result holds for the "
+    "cases discussed in the chapter with an example and a short proof"
+).split()
+
+settings = {"latency_ms": 400.0, "tokens_per_sec": 60.0, "output_tokens": 80}
+stats = {"requests": 0, "streamed": 0, "cancelled": 0, "prompt_tokens": [], "completion_tokens": 0}
+
+app = FastAPI()
+
+
+def prompt_tokens(messages: list[dict]) -> int:
+    # a word count, the same budget unit the chunker uses
+    return sum(len(tokenize(message.get("content") or "")) for message in messages)
+
+
+def answer_tokens(body: dict) -> list[str]:
+    seed = hashlib.sha256(json.dumps(body["messages"], sort_keys=True).encode()).digest()
+    rng = random.Random(seed)
+    count = body.get("max_tokens") or settings["output_tokens"]
+    return [rng.choice(WORDS) for _ in range(count)]
+
+
+def usage(prompt: int, completion: int) -> dict:
+    return {"prompt_tokens": prompt, "completion_tokens": completion, "total_tokens": prompt + completion}
+
+
+@app.post("/v1/chat/completions")
+async def chat_completions(request: Request):
+    body = await request.json()
+    prompt = prompt_tokens(body["messages"])
+    tokens = answer_tokens(body)
+    completion_id = "chatcmpl-" + hashlib.sha256(str(time.time_ns()).encode()).hexdigest()[:24]
+    stats["requests"] += 1
+    stats["prompt_tokens"].append(prompt)
+
+    if not body.get("stream"):
+        await asyncio.sleep(settings["latency_ms"] / 1000 + len(tokens) / settings["tokens_per_sec"])
+        stats["completion_tokens"] += len(tokens)
+        return JSONResponse({
+            "id": completion_id,
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body["model"],
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": " ".join(tokens)},
+                "finish_reason": "stop",
+            }],
+            "usage": usage(prompt, len(tokens)),
+        })
+
+    def chunk(delta: dict, finish_reason: str | None = None) -> str:
+        return "data: " + json.dumps({
+            "id": completion_id,
+            "object": "chat.completion.chunk",
+            "created": int(time.time()),
+            "model": body["model"],
+            "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+        }) + "\n\n"
+
+    async def events():
+        stats["streamed"] += 1
+        sent = 0
+        try:
+            await asyncio.sleep(settings["latency_ms"] / 1000)
+            yield chunk({"role": "assistant", "content": ""})
+            for index, token in enumerate(tokens):
+                if index:
+                    await asyncio.sleep(1 / settings["tokens_per_sec"])
+                yield chunk({"content": (" " if index else "") + token})
+                sent += 1
+            yield chunk({}, finish_reason="stop")
+            yield "data: [DONE]\n\n"
+        except asyncio.CancelledError:
+            stats["cancelled"] += 1
+            raise
+        finally:
+            stats["completion_tokens"] += sent
+
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+
+@app.get("/stats")
+def read_stats():
+    prompt = stats["prompt_tokens"]
+    return {
+        "requests": stats["requests"],
+        "streamed": stats["streamed"],
+        "cancelled": stats["cancelled"],
+        "prompt_tokens_total": sum(prompt),
+        "prompt_tokens_mean": (sum(prompt) / len(prompt)) if prompt else 0.0,
+        "prompt_tokens_max": max(prompt, default=0),
+        "completion_tokens_total": stats["completion_tokens"],
+    }
+
+
+@app.post("/stats/reset")
+def reset_stats():
+    stats.update(requests=0, streamed=0, cancelled=0, prompt_tokens=[], completion_tokens=0)
+    return read_stats()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--latency-ms", type=float, default=settings["latency_ms"])
+    parser.add_argument("--tokens-per-sec", type=float, default=settings["tokens_per_sec"])
+    parser.add_argument("--output-tokens", type=int, default=settings["output_tokens"])
+    args = parser.parse_args()
+
+    settings.update(latency_ms=args.latency_ms, tokens_per_sec=args.tokens_per_sec, output_tokens=args.output_tokens)
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
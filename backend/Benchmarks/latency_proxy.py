@@ -0,0 +1,80 @@
+# A TCP proxy that delays every packet by a fixed time, to give a local
+# database the round trip of one across a network.
+#
+#   python -m Benchmarks.latency_proxy --port 6543 --upstream /tmp/pgdata/.s.PGSQL.5432 --delay-ms 2 &
+#   DATABASE_URL=postgresql://postgres@127.0.0.1:6543/app uvicorn main:app
+#
+# --upstream is host:port or the path of a unix socket. The delay is added
+# once in each direction, so a query costs at least twice --delay-ms more
+# than it would without the proxy; data is forwarded in order and bandwidth
+# is not limited.
+import argparse
+import asyncio
+import time
+
+
+async def forward(reader: asyncio.StreamReader, writer: asyncio.StreamWriter, delay: float):
+    # reading goes on while earlier data waits out its delay, so the delay
+    # is added once per packet and not once per read
+    pending: asyncio.Queue = asyncio.Queue()
+
+    async def read():
+        while data := await reader.read(65536):
+            pending.put_nowait((time.monotonic() + delay, data))
+        pending.put_nowait((time.monotonic() + delay, b""))
+
+    async def write():
+        while True:
+            deliver_at, data = await pending.get()
+            wait = deliver_at - time.monotonic()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            if not data:
+                break
+            writer.write(data)
+            await writer.drain()
+
+    try:
+        await asyncio.gather(read(), write())
+    except ConnectionError:
+        pass
+    finally:
+        writer.close()
+
+
+async def open_upstream(upstream: str):
+    if upstream.startswith("/"):
+        return await asyncio.open_unix_connection(upstream)
+    host, _, port = upstream.rpartition(":")
+    return await asyncio.open_connection(host, int(port))
+
+
+async def main(args):
+    delay = args.delay_ms / 1000
+
+    async def handle(client_reader: asyncio.StreamReader, client_writer: asyncio.StreamWriter):
+        try:
+            upstream_reader, upstream_writer = await open_upstream(args.upstream)
+        except OSError:
+            client_writer.close()
+            return
+        await asyncio.gather(
+            forward(client_reader, upstream_writer, delay),
+            forward(upstream_reader, client_writer, delay),
+        )
+
+    server = await asyncio.start_server(handle, args.host, args.port)
+    print(f"forwarding {args.host}:{args.port} to {args.upstream} with {args.delay_ms}ms each way")
+    async with server:
+        await server.serve_forever()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=6543)
+    parser.add_argument("--upstream", required=True, help="host:port or a unix socket path")
+    parser.add_argument("--delay-ms", type=float, default=2.0, help="added in each direction")
+    args = parser.parse_args()
+
+    asyncio.run(main(args))
@@ -1,14 +1,21 @@
-from sqlalchemy import and_
+import secrets
+
+from sqlalchemy import and_, or_, select, update
+from sqlalchemy.orm import Session, joinedload, load_only, selectinload
 from Utils.Cloudinary_Uploader import upload_user_profile_image
-from fastapi import Depends, Form, HTTPException, Header
-from Utils.jwt_logic import verify_access_token
-from Database.connection import connect_databse
-from sqlalchemy.orm import Session
+from fastapi import Depends, Form, HTTPException
+from Utils.auth import Principal, get_principal, require_professor, require_student
+from Database.connection import INSERT_BY_DIALECT, connect_databse
 from Models.Classes import Classes
 from Models.Classroom_Content import ClassroomContent
 from Models.Enrolled_classes import Enrolled_classes
+from Models.Proffessor import Proffessor
 from fastapi import Form, File, UploadFile
 from Schemas.EnrolledInCourse import EnrolledInCourse
+from Models.Pdf_ingest_job import utcnow
+from Utils.response_cache import CATALOG_TAG, class_content_tag, professor_classes_tag, response_cache
+from Utils.pagination import DEFAULT_PAGE_SIZE, clamp_page_size, encode_cursor, keyset_filter, keyset_order
+
 def create_classroom(
     class_title: str = Form(...),
     class_capacity: int = Form(...),
@@ -16,22 +23,10 @@ def create_classroom(
     description: str = Form(...),
     classroom_password: str = Form(...),
     classroom_picture: UploadFile = File(...),
-    authorization: str | None = Header(None), 
+    principal: Principal = Depends(require_professor), 
     db: Session = Depends(connect_databse)
 ):
-    if not authorization:
-        raise HTTPException(status_code=401, detail="Authorization header missing")
-
-    if not authorization.startswith("Bearer "):
-        raise HTTPException(status_code=401, detail="Invalid authorization header")
-
-    token = authorization.split(" ")[1]
-    payload = verify_access_token(token)
-
-    if not payload or "sub" not in payload:
-        raise HTTPException(status_code=401, detail="Invalid or expired token")
-
-    professor_id = payload["sub"]
+    professor_id = principal.user_id
 
     image_url = upload_user_profile_image(classroom_picture)
 
@@ -46,63 +41,45 @@ def create_classroom(
     )
     db.add(new_class)
     db.commit()
-    db.refresh(new_class)
+    response_cache.invalidate(CATALOG_TAG, professor_classes_tag(professor_id))
     return {"message": "Classroom created successfully"}
 
 
 
 def view_your_classes(
-    authorization: str | None = Header(None), 
+    if_none_match: str | None = None,
+    principal: Principal = Depends(require_professor), 
     db: Session = Depends(connect_databse)
 ):
-    if not authorization:
-        raise HTTPException(status_code=401, detail="Authorization header missing")
-
-    if not authorization.startswith("Bearer "):
-        raise HTTPException(status_code=401, detail="Invalid authorization header")
+    professor_id = principal.user_id
 
-    token = authorization.split(" ")[1]
-    payload = verify_access_token(token)
+    def load():
+        found_classrooms = db.query(Classes).filter(Classes.professor_id == professor_id).all()
 
-    if not payload or "sub" not in payload:
-        raise HTTPException(status_code=401, detail="Invalid or expired token")
+        return [
+            {
+                "class_id":classroom.class_id,
+                "class_title": classroom.class_title,
+                "class_capacity": classroom.class_capacity,
+                "class_field": classroom.class_field,
+                "description": classroom.description,
+                "classroom_picture": classroom.classroom_picture,
+                "classroom_password": classroom.classroom_password,
+                "created_at": classroom.created_at
+            }
+            for classroom in found_classrooms
+        ]
 
-    professor_id = payload["sub"]
-    found_classrooms = db.query(Classes).filter(Classes.professor_id == professor_id).all()
-
-    return [
-        {
-            "class_id":classroom.class_id,
-            "class_title": classroom.class_title,
-            "class_capacity": classroom.class_capacity,
-            "class_field": classroom.class_field,
-            "description": classroom.description,
-            "classroom_picture": classroom.classroom_picture,
-            "classroom_password": classroom.classroom_password,
-            "created_at": classroom.created_at
-        }
-        for classroom in found_classrooms
-    ]
+    return response_cache.respond("view_your_classes", {}, [professor_classes_tag(professor_id)],
+                                  principal, if_none_match, load)
 
 
 def view_class_by_id(
     class_id: int,
-    authorization: str | None = Header(None),
+    principal: Principal = Depends(require_professor),
     db: Session = Depends(connect_databse)
 ):
-    if not authorization:
-        raise HTTPException(status_code=401, detail="Authorization header missing")
-
-    if not authorization.startswith("Bearer "):
-        raise HTTPException(status_code=401, detail="Invalid authorization header")
-
-    token = authorization.split(" ")[1]
-    payload = verify_access_token(token)
-
-    if not payload or "sub" not in payload:
-        raise HTTPException(status_code=401, detail="Invalid or expired token")
-
-    professor_id = payload["sub"]
+    professor_id = principal.user_id
 
     found_class = db.query(Classes).filter(
         and_(
@@ -124,80 +101,129 @@ def view_class_by_id(
         "created_at": found_class.created_at
     }
     
+def escape_like(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
 def fetch_classes(
-    authorization: str | None = Header(None),
+    limit: int = DEFAULT_PAGE_SIZE,
+    cursor: str | None = None,
+    class_field: str | None = None,
+    professor_id: int | None = None,
+    available: bool | None = None,
+    q: str | None = None,
+    if_none_match: str | None = None,
+    principal: Principal = Depends(get_principal),
     db: Session = Depends(connect_databse)):
     
     
-    if not authorization:
-        raise HTTPException(status_code=401, detail="Authorization header missing")
-
-    if not authorization.startswith("Bearer "):
-        raise HTTPException(status_code=401, detail="Invalid authorization header")
-
-    token = authorization.split(" ")[1]
-    payload = verify_access_token(token)
-
-    if not payload or "sub" not in payload:
-        raise HTTPException(status_code=401, detail="Invalid or expired token")
-
-    classrooms=db.query(Classes).all()
+    limit = clamp_page_size(limit)
+
+    filters = []
+    if class_field:
+        filters.append(Classes.class_field == class_field)
+    if professor_id is not None:
+        filters.append(Classes.professor_id == professor_id)
+    has_seats = or_(Classes.class_capacity.is_(None), Classes.enrolled_count < Classes.class_capacity)
+    if available is not None:
+        filters.append(has_seats if available else ~has_seats)
+    if q and q.strip():
+        pattern = f"%{escape_like(q.strip())}%"
+        filters.append(or_(Classes.class_title.ilike(pattern, escape="\\"), Classes.description.ilike(pattern, escape="\\")))
+
+    def load():
+        query = db.query(Classes).options(
+            load_only(
+                Classes.class_id,
+                Classes.class_title,
+                Classes.class_capacity,
+                Classes.class_field,
+                Classes.description,
+                Classes.classroom_picture,
+                Classes.created_at,
+            )
+        ).filter(*filters)
+        if cursor:
+            query = query.filter(keyset_filter(Classes.created_at, Classes.class_id, cursor, True))
+
+        # one extra row tells us whether there is a next page
+        classrooms = query.order_by(*keyset_order(Classes.created_at, Classes.class_id, True)).limit(limit + 1).all()
+        next_cursor = None
+        if len(classrooms) > limit:
+            classrooms = classrooms[:limit]
+            next_cursor = encode_cursor(classrooms[-1].created_at, classrooms[-1].class_id)
     
-    return[
-        {
-            "class_id":classroom.class_id,
-            "class_title": classroom.class_title,
-            "class_capacity": classroom.class_capacity,
-            "class_field": classroom.class_field,
-            "description": classroom.description,
-            "classroom_picture": classroom.classroom_picture,
-            "created_at": classroom.created_at
+        return {
+            "items": [
+                {
+                    "class_id":classroom.class_id,
+                    "class_title": classroom.class_title,
+                    "class_capacity": classroom.class_capacity,
+                    "class_field": classroom.class_field,
+                    "description": classroom.description,
+                    "classroom_picture": classroom.classroom_picture,
+                    "created_at": classroom.created_at
+                }
+            
+                for classroom in classrooms
+            ],
+            "next_cursor": next_cursor
         }
-        
-        for classroom in classrooms
-    ]
+
+    params = {"limit": limit, "cursor": cursor, "class_field": class_field, "professor_id": professor_id,
+              "available": available, "q": q}
+    # the catalog reads the same for every caller, so one entry serves them all
+    return response_cache.respond("fetch_classes", params, [CATALOG_TAG], None, if_none_match, load)
     
     
     
 def enroll_in_a_classroom(
     enrollment_data: EnrolledInCourse,  
-    authorization: str | None = Header(None),
+    principal: Principal = Depends(require_student),
     db: Session = Depends(connect_databse)
 ):
-    if not authorization:
-        raise HTTPException(status_code=401, detail="Authorization header missing")
-
-    if not authorization.startswith("Bearer "):
-        raise HTTPException(status_code=401, detail="Invalid authorization header")
-
-    token = authorization.split(" ")[1]
-    token_payload = verify_access_token(token)  
+    student_id = principal.user_id
+    class_id = enrollment_data.class_id
 
-    if not token_payload or "sub" not in token_payload:
-        raise HTTPException(status_code=401, detail="Invalid or expired token")
-
-    student_id = token_payload["sub"] 
-
-    classroom = db.query(Classes).filter(
-        Classes.classroom_password == enrollment_data.classroom_password
-    ).first()
-    if not classroom:
+    classroom_password = db.scalar(select(Classes.classroom_password).filter(Classes.class_id == class_id))
+    if classroom_password is None:
+        raise HTTPException(status_code=404, detail="Class not found")
+    if not secrets.compare_digest(classroom_password.encode(), enrollment_data.classroom_password.encode()):
         raise HTTPException(status_code=401, detail="Invalid classroom password")
 
-    existing_enrollment = db.query(Enrolled_classes).filter(
-        Enrolled_classes.enrolled_student_id == student_id,
-        Enrolled_classes.enrolled_class_id == enrollment_data.class_id
-    ).first()
-    
-    if existing_enrollment:
+    # the unique (student, class) index decides duplicates, so two requests
+    # from the same student cannot both get past a separate existence check
+    insert = INSERT_BY_DIALECT[db.get_bind().dialect.name]
+    enrollment_id = db.scalar(
+        insert(Enrolled_classes)
+        .values(enrolled_student_id=student_id, enrolled_class_id=class_id, joined_at=utcnow())
+        .on_conflict_do_nothing(index_elements=["enrolled_student_id", "enrolled_class_id"])
+        .returning(Enrolled_classes.enrolled_courses_id)
+    )
+    if enrollment_id is None:
+        db.rollback()
         raise HTTPException(status_code=400, detail="Already enrolled in this class")
 
-    new_enrollment = Enrolled_classes(
-        enrolled_student_id=student_id,
-        enrolled_class_id=enrollment_data.class_id
-    )
-    db.add(new_enrollment)
+    # taking the seat last keeps the lock on the class row, which every
+    # enrollment into this class queues on, down to the commit below
+    seat = db.execute(
+        update(Classes)
+        .where(
+            Classes.class_id == class_id,
+            or_(Classes.class_capacity.is_(None), Classes.enrolled_count < Classes.class_capacity)
+        )
+        .values(enrolled_count=Classes.enrolled_count + 1)
+        .returning(Classes.enrolled_count, Classes.class_capacity)
+    ).first()
+    if seat is None:
+        db.rollback()
+        raise HTTPException(status_code=409, detail="Class is full")
+
     db.commit()
+    # the catalog only tells whether a class has seats left, which changes
+    # with the enrollment that takes the last one
+    if seat.class_capacity is not None and seat.enrolled_count >= seat.class_capacity:
+        response_cache.invalidate(CATALOG_TAG)
 
     return {
         "message": "Course enrolled successfully"
@@ -206,23 +232,11 @@ def enroll_in_a_classroom(
     
     
     
-def fetch_enrolled_classes(authorization: str | None = Header(None),
+def fetch_enrolled_classes(principal: Principal = Depends(require_student),
     db: Session = Depends(connect_databse)):
     
     
-    if not authorization:
-        raise HTTPException(status_code=401, detail="Authorization header missing")
-
-    if not authorization.startswith("Bearer "):
-        raise HTTPException(status_code=401, detail="Invalid authorization header")
-
-    token = authorization.split(" ")[1]
-    token_payload = verify_access_token(token)  
-
-    if not token_payload or "sub" not in token_payload:
-        raise HTTPException(status_code=401, detail="Invalid or expired token")
-
-    student_id = token_payload["sub"] 
+    student_id = principal.user_id
     
     enrolled_classes=db.query(Classes).join(Enrolled_classes,Enrolled_classes.enrolled_class_id==Classes.class_id).filter(Enrolled_classes.enrolled_student_id==student_id).all()
     
@@ -243,66 +257,91 @@ def fetch_enrolled_classes(authorization: str | None = Header(None),
     
     
 
-def fetch_enrolled_classes_by_id(class_id:int,authorization: str | None = Header(None),
+def fetch_enrolled_classes_by_id(class_id:int,principal: Principal = Depends(require_student),
     db: Session = Depends(connect_databse)):
     
     
-    if not authorization:
-        raise HTTPException(status_code=401, detail="Authorization header missing")
-
-    if not authorization.startswith("Bearer "):
-        raise HTTPException(status_code=401, detail="Invalid authorization header")
-
-    token = authorization.split(" ")[1]
-    token_payload = verify_access_token(token)  
-
-    if not token_payload or "sub" not in token_payload:
-        raise HTTPException(status_code=401, detail="Invalid or expired token")
-
-    student_id = token_payload["sub"] 
+    student_id = principal.user_id
     
-    enrolled_classes=db.query(Classes).join(Enrolled_classes,Enrolled_classes.enrolled_class_id==Classes.class_id).join(ClassroomContent,ClassroomContent.classroom_id==Classes.class_id).filter(Enrolled_classes.enrolled_student_id==student_id).all()
+    # two queries whatever the number of files: the class joined to its
+    # enrollment and professor, then every content row in one IN query
+    enrolled_class=(
+        db.query(Classes)
+        .join(Enrolled_classes,and_(
+            Enrolled_classes.enrolled_class_id==Classes.class_id,
+            Enrolled_classes.enrolled_student_id==student_id
+        ))
+        .filter(Classes.class_id==class_id)
+        .options(
+            load_only(
+                Classes.class_id,
+                Classes.class_title,
+                Classes.class_field,
+                Classes.class_capacity,
+                Classes.enrolled_count,
+                Classes.description,
+                Classes.classroom_picture,
+                Classes.created_at,
+            ),
+            joinedload(Classes.professor).load_only(
+                Proffessor.id,
+                Proffessor.first_name,
+                Proffessor.last_name,
+                Proffessor.educational_field,
+                Proffessor.profile_picture,
+            ),
+            selectinload(Classes.classroom_contents),
+        )
+        .first()
+    )
+    if not enrolled_class:
+        raise HTTPException(status_code=404, detail="Class not found among your enrolled classes")
     
-    return[
-        {
-            "class_id":enrolled_class.class_id,
-            "title": enrolled_class.class_title,
-            "field": enrolled_class.class_field,
-            "capacity": enrolled_class.class_capacity,
-            "description": enrolled_class.description,
-            "picture": enrolled_class.classroom_picture,
-            "created_at": enrolled_class.created_at,
-        }
-        
-        for enrolled_class in enrolled_classes
-    ]
+    professor=enrolled_class.professor
+    return{
+        "class_id":enrolled_class.class_id,
+        "title": enrolled_class.class_title,
+        "field": enrolled_class.class_field,
+        "capacity": enrolled_class.class_capacity,
+        "enrolled_count": enrolled_class.enrolled_count,
+        "description": enrolled_class.description,
+        "picture": enrolled_class.classroom_picture,
+        "created_at": enrolled_class.created_at,
+        "professor": {
+            "professor_id": professor.id,
+            "first_name": professor.first_name,
+            "last_name": professor.last_name,
+            "educational_field": professor.educational_field,
+            "profile_picture": professor.profile_picture,
+        },
+        "contents": [
+            {
+                "content_id": content.classroom_content_id,
+                "file": content.filename,
+                "filecontent": content.cloudinary_public_id,
+                "description": content.description,
+                "upload_date": content.uploaded_at,
+            }
+            for content in enrolled_class.classroom_contents
+        ]
+    }
     
-def fetch_enrolled_classes_content_by_id(class_id:int,authorization: str | None = Header(None),
+def fetch_enrolled_classes_content_by_id(class_id:int,if_none_match: str | None = None,
+    principal: Principal = Depends(require_student),
     db: Session = Depends(connect_databse)):
     
-    if not authorization:
-        raise HTTPException(status_code=401, detail="Authorization header missing")
-
-    if not authorization.startswith("Bearer "):
-        raise HTTPException(status_code=401, detail="Invalid authorization header")
-
-    token = authorization.split(" ")[1]
-    token_payload = verify_access_token(token)  
-
-    if not token_payload or "sub" not in token_payload:
-        raise HTTPException(status_code=401, detail="Invalid or expired token")
-
-    
-    
-    
-    enrolled_classes_content=db.query(ClassroomContent).filter(ClassroomContent.classroom_id==class_id).all()
-    
-    return[
-        {
-        "file":content.filename ,
-        "filecontent":content.cloudinary_public_id,
-        "description":content.description ,
-        "upload_date":content.uploaded_at ,
-        }
-        for content in enrolled_classes_content
-    ]
\ No newline at end of file
+    def load():
+        enrolled_classes_content=db.query(ClassroomContent).filter(ClassroomContent.classroom_id==class_id).all()
+        
+        return[
+            {
+            "file":content.filename ,
+            "filecontent":content.cloudinary_public_id,
+            "description":content.description ,
+            "upload_date":content.uploaded_at ,
+            }
+            for content in enrolled_classes_content
+        ]
+
+    return response_cache.respond("fetch_enrolled_classes_content_by_id", {"class_id": class_id},
+                                  [class_content_tag(class_id)], principal, if_none_match, load)
\ No newline at end of file
@@ -1,36 +1,57 @@
-from fastapi import File, UploadFile
-from Utils.text_extractor import textextractor
-from openai import OpenAI
-from dotenv import load_dotenv
-import os
-
-def pdfanalyzer(file: UploadFile = File(...)):
-    load_dotenv()
-    key = os.getenv("OPENROUTER_API_KEY")
-    chunked_text = textextractor(file)
-    print(chunked_text)
-
-    client = OpenAI(
-        base_url="https://openrouter.ai/api/v1",
-        api_key=key,
-    )
-
-    completion = client.chat.completions.create(
-        extra_body={},
-        model="cognitivecomputations/dolphin-mistral-24b-venice-edition:free",
-        messages=[
-            {
-                "role": "system",
-                "content": "you are an ai assistant that will summarize the text of this pdf"
-            },
-            {
-                "role": "user",
-                "content": f"summarize this {chunked_text}"
-            }
-        ]
-    )
-    summary=completion.choices[0].message.content
-    
-    print(summary)
-
-    return {"message": summary}
+import asyncio
+from fastapi import Depends, File, HTTPException, UploadFile, status
+from fastapi.responses import StreamingResponse
+from openai import OpenAIError
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+from Database.connection import connect_databse
+from Utils.auth import Principal, require_student
+from Utils.blob_store import get_blob_store
+from Utils.summarizer import split_sections, summarize_sections
+from Utils.summary_store import load_or_extract_pages, load_summary, store_summary
+from Utils.sse import SSE_HEADERS, sse_event
+
+async def pdfanalyzer(file: UploadFile = File(...), principal: Principal = Depends(require_student), db: Session = Depends(connect_databse)):
+    if not file.filename.lower().endswith(".pdf"):
+        raise HTTPException(status_code=status.HTTP_406_NOT_ACCEPTABLE,detail="pls upload a pdf")
+
+    # the file goes to the blob store first, its hash is what summaries and
+    # extracted text are stored under
+    pdf_sha256, _ = await run_in_threadpool(get_blob_store().put_file, file.file)
+
+    stored = await run_in_threadpool(load_summary, db, pdf_sha256)
+    if stored:
+        async def stored_events():
+            yield sse_event({"message": stored.summary, "sections": stored.section_count, "cached": True}, event="done")
+
+        return StreamingResponse(stored_events(), media_type="text/event-stream", headers=SSE_HEADERS)
+
+    pages = await run_in_threadpool(load_or_extract_pages, db, pdf_sha256)
+    sections = split_sections((page["page"], page["page_content"]) for page in pages)
+    if not sections:
+        raise HTTPException(status_code=422, detail="No text could be extracted from this PDF")
+
+    async def summary_events():
+        # progress is reported from the summarizer tasks, the queue hands it
+        # over to this generator; None marks the end of the run
+        progress = asyncio.Queue()
+        task = asyncio.create_task(summarize_sections(sections, on_progress=progress.put_nowait, user_id=principal.user_id))
+        task.add_done_callback(lambda _: progress.put_nowait(None))
+        try:
+            while (event := await progress.get()) is not None:
+                yield sse_event(event, event="progress")
+            summary = task.result()
+        except HTTPException as e:
+            yield sse_event({"detail": e.detail}, event="error")
+            return
+        except OpenAIError as e:
+            yield sse_event({"detail": str(e)}, event="error")
+            return
+        finally:
+            # the client went away, stop the calls that are still running
+            task.cancel()
+
+        await run_in_threadpool(store_summary, db, pdf_sha256, summary, len(sections))
+        yield sse_event({"message": summary, "sections": len(sections), "cached": False}, event="done")
+
+    return StreamingResponse(summary_events(), media_type="text/event-stream", headers=SSE_HEADERS)
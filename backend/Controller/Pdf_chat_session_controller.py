@@ -0,0 +1,82 @@
+from fastapi import Depends, HTTPException
+from sqlalchemy.orm import Session
+from Database.connection import connect_databse
+from Utils.auth import Principal, require_student
+from Models.Pdfinventory import Pdfinventory
+from Models.Pdf_chat_session import PdfChatSession
+from Models.Pdf_chat_message import PdfChatMessage
+
+
+def create_chat_session(pdf_id: int, principal: Principal = Depends(require_student),
+    db: Session = Depends(connect_databse)):
+
+    student_id = principal.user_id
+
+    pdf_exists = db.query(Pdfinventory.pdf_id).filter(
+        Pdfinventory.pdf_id == pdf_id,
+        Pdfinventory.student_id == student_id
+    ).first()
+    if not pdf_exists:
+        raise HTTPException(status_code=404, detail="PDF not found for this student")
+
+    new_session = PdfChatSession(student_id=student_id, pdf_id=pdf_id)
+    db.add(new_session)
+    db.commit()
+
+    return {
+        "session_id": new_session.session_id,
+        "pdf_id": pdf_id,
+        "created_at": new_session.created_at
+    }
+
+
+def fetch_chat_sessions(pdf_id: int, principal: Principal = Depends(require_student),
+    db: Session = Depends(connect_databse)):
+
+    student_id = principal.user_id
+
+    chat_sessions = db.query(PdfChatSession).filter(
+        PdfChatSession.pdf_id == pdf_id,
+        PdfChatSession.student_id == student_id
+    ).order_by(PdfChatSession.updated_at.desc()).all()
+
+    return [
+        {
+            "session_id": chat_session.session_id,
+            "created_at": chat_session.created_at,
+            "updated_at": chat_session.updated_at
+        }
+        for chat_session in chat_sessions
+    ]
+
+
+def fetch_chat_session(pdf_id: int, session_id: int, principal: Principal = Depends(require_student),
+    db: Session = Depends(connect_databse)):
+
+    student_id = principal.user_id
+
+    chat_session = db.query(PdfChatSession).filter(
+        PdfChatSession.session_id == session_id,
+        PdfChatSession.pdf_id == pdf_id,
+        PdfChatSession.student_id == student_id
+    ).first()
+    if not chat_session:
+        raise HTTPException(status_code=404, detail="Chat session not found for this PDF")
+
+    # the full transcript, including turns already rolled into the summary
+    messages = db.query(PdfChatMessage).filter(
+        PdfChatMessage.session_id == session_id
+    ).order_by(PdfChatMessage.message_id).all()
+
+    return {
+        "session_id": chat_session.session_id,
+        "summary": chat_session.summary,
+        "messages": [
+            {
+                "role": message.role,
+                "content": message.content,
+                "created_at": message.created_at
+            }
+            for message in messages
+        ]
+    }
@@ -1,18 +1,31 @@
-from fastapi import APIRouter, Depends, Form, File, Header, UploadFile, HTTPException,status
+from fastapi import APIRouter, Depends, Form, File, UploadFile, HTTPException,status
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 from Database.connection import connect_databse
 from Models.Proffessor import Proffessor
 from Utils.Cloudinary_Uploader import upload_user_profile_image
-from Utils.hash_password import hash_password,verify_password
+from starlette.concurrency import run_in_threadpool
+from Utils.hash_password import needs_rehash, password_hasher
 from Schemas.professor_schema import professor_login
-from Utils.jwt_logic import create_access_token, verify_access_token
+from Utils.jwt_logic import create_access_token
+from Utils.auth import PROFESSOR, Principal, require_professor
+from Utils.response_cache import profile_tag, response_cache
 
 
 
 router = APIRouter()
 
 
-def register_professor(
+def commit_unique_email(db: Session):
+    # the unique index settles two registrations racing for the same email
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="email already registered")
+
+
+async def register_professor(
     first_name: str = Form(...),
     last_name: str = Form(...),
     phone_number: int = Form(...),
@@ -24,9 +37,13 @@ def register_professor(
     profile_picture: UploadFile = File(...),
     db: Session = Depends(connect_databse),
 ):
-    image_url = upload_user_profile_image(profile_picture)
+    if await run_in_threadpool(db.query(Proffessor.id).filter(Proffessor.email == email).first):
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="email already registered")
 
-    hashed_pw = hash_password(password)
+    # hashed first, a login rush turning this away should not leave an upload behind
+    hashed_pw = await password_hasher.hash(password)
+
+    image_url = await run_in_threadpool(upload_user_profile_image, profile_picture)
 
     new_professor = Proffessor(
         first_name=first_name,
@@ -42,23 +59,28 @@ def register_professor(
 
     
     db.add(new_professor)
-    db.commit()
-    db.refresh(new_professor)
+    await run_in_threadpool(commit_unique_email, db)
    
     return {"message": "Professor registered successfully"}
 
 
-def login_professor(payload: professor_login, db: Session = Depends(connect_databse)):
-    found_user = db.query(Proffessor).filter(Proffessor.email == payload.email).first()
+async def login_professor(payload: professor_login, db: Session = Depends(connect_databse)):
+    found_user = await run_in_threadpool(db.query(Proffessor).filter(Proffessor.email == payload.email).first)
 
     if not found_user:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="no user with is email found")
 
     
-    if not verify_password(payload.password, found_user.password):
+    if not await password_hasher.verify(payload.password, found_user.password):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="incorrect password")
 
-    token = create_access_token({"sub": str(found_user.id)})
+    token = create_access_token({"sub": str(found_user.id), "role": PROFESSOR})
+
+    if needs_rehash(found_user.password):
+        new_hash = await password_hasher.rehash(payload.password)
+        if new_hash:
+            found_user.password = new_hash
+            await run_in_threadpool(db.commit)
 
     return {
         "token": token,
@@ -67,34 +89,27 @@ def login_professor(payload: professor_login, db: Session = Depends(connect_data
     }
     
     
-def view_profile(authorization: str | None = Header(None),db: Session = Depends(connect_databse)):
-    if not authorization:
-        raise HTTPException(status_code=401, detail="Authorization header missing")
-
-    if not authorization.startswith("Bearer "):
-        raise HTTPException(status_code=401, detail="Invalid authorization header")
-
-    token = authorization.split(" ")[1]
-    payload = verify_access_token(token)
-
-    if not payload or "sub" not in payload:
-        raise HTTPException(status_code=401, detail="Invalid or expired token")
-
-    professor_id = payload["sub"]
+def view_profile(principal: Principal = Depends(require_professor),db: Session = Depends(connect_databse)):
+    professor_id = principal.user_id
     
-    user_profile=db.query(Proffessor).filter(Proffessor.id==professor_id).first()
-    
-    return {
-        "first_name": user_profile.first_name,
-        "last_name": user_profile.last_name,
-        "phone_number": user_profile.phone_number,
-        "email": user_profile.email,
-        "country": user_profile.country,
-        "educational_field": user_profile.educational_field,
-        "description": user_profile.description,
-        "joined_at": user_profile.joined_at,
-        "profile_picture": user_profile.profile_picture
-    }
+    def load():
+        user_profile=db.get(Proffessor, professor_id)
+        
+        return {
+            "first_name": user_profile.first_name,
+            "last_name": user_profile.last_name,
+            "phone_number": user_profile.phone_number,
+            "email": user_profile.email,
+            "country": user_profile.country,
+            "educational_field": user_profile.educational_field,
+            "description": user_profile.description,
+            "joined_at": user_profile.joined_at,
+            "profile_picture": user_profile.profile_picture
+        }
+
+    # served over POST, so there is no If-None-Match to answer with a 304
+    return response_cache.respond("professor_profile", {}, [profile_tag(PROFESSOR, professor_id)],
+                                  principal, None, load)
     
     
 def edit_profile(
@@ -107,25 +122,13 @@ def edit_profile(
     description: str = Form(...),  
     profile_picture: UploadFile = File(...),
     db: Session = Depends(connect_databse),
-    authorization: str | None = Header(None)):
+    principal: Principal = Depends(require_professor)):
     
     
-    if not authorization:
-        raise HTTPException(status_code=401, detail="Authorization header missing")
-
-    if not authorization.startswith("Bearer "):
-        raise HTTPException(status_code=401, detail="Invalid authorization header")
-
-    token = authorization.split(" ")[1]
-    payload = verify_access_token(token)
-
-    if not payload or "sub" not in payload:
-        raise HTTPException(status_code=401, detail="Invalid or expired token")
-
-    professor_id = payload["sub"]
+    professor_id = principal.user_id
     
     
-    found_professor=db.query(Proffessor).filter(Proffessor.id==professor_id).first()
+    found_professor=db.get(Proffessor, professor_id)
     
     image_url = upload_user_profile_image(profile_picture)
     found_professor.first_name=first_name
@@ -137,8 +140,8 @@ def edit_profile(
     found_professor.description=description
     found_professor.profile_picture=image_url
     
-    db.commit()
-    db.refresh(found_professor)
+    commit_unique_email(db)
+    response_cache.invalidate(profile_tag(PROFESSOR, professor_id))
     
     
     return{"message":"use data has been modfied"}
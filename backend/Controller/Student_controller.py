@@ -1,13 +1,26 @@
 from Models.Students import Student
-from fastapi import File, Form,Depends, Header, UploadFile,HTTPException,status
+from fastapi import File, Form,Depends, UploadFile,HTTPException,status
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 from Database.connection import connect_databse
 from Utils.Cloudinary_Uploader import upload_user_profile_image
-from Utils.hash_password import hash_password, verify_password
+from starlette.concurrency import run_in_threadpool
+from Utils.hash_password import needs_rehash, password_hasher
 from Schemas.student_schema import studentlogin
-from Utils.jwt_logic import create_access_token, verify_access_token
+from Utils.jwt_logic import create_access_token
+from Utils.auth import STUDENT, Principal, require_student
+from Utils.response_cache import profile_tag, response_cache
 
-def register_student( 
+def commit_unique_email(db:Session):
+    # the unique index settles two registrations racing for the same email
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT,detail="email already registered")
+
+
+async def register_student( 
     first_name:str=Form(...),
     last_name:str=Form(...),
     email:str=Form(...),
@@ -20,9 +33,13 @@ def register_student(
     db:Session=Depends(connect_databse)
     ):
     
-    image_url=upload_user_profile_image(profile_image)
+    if await run_in_threadpool(db.query(Student.student_id).filter(Student.email==email).first):
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT,detail="email already registered")
+    
+    # hashed first, a login rush turning this away should not leave an upload behind
+    hashed_password=await password_hasher.hash(password)
     
-    hashed_password=hash_password(password)
+    image_url=await run_in_threadpool(upload_user_profile_image, profile_image)
     
     new_student=Student(
         first_name=first_name,
@@ -36,23 +53,30 @@ def register_student(
         descritpion=descritpion
     )
     db.add(new_student)
-    db.commit()
-    db.refresh(new_student)
+    await run_in_threadpool(commit_unique_email, db)
     return{
         "message":"user registered successfully"
     }
     
     
-def login_student(payload:studentlogin,db:Session=Depends(connect_databse)):
-    found_student=db.query(Student).filter(Student.email==payload.email).first()
+async def login_student(payload:studentlogin,db:Session=Depends(connect_databse)):
+    found_student=await run_in_threadpool(db.query(Student).filter(Student.email==payload.email).first)
     
     if not found_student :
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,detail="email not found")
     
-    if not verify_password(payload.password, found_student.password):
+    if not await password_hasher.verify(payload.password, found_student.password):
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,detail="email not found")
     
-    token=create_access_token({"sub": str(found_student.student_id)})
+    token=create_access_token({"sub": str(found_student.student_id), "role": STUDENT})
+    
+    if needs_rehash(found_student.password):
+        new_hash=await password_hasher.rehash(payload.password)
+        if new_hash:
+            found_student.password=new_hash
+            await run_in_threadpool(db.commit)
+            # the profile response carries the password hash
+            await run_in_threadpool(response_cache.invalidate, profile_tag(STUDENT, found_student.student_id))
     
     return{
         "token": token,
@@ -61,35 +85,28 @@ def login_student(payload:studentlogin,db:Session=Depends(connect_databse)):
     }
 
 
-def view_profile(authorization: str | None = Header(None),db: Session = Depends(connect_databse)):
-    if not authorization:
-        raise HTTPException(status_code=401, detail="Authorization header missing")
-
-    if not authorization.startswith("Bearer "):
-        raise HTTPException(status_code=401, detail="Invalid authorization header")
-
-    token = authorization.split(" ")[1]
-    payload = verify_access_token(token)
-
-    if not payload or "sub" not in payload:
-        raise HTTPException(status_code=401, detail="Invalid or expired token")
+def view_profile(if_none_match: str | None = None,principal: Principal = Depends(require_student),
+    db: Session = Depends(connect_databse)):
+    student_id = principal.user_id
+    
+    def load():
+        found_student=db.get(Student, student_id)
+        
+        return {
+            "first_name": found_student.first_name,
+            "last_name": found_student.last_name,
+            "email": found_student.email,
+            "password": found_student.password,
+            "phone_number": found_student.phone_number,
+            "academic_level": found_student.academic_level,
+            "profile_image": found_student.profile_image,
+            "country": found_student.country,
+            "descritpion": found_student.descritpion,
+            "joined_at": found_student.joined_at
+        }
 
-    student_id = payload["sub"]
-    
-    found_student=db.query(Student).filter(Student.student_id==student_id).first()
-    
-    return {
-        "first_name": found_student.first_name,
-        "last_name": found_student.last_name,
-        "email": found_student.email,
-        "password": found_student.password,
-        "phone_number": found_student.phone_number,
-        "academic_level": found_student.academic_level,
-        "profile_image": found_student.profile_image,
-        "country": found_student.country,
-        "descritpion": found_student.descritpion,
-        "joined_at": found_student.joined_at
-    }
+    return response_cache.respond("student_profile", {}, [profile_tag(STUDENT, student_id)],
+                                  principal, if_none_match, load)
     
     
 def edit_your_profile(first_name:str=Form(...),
@@ -100,26 +117,14 @@ def edit_your_profile(first_name:str=Form(...),
     profile_image: UploadFile = File(...),
     country:str=Form(...),
     descritpion:str=Form(...),
-    authorization: str | None = Header(None),
+    principal: Principal = Depends(require_student),
     db:Session=Depends(connect_databse)):
     
         
-    if not authorization:
-        raise HTTPException(status_code=401, detail="Authorization header missing")
-
-    if not authorization.startswith("Bearer "):
-        raise HTTPException(status_code=401, detail="Invalid authorization header")
-
-    token = authorization.split(" ")[1]
-    payload = verify_access_token(token)
-
-    if not payload or "sub" not in payload:
-        raise HTTPException(status_code=401, detail="Invalid or expired token")
-
-    student_id = payload["sub"]
+    student_id = principal.user_id
     
     
-    found_student=db.query(Student).filter(Student.student_id==student_id).first()
+    found_student=db.get(Student, student_id)
 
     image_url=upload_user_profile_image(profile_image)
     
@@ -132,10 +137,12 @@ def edit_your_profile(first_name:str=Form(...),
     found_student.country=country
     found_student.descritpion=descritpion
     
-    db.commit()
-    db.refresh(found_student)
+    commit_unique_email(db)
+    response_cache.invalidate(profile_tag(STUDENT, student_id))
     
     
     return{"message":"user profile has been updated"}
 
 
+def fetch_password_hashing_stats():
+    return password_hasher.stats()
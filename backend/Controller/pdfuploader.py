@@ -1,172 +1,479 @@
 import os
 from dotenv import load_dotenv
 from fastapi import Depends, File, HTTPException, Header,UploadFile,status
-import httpx
-from openai import BaseModel, OpenAI
-from sqlalchemy.orm import Session
+from fastapi.responses import FileResponse, JSONResponse, Response, StreamingResponse
+from starlette.background import BackgroundTask
+from starlette.concurrency import run_in_threadpool
+import hashlib
+import io
+from openai import OpenAIError
+from sqlalchemy import func
+from sqlalchemy.orm import Session, load_only, undefer
 from Database.connection import connect_databse
-from Utils.jwt_logic import verify_access_token
+from Utils.auth import Principal, require_student
 from Models.Pdfinventory import Pdfinventory
-from Utils.text_extractor import textextractor
-import base64
+from Models.Pdf_ingest_job import PdfIngestJob
+from Models.Pdf_chunk import PdfChunk
+from Models.Pdf_chat_session import PdfChatSession
+from Utils.ingest_queue import ingest_queue
+from Utils.chunker import chunks_from_pages
+from Utils.bm25_index import build_bm25_index, search_bm25_index, format_chunks_for_prompt
+from Utils.vector_index import build_vector_index, search_vector_index
+from Utils.blob_store import get_blob_store
+from Utils.http_range import content_disposition, etag_matches, iter_file_range, parse_range_header
+from Utils.fulltext_search import search_chunks
+from Utils.answer_cache import answer_cache, answer_cache_key
+from Utils.llm_client import CHAT_MODEL, llm_client
+from Utils.sse import SSE_HEADERS, sse_event
+from Utils.chat_history import compact_chat_session, history_messages, record_turn, within_history_budget
+from Utils.pagination import DEFAULT_PAGE_SIZE, clamp_page_size, encode_cursor, keyset_filter, keyset_order
 from Schemas.ChatRequest import ChatRequest
 
+CHAT_CONTEXT_CHUNKS = int(os.getenv("CHAT_CONTEXT_CHUNKS", "5"))
+
+PDF_SORT_COLUMNS = {
+    "created_at": Pdfinventory.created_at,
+    "pdf_name": Pdfinventory.pdf_name,
+    "pdf_size": func.coalesce(Pdfinventory.pdf_size, 0),
+}
+
+
+def rank_chunks(question: str, retrieval_mode: str, search_index: dict, embeddings: bytes | None):
+    if retrieval_mode == "dense":
+        return search_vector_index(embeddings, question, top_k=CHAT_CONTEXT_CHUNKS)
+    return search_bm25_index(search_index, question, top_k=CHAT_CONTEXT_CHUNKS)
+
+
+def retrieve_relevant_chunks(db: Session, pdf: Pdfinventory, question: str, retrieval_mode: str = "bm25"):
+    if pdf.pdf_chunked_text:
+        # pdfs indexed before the pdf_chunk table existed keep their chunks on
+        # the row; one dict per page rows are re-chunked and re-indexed here
+        chunks = chunks_from_pages(pdf.pdf_chunked_text)
+        legacy = chunks is not pdf.pdf_chunked_text
+        search_index = build_bm25_index(chunks) if legacy or not pdf.pdf_search_index else pdf.pdf_search_index
+        embeddings = None
+        if retrieval_mode == "dense":
+            embeddings = build_vector_index(chunks) if legacy or not pdf.pdf_embeddings else pdf.pdf_embeddings
+        ranked = rank_chunks(question, retrieval_mode, search_index, embeddings)
+        return [{**chunks[ordinal], "score": score} for ordinal, score in ranked]
+
+    if pdf.pdf_search_index is None:
+        raise HTTPException(status_code=409, detail="PDF is still being processed")
+
+    # the embeddings are only loaded for dense retrieval; rows whose
+    # embeddings were dropped by migration 0007 get them rebuilt here once
+    embeddings = None
+    if retrieval_mode == "dense":
+        embeddings = pdf.pdf_embeddings
+        if embeddings is None:
+            texts = db.query(PdfChunk.text).filter(PdfChunk.pdf_id == pdf.pdf_id).order_by(PdfChunk.ordinal).all()
+            embeddings = build_vector_index([{"text": text} for text, in texts])
+            pdf.pdf_embeddings = embeddings
+            db.commit()
+    ranked = rank_chunks(question, retrieval_mode, pdf.pdf_search_index, embeddings)
+    rows = db.query(PdfChunk).filter(
+        PdfChunk.pdf_id == pdf.pdf_id,
+        PdfChunk.ordinal.in_([ordinal for ordinal, _ in ranked])
+    ).all()
+    by_ordinal = {row.ordinal: row for row in rows}
+
+    return [
+        {
+            "ordinal": ordinal,
+            "page_start": by_ordinal[ordinal].page_start,
+            "page_end": by_ordinal[ordinal].page_end,
+            "text": by_ordinal[ordinal].text,
+            "score": score,
+        }
+        for ordinal, score in ranked
+        if ordinal in by_ordinal
+    ]
+
+
+def load_pdf_chunks(db: Session, pdf_id: int):
+    return [
+        {
+            "ordinal": chunk.ordinal,
+            "page_start": chunk.page_start,
+            "page_end": chunk.page_end,
+            "char_start": chunk.char_start,
+            "char_end": chunk.char_end,
+            "text": chunk.text,
+        }
+        for chunk in db.query(PdfChunk).filter(PdfChunk.pdf_id == pdf_id).order_by(PdfChunk.ordinal)
+    ]
+
+
+def pdf_file_url(pdf_id: int) -> str:
+    return f"/student_pdf/{pdf_id}/file"
 
 
 async def upload_your_pdf(
     file: UploadFile = File(...),
-    authorization: str = Header(...),
+    principal: Principal = Depends(require_student),
     db: Session = Depends(connect_databse)
 ):
+    student_id = principal.user_id
     
-    
-    
-    content = await file.read()
-    
-    if not authorization:
-        raise HTTPException(status_code=401, detail="Authorization header missing")
-
-    if not authorization.startswith("Bearer "):
-        raise HTTPException(status_code=401, detail="Invalid authorization header")
-
-    token = authorization.split(" ")[1]
-    payload = verify_access_token(token)
-
-    if not payload or "sub" not in payload:
-        raise HTTPException(status_code=401, detail="Invalid or expired token")
+    if not file.filename.lower().endswith(".pdf"):
+        raise HTTPException(status_code=status.HTTP_406_NOT_ACCEPTABLE,detail="pls upload a pdf")
 
-    student_id = payload["sub"]
-    
-    extracted_text=textextractor(file)
-    
+    # only the file is stored here, extraction and indexing run on the ingest
+    # workers so a large pdf never blocks the event loop
+    pdf_sha256, pdf_size = await run_in_threadpool(get_blob_store().put_file, file.file)
     
     new_pdf=Pdfinventory(
         student_id = student_id,
         pdf_name = file.filename,
-        pdf_content = content,
-        pdf_chunked_text=extracted_text
+        pdf_sha256 = pdf_sha256,
+        pdf_size = pdf_size
     )
-    
     db.add(new_pdf)
+    db.flush()
+
+    new_job=PdfIngestJob(pdf_id=new_pdf.pdf_id)
+    db.add(new_job)
     db.commit()
-    db.refresh(new_pdf)
+    ingest_queue.notify()
     
-    return{"message":"File uploaded successfully"}
+    return{
+        "message":"File uploaded successfully, processing has started",
+        "pdf_id":new_pdf.pdf_id,
+        "job_id":new_job.job_id,
+        "status":new_job.status
+    }
 
 
-def fetch_your_pdfs(authorization: str = Header(...),
+def fetch_ingest_job_status(job_id: int, principal: Principal = Depends(require_student),
     db: Session = Depends(connect_databse)):
-    
-    
-    if not authorization:
-        raise HTTPException(status_code=401, detail="Authorization header missing")
 
-    if not authorization.startswith("Bearer "):
-        raise HTTPException(status_code=401, detail="Invalid authorization header")
+    student_id = principal.user_id
+
+    job = db.query(PdfIngestJob).join(Pdfinventory, Pdfinventory.pdf_id == PdfIngestJob.pdf_id).filter(
+        PdfIngestJob.job_id == job_id,
+        Pdfinventory.student_id == student_id
+    ).first()
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found for this student")
 
-    token = authorization.split(" ")[1]
-    payload = verify_access_token(token)
+    return {
+        "job_id": job.job_id,
+        "pdf_id": job.pdf_id,
+        "status": job.status,
+        "pages_done": job.pages_done,
+        "pages_total": job.pages_total,
+        "attempts": job.attempts,
+        "error": job.error,
+        "created_at": job.created_at,
+        "updated_at": job.updated_at
+    }
 
-    if not payload or "sub" not in payload:
-        raise HTTPException(status_code=401, detail="Invalid or expired token")
 
-    student_id = payload["sub"]
+def fetch_your_pdfs(limit: int = DEFAULT_PAGE_SIZE, cursor: str | None = None, sort_by: str = "created_at",
+    order: str = "desc", principal: Principal = Depends(require_student),
+    db: Session = Depends(connect_databse)):
     
     
-    pdfs=db.query(Pdfinventory).filter(Pdfinventory.student_id==student_id).all()
+    student_id = principal.user_id
     
-    return[
-        {
-            "pdf_id":pdf.pdf_id,
-            "pdf_name":pdf.pdf_name,
-            "pdffile": base64.b64encode(pdf.pdf_content).decode("utf-8")  
- 
-        }
-        for pdf in pdfs
-    ]
+    
+    if sort_by not in PDF_SORT_COLUMNS:
+        raise HTTPException(status_code=400, detail=f"sort_by must be one of {', '.join(PDF_SORT_COLUMNS)}")
+    if order not in ("asc", "desc"):
+        raise HTTPException(status_code=400, detail="order must be asc or desc")
+
+    sort_column = PDF_SORT_COLUMNS[sort_by]
+    descending = order == "desc"
+    limit = clamp_page_size(limit)
+
+    query = db.query(Pdfinventory, sort_column).options(
+        load_only(
+            Pdfinventory.pdf_id,
+            Pdfinventory.pdf_name,
+            Pdfinventory.pdf_size,
+            Pdfinventory.pdf_page_count,
+            Pdfinventory.created_at,
+        )
+    ).filter(Pdfinventory.student_id==student_id)
+    if cursor:
+        query = query.filter(keyset_filter(sort_column, Pdfinventory.pdf_id, cursor, descending))
+
+    # one extra row tells us whether there is a next page
+    rows = query.order_by(*keyset_order(sort_column, Pdfinventory.pdf_id, descending)).limit(limit + 1).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last_pdf, last_sort_value = rows[-1]
+        next_cursor = encode_cursor(last_sort_value, last_pdf.pdf_id)
+
+    return {
+        "items": [
+            {
+                "pdf_id":pdf.pdf_id,
+                "pdf_name":pdf.pdf_name,
+                "pdf_size":pdf.pdf_size,
+                "page_count":pdf.pdf_page_count,
+                "created_at":pdf.created_at,
+                "file_url":pdf_file_url(pdf.pdf_id)
+            }
+            for pdf, _ in rows
+        ],
+        "next_cursor": next_cursor
+    }
     
     
-def view_pdf_by_id(pdf_id:int,authorization: str = Header(...),
+def search_your_pdfs(q: str, limit: int = DEFAULT_PAGE_SIZE, principal: Principal = Depends(require_student),
     db: Session = Depends(connect_databse)):
 
-        
-    if not authorization:
-        raise HTTPException(status_code=401, detail="Authorization header missing")
+    student_id = principal.user_id
+
+    if not q.strip():
+        raise HTTPException(status_code=400, detail="Search query is empty")
 
-    if not authorization.startswith("Bearer "):
-        raise HTTPException(status_code=401, detail="Invalid authorization header")
+    return search_chunks(db, student_id, q, clamp_page_size(limit))
 
-    token = authorization.split(" ")[1]
-    payload = verify_access_token(token)
 
-    if not payload or "sub" not in payload:
-        raise HTTPException(status_code=401, detail="Invalid or expired token")
+def view_pdf_by_id(pdf_id:int,principal: Principal = Depends(require_student),
+    db: Session = Depends(connect_databse)):
 
-    student_id = payload["sub"]
+        
+    student_id = principal.user_id
     
-    single_pdf = db.query(Pdfinventory).filter(Pdfinventory.pdf_id == pdf_id,Pdfinventory.student_id == student_id).first()        
+    single_pdf = db.query(Pdfinventory).options(undefer(Pdfinventory.pdf_chunked_text)).filter(Pdfinventory.pdf_id == pdf_id,Pdfinventory.student_id == student_id).first()        
+    if not single_pdf:
+        raise HTTPException(status_code=404, detail="PDF not found for this student")
     return{
         "pdf_name":single_pdf.pdf_name,
-        "pdf_content":base64.b64encode(single_pdf.pdf_content).decode("utf-8"),
-        "chunked_text":single_pdf.pdf_chunked_text
+        "pdf_size":single_pdf.pdf_size,
+        "page_count":single_pdf.pdf_page_count,
+        "created_at":single_pdf.created_at,
+        "file_url":pdf_file_url(single_pdf.pdf_id),
+        "chunked_text":single_pdf.pdf_chunked_text or load_pdf_chunks(db, single_pdf.pdf_id)
     } 
+
+
+def stream_pdf_file(pdf_id: int, range: str | None = Header(None), if_none_match: str | None = Header(None),
+                    principal: Principal = Depends(require_student), db: Session = Depends(connect_databse)):
+
+    student_id = principal.user_id
+
+    single_pdf = db.query(Pdfinventory).options(
+        load_only(Pdfinventory.pdf_id, Pdfinventory.pdf_name, Pdfinventory.pdf_sha256, Pdfinventory.pdf_size)
+    ).filter(
+        Pdfinventory.pdf_id == pdf_id,
+        Pdfinventory.student_id == student_id
+    ).first()
+    if not single_pdf:
+        raise HTTPException(status_code=404, detail="PDF not found for this student")
+
+    store = get_blob_store()
+    if single_pdf.pdf_sha256:
+        sha256 = single_pdf.pdf_sha256
+        size = single_pdf.pdf_size
+        open_file = lambda: store.open(sha256)
+    else:
+        # rows not yet moved to the blob store by Scripts/migrate_pdf_blobs.py
+        content = single_pdf.pdf_content
+        sha256 = hashlib.sha256(content).hexdigest()
+        size = len(content)
+        open_file = lambda: io.BytesIO(content)
+
+    etag = f'"{sha256}"'
+    headers = {
+        "ETag": etag,
+        "Accept-Ranges": "bytes",
+        "Cache-Control": "private, max-age=3600",
+        "Content-Disposition": content_disposition("inline", single_pdf.pdf_name),
+    }
+
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    byte_range = parse_range_header(range, size)
+    if byte_range is None:
+        local_path = store.local_path(sha256) if single_pdf.pdf_sha256 else None
+        if local_path:
+            return FileResponse(local_path, media_type="application/pdf", headers=headers)
+        return StreamingResponse(
+            iter_file_range(open_file(), 0, size - 1),
+            media_type="application/pdf",
+            headers={**headers, "Content-Length": str(size)},
+        )
+
+    start, end = byte_range
+    return StreamingResponse(
+        iter_file_range(open_file(), start, end),
+        status_code=status.HTTP_206_PARTIAL_CONTENT,
+        media_type="application/pdf",
+        headers={
+            **headers,
+            "Content-Range": f"bytes {start}-{end}/{size}",
+            "Content-Length": str(end - start + 1),
+        },
+    )
     
     
-def chat_with_your_pdf(pdf_id: int, request: ChatRequest, authorization: str = Header(...),
-                       db: Session = Depends(connect_databse)):
+def build_chat_messages(context_chunks: list[dict], question: str, summary: str | None = None,
+                        history: list = (), extra_chunks: list[dict] = ()) -> list[dict]:
+    # the system prompt and the excerpts come first and never change within a
+    # session, everything that grows or moves goes after them
+    messages = [
+        {
+            "role": "system",
+            "content": (
+                "You are an AI assistant that answers PDF questions. "
+                "You only see the excerpts of the PDF most relevant to the question, each tagged with its page number; "
+                "cite the pages you rely on. "
+                "If the user asks for YouTube videos, respond with clickable search links."
+            )
+        },
+        {
+            "role": "user",
+            "content": f"Answer questions about this PDF using these excerpts:\n\n{format_chunks_for_prompt(context_chunks)}"
+        },
+    ]
+    if summary:
+        messages.append({"role": "user", "content": f"Summary of our conversation so far:\n{summary}"})
+    messages.extend({"role": message.role, "content": message.content} for message in within_history_budget(history))
+
+    question_content = f"Question: {question}"
+    if extra_chunks:
+        question_content = f"More excerpts:\n\n{format_chunks_for_prompt(extra_chunks)}\n\n{question_content}"
+    messages.append({"role": "user", "content": question_content})
+    return messages
 
-    if not authorization:
-        raise HTTPException(status_code=401, detail="Authorization header missing")
-    if not authorization.startswith("Bearer "):
-        raise HTTPException(status_code=401, detail="Invalid authorization header")
 
-    token = authorization.split(" ")[1]
-    payload = verify_access_token(token)
-    if not payload or "sub" not in payload:
-        raise HTTPException(status_code=401, detail="Invalid or expired token")
-    student_id = payload["sub"]
+def prepare_chat(pdf_id: int, request: ChatRequest, principal: Principal, db: Session) -> dict:
+    # everything the plain and the streaming chat share up to the model call
+    student_id = principal.user_id
 
-    single_pdf = db.query(Pdfinventory).filter(
+    single_pdf = db.query(Pdfinventory).options(
+        undefer(Pdfinventory.pdf_chunked_text),
+        undefer(Pdfinventory.pdf_search_index)
+    ).filter(
         Pdfinventory.pdf_id == pdf_id,
         Pdfinventory.student_id == student_id
     ).first()
     if not single_pdf:
         raise HTTPException(status_code=404, detail="PDF not found for this student")
 
-    load_dotenv()
-    key = os.getenv("OPENROUTER_API_KEY")
-    if not key:
-        raise HTTPException(status_code=500, detail="OpenRouter API key not configured")
-
-   
-    http_client = httpx.Client()  
-    client = OpenAI(
-        api_key=key,
-        base_url="https://openrouter.ai/api/v1",
-        http_client=http_client
-    )
+    chat_session = None
+    if request.session_id is not None:
+        chat_session = db.query(PdfChatSession).options(undefer(PdfChatSession.context_chunks)).filter(
+            PdfChatSession.session_id == request.session_id,
+            PdfChatSession.pdf_id == pdf_id,
+            PdfChatSession.student_id == student_id
+        ).first()
+        if not chat_session:
+            raise HTTPException(status_code=404, detail="Chat session not found for this PDF")
+
+    relevant_chunks = retrieve_relevant_chunks(db, single_pdf, request.message, request.retrieval_mode)
+
+    turn = {
+        "student_id": student_id,
+        "session_id": chat_session.session_id if chat_session else None,
+        "question": request.message,
+        "cache_key": None,
+        "cached_answer": None,
+    }
+
+    history = []
+    if chat_session:
+        if chat_session.context_chunks is None:
+            # the first question pins the excerpts for the rest of the session
+            chat_session.context_chunks = [
+                {key: chunk[key] for key in ("ordinal", "page_start", "page_end", "text")}
+                for chunk in relevant_chunks
+            ]
+            db.commit()
+        pinned = {chunk["ordinal"] for chunk in chat_session.context_chunks}
+        history = history_messages(db, chat_session)
+        turn["messages"] = build_chat_messages(
+            chat_session.context_chunks,
+            request.message,
+            summary=chat_session.summary,
+            history=history,
+            extra_chunks=[chunk for chunk in relevant_chunks if chunk["ordinal"] not in pinned],
+        )
+    else:
+        turn["messages"] = build_chat_messages(relevant_chunks, request.message)
+
+    # answers only depend on the excerpts and the question when there is no
+    # earlier conversation; rows not yet moved to the blob store have no
+    # content hash to key on
+    if single_pdf.pdf_sha256 and not history and not (chat_session and chat_session.summary):
+        turn["cache_key"] = answer_cache_key(single_pdf.pdf_sha256, CHAT_MODEL, request.message, relevant_chunks)
+        if request.bypass_cache:
+            answer_cache.count("bypasses")
+        else:
+            turn["cached_answer"] = answer_cache.get(turn["cache_key"])
+
+    return turn
+
+
+def finish_chat(turn: dict, answer: str, db: Session) -> bool:
+    # returns whether the session history needs compacting
+    if turn["cache_key"] and answer and turn["cached_answer"] is None:
+        answer_cache.put(turn["cache_key"], answer)
+    if turn["session_id"] is None or not answer:
+        return False
+    return record_turn(db, db.get(PdfChatSession, turn["session_id"]), turn["question"], answer)
+
+
+async def chat_with_your_pdf(pdf_id: int, request: ChatRequest, principal: Principal = Depends(require_student),
+                       db: Session = Depends(connect_databse)):
+
+    turn = await run_in_threadpool(prepare_chat, pdf_id, request, principal, db)
+    answer = turn["cached_answer"]
+    if answer is None:
+        answer = await llm_client.complete(turn["messages"], user_id=turn["student_id"])
+
+    content = {"message": answer, "cached": turn["cached_answer"] is not None, "session_id": turn["session_id"]}
+    if await run_in_threadpool(finish_chat, turn, answer, db):
+        # runs once the response is sent, the student does not wait for it
+        return JSONResponse(content, background=BackgroundTask(
+            compact_chat_session, turn["session_id"], user_id=turn["student_id"]
+        ))
+    return content
+
+
+async def stream_chat_with_your_pdf(pdf_id: int, request: ChatRequest, principal: Principal = Depends(require_student),
+                                    db: Session = Depends(connect_databse)):
+
+    # retrieval and the answer cache use the sync session, keep them off the event loop
+    turn = await run_in_threadpool(prepare_chat, pdf_id, request, principal, db)
+
+    async def completion_events():
+        answer = turn["cached_answer"]
+        if answer is not None:
+            yield sse_event({"delta": answer})
+        else:
+            parts = []
+            try:
+                async for delta in llm_client.stream(turn["messages"], user_id=turn["student_id"]):
+                    parts.append(delta)
+                    yield sse_event({"delta": delta})
+            except HTTPException as e:
+                yield sse_event({"detail": e.detail}, event="error")
+                return
+            except OpenAIError as e:
+                yield sse_event({"detail": str(e)}, event="error")
+                return
+            answer = "".join(parts)
+
+        turn["needs_compaction"] = await run_in_threadpool(finish_chat, turn, answer, db)
+        yield sse_event({"cached": turn["cached_answer"] is not None, "session_id": turn["session_id"]}, event="done")
+
+    async def compact_if_needed():
+        # whether the history needs compacting is only known once the answer
+        # is recorded; this runs after the stream is closed, like the
+        # non-streaming path, so the client does not wait for it
+        if turn.get("needs_compaction"):
+            await compact_chat_session(turn["session_id"], user_id=turn["student_id"])
+
+    return StreamingResponse(completion_events(), media_type="text/event-stream", headers=SSE_HEADERS,
+                             background=BackgroundTask(compact_if_needed))
 
-    completion = client.chat.completions.create(
-        extra_body={},
-        model="cognitivecomputations/dolphin-mistral-24b-venice-edition:free",
-        messages=[
-            {
-                "role": "system",
-                "content": (
-                    "You are an AI assistant that answers PDF questions. "
-                    "If the user asks for YouTube videos, respond with clickable search links."
-                )
-            },
-            {
-                "role": "user",
-                "content": f"Answer questions about this PDF: {single_pdf.pdf_chunked_text}"
-            },
-            {
-                "role": "user",
-                "content": f"Question: {request.message}"
-            }
-        ]
-    )
 
-    answer = completion.choices[0].message.content
-    return {"message": answer}
\ No newline at end of file
+def fetch_answer_cache_stats():
+    return answer_cache.stats()
@@ -1,15 +1,45 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, make_url
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.orm import sessionmaker, declarative_base
-import os 
+import os
 from dotenv import load_dotenv
+from Utils.db_metrics import TimedQueuePool, db_metrics
 
 load_dotenv()
 
 
 DATABASE_URL=os.getenv("DATABASE_URL")
+# every statement is logged to stdout, keep it for debugging
+DATABASE_ECHO=os.getenv("DATABASE_ECHO", "0") == "1"
+DB_POOL_SIZE=int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW=int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT=float(os.getenv("DB_POOL_TIMEOUT", "30"))
+# reconnect before the server or a proxy drops an idle connection; -1 never
+DB_POOL_RECYCLE=int(os.getenv("DB_POOL_RECYCLE", "1800"))
+# one extra round trip per checkout, worth it behind proxies that drop
+# connections without telling the client
+DB_POOL_PRE_PING=os.getenv("DB_POOL_PRE_PING", "0") == "1"
+# sqlite lets one connection write at a time and the rest wait this long for
+# it before failing with "database is locked"; the driver default is 5s,
+# which a rush of enrollments into one class outlasts
+DB_SQLITE_BUSY_TIMEOUT=float(os.getenv("DB_SQLITE_BUSY_TIMEOUT", "30"))
 
-engine=create_engine(DATABASE_URL,echo=True)
+# INSERT ... ON CONFLICT is spelled per dialect in SQLAlchemy
+INSERT_BY_DIALECT = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+
+
+engine=create_engine(DATABASE_URL,echo=DATABASE_ECHO,poolclass=TimedQueuePool,
+    pool_size=DB_POOL_SIZE,
+    max_overflow=DB_MAX_OVERFLOW,
+    pool_timeout=DB_POOL_TIMEOUT,
+    pool_recycle=DB_POOL_RECYCLE,
+    pool_pre_ping=DB_POOL_PRE_PING,
+    connect_args={"timeout": DB_SQLITE_BUSY_TIMEOUT} if make_url(DATABASE_URL).get_backend_name() == "sqlite" else {},
+)
 SessionLocal=sessionmaker(autocommit=False,autoflush=True,bind=engine)
+
+db_metrics.track_engine("default",engine)
+
 Base=declarative_base()
 
 def connect_databse():
@@ -17,4 +47,4 @@ def connect_databse():
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
@@ -1,23 +1,36 @@
+from datetime import datetime, timezone
+
 from Database.connection import Base
-from sqlalchemy import Column, DateTime, String, Integer, ForeignKey
+from sqlalchemy import Column, DateTime, String, Integer, ForeignKey, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 
 class Classes(Base):
     __tablename__ = "classes"
+    # the catalog lists newest first, optionally within one class_field
+    __table_args__ = (
+        Index("ix_classes_created", "created_at", "class_id"),
+        Index("ix_classes_field_created", "class_field", "created_at", "class_id"),
+    )
     
     class_id = Column(Integer, primary_key=True, index=True, autoincrement=True)
-    professor_id = Column(Integer, ForeignKey("professor.id", ondelete="CASCADE"), nullable=False)
+    professor_id = Column(Integer, ForeignKey("professor.id", ondelete="CASCADE"), nullable=False, index=True)
     class_title = Column(String, nullable=False)
     class_capacity = Column(Integer, nullable=True)
+    # kept in step with enrolled_courses by the conditional UPDATE in
+    # enroll_in_a_classroom, which is what enforces class_capacity
+    enrolled_count = Column(Integer, nullable=False, default=0, server_default="0")
     class_field = Column(String, nullable=False)
     description = Column(String, nullable=False)
     classroom_picture = Column(String, nullable=False)
     classroom_password = Column(String, nullable=False)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    # set on the python side as well so sqlite stores the same format the
+    # catalog's keyset cursors compare against
+    created_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc), server_default=func.now())
 
     professor = relationship("Proffessor", back_populates="classes")
-    classroom_contents = relationship("ClassroomContent", back_populates="classroom", cascade="all, delete-orphan")
+    classroom_contents = relationship("ClassroomContent", back_populates="classroom", cascade="all, delete-orphan",
+                                      order_by="ClassroomContent.classroom_content_id")
     enrollements=relationship("Enrolled_classes",back_populates="classes",cascade="all, delete-orphan")
 
 
@@ -7,7 +7,7 @@ class ClassroomContent(Base):
     __tablename__ = "classroom_content"
 
     classroom_content_id = Column(Integer, primary_key=True, autoincrement=True)
-    classroom_id = Column(Integer, ForeignKey("classes.class_id", ondelete="CASCADE"), nullable=False)
+    classroom_id = Column(Integer, ForeignKey("classes.class_id", ondelete="CASCADE"), nullable=False, index=True)
     filename = Column(String, nullable=False)
     cloudinary_public_id = Column(String, nullable=False)
     description = Column(Text, nullable=False)
@@ -1,9 +1,15 @@
-from sqlalchemy import Column,DateTime,Integer,ForeignKey
+from sqlalchemy import Column,DateTime,Integer,ForeignKey,Index,UniqueConstraint
 from Database.connection import Base
 from sqlalchemy.orm import relationship
 
 class Enrolled_classes(Base):
     __tablename__="enrolled_courses"
+    # the unique index also serves "classes of a student"; the class side
+    # needs its own for rosters and the cascade from classes
+    __table_args__=(
+        UniqueConstraint("enrolled_student_id","enrolled_class_id",name="uq_enrolled_courses_student_class"),
+        Index("ix_enrolled_courses_class_id","enrolled_class_id"),
+    )
     
     enrolled_courses_id=Column(Integer,primary_key=True,index=True,autoincrement=True)
     enrolled_student_id=Column(Integer,ForeignKey("student.student_id",ondelete="CASCADE"),nullable=False)
@@ -0,0 +1,15 @@
+from sqlalchemy import Column, DateTime, String, Text
+
+from Database.connection import Base
+from Models.Pdf_ingest_job import utcnow
+
+
+class PdfAnswerCache(Base):
+    __tablename__ = "pdf_answer_cache"
+
+    # sha256 over (pdf hash, model, normalized question, retrieved context),
+    # see Utils/answer_cache.py
+    cache_key = Column(String(64), primary_key=True)
+    answer = Column(Text, nullable=False)
+    created_at = Column(DateTime(timezone=True), nullable=False, default=utcnow)
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
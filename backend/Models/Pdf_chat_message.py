@@ -0,0 +1,19 @@
+from sqlalchemy import Column, DateTime, ForeignKey, Index, Integer, String, Text
+
+from Database.connection import Base
+from Models.Pdf_ingest_job import utcnow
+
+
+class PdfChatMessage(Base):
+    __tablename__ = "pdf_chat_message"
+    __table_args__ = (
+        Index("ix_pdf_chat_message_session_message", "session_id", "message_id"),
+    )
+
+    message_id = Column(Integer, primary_key=True, autoincrement=True)
+    session_id = Column(Integer, ForeignKey("pdf_chat_session.session_id", ondelete="CASCADE"), nullable=False)
+    # user | assistant
+    role = Column(String(16), nullable=False)
+    content = Column(Text, nullable=False)
+    token_count = Column(Integer, nullable=False)
+    created_at = Column(DateTime(timezone=True), nullable=False, default=utcnow)
@@ -0,0 +1,27 @@
+from sqlalchemy import JSON, Column, DateTime, ForeignKey, Index, Integer, Text
+from sqlalchemy.orm import deferred, relationship
+
+from Database.connection import Base
+from Models.Pdf_ingest_job import utcnow
+
+
+class PdfChatSession(Base):
+    __tablename__ = "pdf_chat_session"
+    __table_args__ = (
+        Index("ix_pdf_chat_session_student_pdf", "student_id", "pdf_id", "updated_at"),
+    )
+
+    session_id = Column(Integer, primary_key=True, autoincrement=True)
+    student_id = Column(Integer, ForeignKey("student.student_id", ondelete="CASCADE"), nullable=False)
+    pdf_id = Column(Integer, ForeignKey("pdf_inventory.pdf_id", ondelete="CASCADE"), nullable=False)
+    # the excerpts retrieved for the first question, sent as is on every turn
+    # so the prompt prefix stays byte-identical and provider caching applies
+    context_chunks = deferred(Column(JSON, nullable=True))
+    # running summary of the turns that no longer fit the history budget,
+    # covering every message up to summarized_through
+    summary = Column(Text, nullable=True)
+    summarized_through = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime(timezone=True), nullable=False, default=utcnow)
+    updated_at = Column(DateTime(timezone=True), nullable=False, default=utcnow, onupdate=utcnow)
+
+    messages = relationship("PdfChatMessage", order_by="PdfChatMessage.message_id", passive_deletes=True)
@@ -0,0 +1,45 @@
+from sqlalchemy import DDL, Column, ForeignKey, Integer, Text, UniqueConstraint, event
+from sqlalchemy.orm import relationship
+
+from Database.connection import Base
+
+
+class PdfChunk(Base):
+    __tablename__ = "pdf_chunk"
+    __table_args__ = (
+        UniqueConstraint("pdf_id", "ordinal", name="uq_pdf_chunk_pdf_ordinal"),
+    )
+
+    chunk_id = Column(Integer, primary_key=True, autoincrement=True)
+    pdf_id = Column(Integer, ForeignKey("pdf_inventory.pdf_id", ondelete="CASCADE"), nullable=False)
+    ordinal = Column(Integer, nullable=False)
+    page_start = Column(Integer, nullable=False)
+    page_end = Column(Integer, nullable=False)
+    char_start = Column(Integer, nullable=False)
+    char_end = Column(Integer, nullable=False)
+    text = Column(Text, nullable=False)
+
+    pdf = relationship("Pdfinventory")
+
+
+# the full-text index is dialect specific: a generated tsvector column with a
+# GIN index on postgres, an external-content FTS5 table kept in sync by
+# triggers on sqlite
+for statement in (
+    "ALTER TABLE pdf_chunk ADD COLUMN search_vector tsvector "
+    "GENERATED ALWAYS AS (to_tsvector('english', text)) STORED",
+    "CREATE INDEX ix_pdf_chunk_search_vector ON pdf_chunk USING GIN (search_vector)",
+):
+    event.listen(PdfChunk.__table__, "after_create", DDL(statement).execute_if(dialect="postgresql"))
+
+for statement in (
+    "CREATE VIRTUAL TABLE pdf_chunk_fts USING fts5(text, content='pdf_chunk', content_rowid='chunk_id')",
+    "CREATE TRIGGER pdf_chunk_fts_insert AFTER INSERT ON pdf_chunk BEGIN "
+    "INSERT INTO pdf_chunk_fts(rowid, text) VALUES (new.chunk_id, new.text); END",
+    "CREATE TRIGGER pdf_chunk_fts_delete AFTER DELETE ON pdf_chunk BEGIN "
+    "INSERT INTO pdf_chunk_fts(pdf_chunk_fts, rowid, text) VALUES ('delete', old.chunk_id, old.text); END",
+    "CREATE TRIGGER pdf_chunk_fts_update AFTER UPDATE ON pdf_chunk BEGIN "
+    "INSERT INTO pdf_chunk_fts(pdf_chunk_fts, rowid, text) VALUES ('delete', old.chunk_id, old.text); "
+    "INSERT INTO pdf_chunk_fts(rowid, text) VALUES (new.chunk_id, new.text); END",
+):
+    event.listen(PdfChunk.__table__, "after_create", DDL(statement).execute_if(dialect="sqlite"))
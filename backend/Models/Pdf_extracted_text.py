@@ -0,0 +1,16 @@
+from sqlalchemy import JSON, Column, DateTime, Integer, String
+from sqlalchemy.orm import deferred
+
+from Database.connection import Base
+from Models.Pdf_ingest_job import utcnow
+
+
+class PdfExtractedText(Base):
+    __tablename__ = "pdf_extracted_text"
+
+    # keyed by the blob store hash, so every upload of the same file shares it
+    pdf_sha256 = Column(String(64), primary_key=True)
+    page_count = Column(Integer, nullable=False)
+    # one {"page", "page_content"} dict per page that has text
+    pages = deferred(Column(JSON, nullable=False))
+    created_at = Column(DateTime(timezone=True), nullable=False, default=utcnow)
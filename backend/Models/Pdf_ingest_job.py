@@ -0,0 +1,31 @@
+from datetime import datetime, timezone
+
+from sqlalchemy import Column, DateTime, ForeignKey, Index, Integer, String, Text
+from sqlalchemy.orm import relationship
+
+from Database.connection import Base
+
+
+def utcnow():
+    return datetime.now(timezone.utc)
+
+
+class PdfIngestJob(Base):
+    __tablename__ = "pdf_ingest_job"
+    __table_args__ = (
+        Index("ix_pdf_ingest_job_status_created", "status", "created_at"),
+    )
+
+    job_id = Column(Integer, primary_key=True, autoincrement=True)
+    pdf_id = Column(Integer, ForeignKey("pdf_inventory.pdf_id", ondelete="CASCADE"), nullable=False, index=True)
+    # queued -> running -> done | failed, failed attempts go back to queued
+    # until INGEST_MAX_ATTEMPTS is reached
+    status = Column(String(16), nullable=False, default="queued")
+    attempts = Column(Integer, nullable=False, default=0)
+    pages_done = Column(Integer, nullable=False, default=0)
+    pages_total = Column(Integer, nullable=True)
+    error = Column(Text, nullable=True)
+    created_at = Column(DateTime(timezone=True), nullable=False, default=utcnow)
+    updated_at = Column(DateTime(timezone=True), nullable=False, default=utcnow, onupdate=utcnow)
+
+    pdf = relationship("Pdfinventory")
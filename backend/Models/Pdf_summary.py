@@ -0,0 +1,20 @@
+from sqlalchemy import Column, DateTime, Integer, String, Text, UniqueConstraint
+
+from Database.connection import Base
+from Models.Pdf_ingest_job import utcnow
+
+
+class PdfSummary(Base):
+    __tablename__ = "pdf_summary"
+    __table_args__ = (
+        UniqueConstraint("pdf_sha256", "model", "prompt_version", name="uq_pdf_summary_sha_model_version"),
+    )
+
+    summary_id = Column(Integer, primary_key=True, autoincrement=True)
+    pdf_sha256 = Column(String(64), nullable=False)
+    model = Column(String, nullable=False)
+    # SUMMARY_PROMPT_VERSION from Utils/summarizer.py at the time it was written
+    prompt_version = Column(String(16), nullable=False)
+    summary = Column(Text, nullable=False)
+    section_count = Column(Integer, nullable=False)
+    created_at = Column(DateTime(timezone=True), nullable=False, default=utcnow)
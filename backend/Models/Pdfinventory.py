@@ -1,6 +1,8 @@
 # Pdfinventory model
-from sqlalchemy import Column, ForeignKey, Integer, LargeBinary, String,JSON
-from sqlalchemy.orm import relationship
+from datetime import datetime, timezone
+
+from sqlalchemy import BigInteger, Column, DateTime, ForeignKey, Index, Integer, LargeBinary, String,JSON, func
+from sqlalchemy.orm import deferred, relationship
 
 from Database.connection import Base
 
@@ -8,11 +10,27 @@ from Database.connection import Base
 
 class Pdfinventory(Base):
     __tablename__ = "pdf_inventory"
+    __table_args__ = (
+        Index("ix_pdf_inventory_student_created", "student_id", "created_at", "pdf_id"),
+    )
 
     pdf_id = Column(Integer, primary_key=True, autoincrement=True)
     student_id = Column(Integer, ForeignKey("student.student_id", ondelete="CASCADE"), nullable=False)
     pdf_name = Column(String, nullable=False)
-    pdf_content = Column(LargeBinary, nullable=False)
-    pdf_chunked_text=Column(JSON,nullable=False)
+    # the file itself lives in the blob store under pdf_sha256, pdf_content is
+    # only kept for rows that have not been moved by Scripts/migrate_pdf_blobs.py.
+    # heavy columns are deferred so listing queries never drag them through
+    # the driver; load them with undefer() where they are actually needed
+    pdf_content = deferred(Column(LargeBinary, nullable=True))
+    pdf_sha256 = Column(String(64), nullable=True, index=True)
+    pdf_size = Column(BigInteger, nullable=True)
+    pdf_page_count = Column(Integer, nullable=True)
+    # set on the python side as well so sqlite stores the same format the
+    # keyset cursors compare against
+    created_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc), server_default=func.now())
+    # filled in by the ingestion worker, see Utils/ingest_queue.py
+    pdf_chunked_text=deferred(Column(JSON,nullable=True))
+    pdf_search_index=deferred(Column(JSON,nullable=True))
+    pdf_embeddings=deferred(Column(LargeBinary,nullable=True))
 
     student = relationship("Student", back_populates="pdfs")
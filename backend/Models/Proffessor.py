@@ -1,15 +1,18 @@
-from sqlalchemy import Column, String, Numeric, Integer, DateTime
+from sqlalchemy import Column, String, Numeric, Integer, DateTime, UniqueConstraint
 from sqlalchemy.orm import relationship
 from Database.connection import Base
 
 class Proffessor(Base):
     __tablename__ = "professor"
+    __table_args__ = (
+        UniqueConstraint("email", name="uq_professor_email"),
+    )
 
     id = Column(Integer, index=True, primary_key=True, autoincrement=True)
     first_name = Column(String, nullable=False)
     last_name = Column(String, nullable=False)
     phone_number = Column(Numeric, nullable=False)
-    email = Column(String, nullable=False, unique=False)
+    email = Column(String, nullable=False)
     password = Column(String, nullable=False)
     country = Column(String, nullable=False)
     educational_field = Column(String, nullable=False)
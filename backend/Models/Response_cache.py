@@ -0,0 +1,25 @@
+from sqlalchemy import Column, DateTime, Integer, String, Text
+
+from Database.connection import Base
+from Models.Pdf_ingest_job import utcnow
+
+
+class ResponseCacheEntry(Base):
+    __tablename__ = "response_cache_entry"
+
+    # sha256 over (route, params, principal), see Utils/response_cache.py
+    cache_key = Column(String(64), primary_key=True)
+    # sum of the versions of the entry's tags when it was loaded, the entry
+    # is stale as soon as the current sum differs
+    generation = Column(Integer, nullable=False)
+    etag = Column(String(64), nullable=False)
+    body = Column(Text, nullable=False)
+    created_at = Column(DateTime(timezone=True), nullable=False, default=utcnow)
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
+
+
+class ResponseCacheTag(Base):
+    __tablename__ = "response_cache_tag"
+
+    tag = Column(String(128), primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column,String,Integer,DateTime
+from sqlalchemy import Column,String,Integer,DateTime,UniqueConstraint
 from sqlalchemy.orm import relationship
 
 from Database.connection import Base
@@ -6,6 +6,9 @@ from Database.connection import Base
 # Student model
 class Student(Base):
     __tablename__ = "student"
+    __table_args__ = (
+        UniqueConstraint("email", name="uq_student_email"),
+    )
 
     student_id = Column(Integer, primary_key=True, index=True)
     first_name = Column(String, nullable=False)
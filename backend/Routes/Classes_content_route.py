@@ -1,41 +1,43 @@
-from fastapi import Depends, Form, Header, UploadFile, File,APIRouter
+from fastapi import Depends, Form, UploadFile, File,APIRouter, Header
 from Database.connection import connect_databse
 from sqlalchemy.orm import Session
 from Controller.FileUploader_controller import upload_pdf_in_classroom,fetch_classroom_content,download_document
+from Utils.auth import Principal, get_principal, require_professor
 
 router=APIRouter()
 
 @router.post("/upload_your_pdf")
 
-def upload_courses_as_professor(classroom_id: str = Form(...),  # Get from form data
+def upload_courses_as_professor(classroom_id: int = Form(...),  # Get from form data
     description: str = Form(...),   # Get from form data
     file: UploadFile = File(...),  
-    authorization: str | None = Header(None),
+    principal: Principal = Depends(require_professor),
     db: Session = Depends(connect_databse)):
     
     return upload_pdf_in_classroom(
     classroom_id,  # Get from form data
     description,   # Get from form data
     file,  
-    authorization,
+    principal,
     db
     )
 @router.get("/view_classroom_content_as_professor/{class_id}")
-def view_classroom_content_as_professor(class_id: int, authorization: str | None = Header(None),
+def view_classroom_content_as_professor(class_id: int, if_none_match: str | None = Header(None),
+    principal: Principal = Depends(require_professor),
     db: Session = Depends(connect_databse)):
     
-    return fetch_classroom_content(class_id, authorization, db)
+    return fetch_classroom_content(class_id, if_none_match, principal, db)
 
 
 @router.get("/download_pdf/{class_id}/content/{classroom_content_id}")
 def download_content_as_professor(
     class_id: int,
     classroom_content_id: int,
-    authorization: str | None = Header(None),
+    principal: Principal = Depends(get_principal),
     db: Session = Depends(connect_databse),
 ):
     return download_document(class_id,
     classroom_content_id,
-    authorization,
+    principal,
     db)
                   
\ No newline at end of file
@@ -2,8 +2,11 @@ from Controller.Pdf_analyzer_controller import pdfanalyzer
 from fastapi import APIRouter, Depends, File, Header, UploadFile
 from sqlalchemy.orm import Session
 from Database.connection import connect_databse
-from Controller.pdfuploader import upload_your_pdf,fetch_your_pdfs,view_pdf_by_id,chat_with_your_pdf
+from Controller.pdfuploader import upload_your_pdf,fetch_your_pdfs,view_pdf_by_id,chat_with_your_pdf,stream_pdf_file,fetch_ingest_job_status,search_your_pdfs,fetch_answer_cache_stats,stream_chat_with_your_pdf
+from Controller.Pdf_chat_session_controller import create_chat_session,fetch_chat_sessions,fetch_chat_session
 from Schemas.ChatRequest import ChatRequest
+from Utils.pagination import DEFAULT_PAGE_SIZE
+from Utils.auth import Principal, require_ops_stats, require_student
 
 
 
@@ -11,26 +14,89 @@ router=APIRouter()
 
 
 @router.post("/upload_student_pdf")
-async def upload_your_pdf_as_a_student(file:UploadFile=File(...),authorization: str = Header(...),
+async def upload_your_pdf_as_a_student(file:UploadFile=File(...),principal: Principal = Depends(require_student),
     db:Session=Depends(connect_databse)):
     
-    return await upload_your_pdf(file,authorization,db)
+    return await upload_your_pdf(file,principal,db)
+
+
+@router.get("/pdf_jobs/{job_id}")
+def fetch_ingest_job_status_as_a_student(job_id:int,principal: Principal = Depends(require_student),
+    db: Session = Depends(connect_databse)):
+    
+    return fetch_ingest_job_status(job_id,principal,db)
+
+
+@router.post("/pdf_analyzer")
+async def analyze_pdf(file:UploadFile=File(...),principal: Principal = Depends(require_student),
+    db:Session=Depends(connect_databse)):
+    
+    return await pdfanalyzer(file,principal,db)
 
 
 @router.get("/fetch_your_pdfs")
-def fetch_your_pdfs_a_student(authorization: str = Header(...),
+def fetch_your_pdfs_a_student(limit: int = DEFAULT_PAGE_SIZE, cursor: str | None = None, sort_by: str = "created_at",
+                order: str = "desc", principal: Principal = Depends(require_student),
                 db: Session = Depends(connect_databse)):
-    return fetch_your_pdfs(authorization,db)
+    return fetch_your_pdfs(limit,cursor,sort_by,order,principal,db)
+
+
+@router.get("/search_your_pdfs")
+def search_your_pdfs_as_a_student(q:str,limit:int=DEFAULT_PAGE_SIZE,principal: Principal = Depends(require_student),
+    db: Session = Depends(connect_databse)):
+    
+    return search_your_pdfs(q,limit,principal,db)
 
 
 @router.get("/view_pdf_by_id/{pdf_id}")
-def view_pdf_by_id_as_a_student(pdf_id:int,authorization: str = Header(...),
+def view_pdf_by_id_as_a_student(pdf_id:int,principal: Principal = Depends(require_student),
     db: Session = Depends(connect_databse)):
     
-    return view_pdf_by_id(pdf_id,authorization,db)
+    return view_pdf_by_id(pdf_id,principal,db)
+
+
+@router.get("/student_pdf/{pdf_id}/file")
+def stream_pdf_file_as_a_student(pdf_id:int,range: str | None = Header(None),if_none_match: str | None = Header(None),
+    principal: Principal = Depends(require_student),db: Session = Depends(connect_databse)):
+    
+    return stream_pdf_file(pdf_id,range,if_none_match,principal,db)
 
 @router.post("/view_pdf_by_id/{pdf_id}/chat")
-def chat_with_your_pdf_as_astudent(pdf_id:int,request:ChatRequest,authorization: str = Header(...),
+async def chat_with_your_pdf_as_astudent(pdf_id:int,request:ChatRequest,principal: Principal = Depends(require_student),
+    db: Session = Depends(connect_databse)):
+    
+    return await chat_with_your_pdf(pdf_id,request,principal,db)
+
+
+@router.post("/view_pdf_by_id/{pdf_id}/chat/stream")
+async def stream_chat_with_your_pdf_as_a_student(pdf_id:int,request:ChatRequest,principal: Principal = Depends(require_student),
     db: Session = Depends(connect_databse)):
     
-    return chat_with_your_pdf(pdf_id,request,authorization,db)
\ No newline at end of file
+    return await stream_chat_with_your_pdf(pdf_id,request,principal,db)
+
+
+@router.post("/view_pdf_by_id/{pdf_id}/chat_sessions")
+def create_chat_session_as_a_student(pdf_id:int,principal: Principal = Depends(require_student),
+    db: Session = Depends(connect_databse)):
+    
+    return create_chat_session(pdf_id,principal,db)
+
+
+@router.get("/view_pdf_by_id/{pdf_id}/chat_sessions")
+def fetch_chat_sessions_as_a_student(pdf_id:int,principal: Principal = Depends(require_student),
+    db: Session = Depends(connect_databse)):
+    
+    return fetch_chat_sessions(pdf_id,principal,db)
+
+
+@router.get("/view_pdf_by_id/{pdf_id}/chat_sessions/{session_id}")
+def fetch_chat_session_as_a_student(pdf_id:int,session_id:int,principal: Principal = Depends(require_student),
+    db: Session = Depends(connect_databse)):
+    
+    return fetch_chat_session(pdf_id,session_id,principal,db)
+
+
+@router.get("/pdf_chat_cache/stats", dependencies=[Depends(require_ops_stats)])
+def fetch_pdf_chat_cache_stats():
+    
+    return fetch_answer_cache_stats()
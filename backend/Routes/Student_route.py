@@ -4,15 +4,15 @@ from sqlalchemy.orm import Session
 from Database.connection import connect_databse
 from Schemas.student_schema import studentlogin
 from Utils.Cloudinary_Uploader import upload_user_profile_image
-from Utils.hash_password import hash_password
-from Controller.Student_controller import register_student,login_student,view_profile,edit_your_profile
+from Utils.auth import Principal, require_ops_stats, require_student
+from Controller.Student_controller import register_student,login_student,view_profile,edit_your_profile,fetch_password_hashing_stats
 
 
 router=APIRouter()
 
 @router.post("/register_student")
 
-def register_as_student(first_name:str=Form(...),
+async def register_as_student(first_name:str=Form(...),
     last_name:str=Form(...),
     email:str=Form(...),
     password:str=Form(...),
@@ -23,7 +23,7 @@ def register_as_student(first_name:str=Form(...),
     descritpion:str=Form(...),
     db:Session=Depends(connect_databse)):
     
-    return register_student(first_name,
+    return await register_student(first_name,
     last_name,
     email,
     password,
@@ -36,13 +36,14 @@ def register_as_student(first_name:str=Form(...),
     
     
 @router.post("/login_student")
-def login_as_student(payload:studentlogin,db:Session=Depends(connect_databse)):
-    return login_student(payload,db)
+async def login_as_student(payload:studentlogin,db:Session=Depends(connect_databse)):
+    return await login_student(payload,db)
 
 
 @router.get("/view_profile")
-def view_profile_as_student(authorization: str | None = Header(None),db: Session = Depends(connect_databse)):
-    return view_profile(authorization,db)
+def view_profile_as_student(if_none_match: str | None = Header(None),principal: Principal = Depends(require_student),
+    db: Session = Depends(connect_databse)):
+    return view_profile(if_none_match,principal,db)
 
 
 @router.put("/edit_your_profile")
@@ -55,7 +56,7 @@ def edit_profile_as_as_student(first_name:str=Form(...),
     profile_image: UploadFile = File(...),
     country:str=Form(...),
     descritpion:str=Form(...),
-    authorization: str | None = Header(None),
+    principal: Principal = Depends(require_student),
     db:Session=Depends(connect_databse)):
     
     return edit_your_profile(first_name,
@@ -66,5 +67,10 @@ def edit_profile_as_as_student(first_name:str=Form(...),
     profile_image,
     country,
     descritpion,
-    authorization,
-    db)
\ No newline at end of file
+    principal,
+    db)
+
+
+@router.get("/password_hashing/stats", dependencies=[Depends(require_ops_stats)])
+def fetch_password_hash_stats():
+    return fetch_password_hashing_stats()
@@ -3,6 +3,8 @@ from fastapi import APIRouter, Depends, File, Form, Header, UploadFile
 from sqlalchemy.orm import Session
 from Database.connection import connect_databse
 from Schemas.EnrolledInCourse import EnrolledInCourse
+from Utils.auth import Principal, get_principal, require_professor, require_student
+from Utils.pagination import DEFAULT_PAGE_SIZE
 router=APIRouter()
 
 
@@ -14,7 +16,7 @@ def create_classroom_as_professor(
     description : str =Form(...),
     classroom_password : str =Form(...),
     classroom_picture :UploadFile = File(...),
-    authorization: str | None = Header(None),
+    principal: Principal = Depends(require_professor),
     db: Session = Depends(connect_databse)):
     
     return create_classroom(
@@ -24,56 +26,60 @@ def create_classroom_as_professor(
     description,
     classroom_password,
     classroom_picture,
-    authorization,
+    principal,
     db)
     
 @router.get("/fetch_classes")
-def view_your_classes_as_professor(authorization:str|None=Header(None),
+def view_your_classes_as_professor(if_none_match: str | None = Header(None),
+                                   principal: Principal = Depends(require_professor),
                                    db:Session=Depends(connect_databse)):
-    return view_your_classes(authorization,db)
+    return view_your_classes(if_none_match,principal,db)
 
 
 @router.get("/classes/{class_id}")
 def fetch_classes_by_id_as_professor(    class_id: int,
-    authorization: str | None = Header(None),
+    principal: Principal = Depends(require_professor),
     db: Session = Depends(connect_databse)):
     
-    return view_class_by_id(class_id,authorization,db)
+    return view_class_by_id(class_id,principal,db)
 
 
 @router.get("/fetch_classrooms_for_students")
-def fetch_classrooms_as_a_student(authorization: str | None = Header(None),
+def fetch_classrooms_as_a_student(limit: int = DEFAULT_PAGE_SIZE, cursor: str | None = None,
+    class_field: str | None = None, professor_id: int | None = None, available: bool | None = None,
+    q: str | None = None, if_none_match: str | None = Header(None), principal: Principal = Depends(get_principal),
     db: Session = Depends(connect_databse)):
     
-    return fetch_classes(authorization,db)
+    return fetch_classes(limit,cursor,class_field,professor_id,available,q,if_none_match,principal,db)
 
 
 @router.post("/enroll_in_a_course")
 def enroll_in_a_classroom_as_a_student(
     enrollment_data: EnrolledInCourse,  
-    authorization: str | None = Header(None), 
+    principal: Principal = Depends(require_student), 
     db: Session = Depends(connect_databse)
 ):
-    return enroll_in_a_classroom(enrollment_data, authorization, db)
+    return enroll_in_a_classroom(enrollment_data, principal, db)
 
 
 @router.get("/fetch_your_enrolled_classes")
-def view_yur_enrolled_classes_as_a_student(authorization: str | None = Header(None),
+def view_yur_enrolled_classes_as_a_student(principal: Principal = Depends(require_student),
     db: Session = Depends(connect_databse)):
     
-    return fetch_enrolled_classes(authorization,db)
+    return fetch_enrolled_classes(principal,db)
 
 
 @router.get("/enrolled_classes/{class_id}")
-def view_yur_enrolled_classes_as_a_student_by_id(class_id:int,authorization: str | None = Header(None),
+def view_yur_enrolled_classes_as_a_student_by_id(class_id:int,principal: Principal = Depends(require_student),
     db: Session = Depends(connect_databse)):
     
-    return fetch_enrolled_classes_by_id(class_id,authorization,db)
+    return fetch_enrolled_classes_by_id(class_id,principal,db)
 
 
 
 @router.get("/classroom_content/{class_id}")
-def fetch_enrolled_classes_content_by_id_as_astudent(class_id:int,authorization: str | None = Header(None),
+def fetch_enrolled_classes_content_by_id_as_astudent(class_id:int,if_none_match: str | None = Header(None),
+    principal: Principal = Depends(require_student),
     db: Session = Depends(connect_databse)):
     
-    return fetch_enrolled_classes_content_by_id(class_id,authorization,db)
\ No newline at end of file
+    return fetch_enrolled_classes_content_by_id(class_id,if_none_match,principal,db)
\ No newline at end of file
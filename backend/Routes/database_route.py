@@ -0,0 +1,20 @@
+from fastapi import APIRouter, Depends
+from Utils.auth import require_ops_stats
+from Utils.db_metrics import db_metrics
+from Utils.response_cache import response_cache
+
+
+
+router=APIRouter()
+
+
+@router.get("/database/pool", dependencies=[Depends(require_ops_stats)])
+def fetch_database_pool_stats():
+    
+    return db_metrics.stats()
+
+
+@router.get("/response_cache/stats", dependencies=[Depends(require_ops_stats)])
+def fetch_response_cache_stats():
+    
+    return response_cache.stats()
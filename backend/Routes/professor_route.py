@@ -1,12 +1,13 @@
 from Controller.Professor_controller import register_professor,login_professor,view_profile,edit_profile
 from Database.connection import connect_databse
 from sqlalchemy.orm import Session
-from fastapi import APIRouter, Depends, File, Form, Header, UploadFile
+from fastapi import APIRouter, Depends, File, Form, UploadFile
+from Utils.auth import Principal, require_professor
 from Schemas.professor_schema import professor_login
 router=APIRouter()
 
 @router.post("/professor_registration")
-def register_as_professor( first_name: str = Form(...),
+async def register_as_professor( first_name: str = Form(...),
     last_name: str = Form(...),
     phone_number: int = Form(...),
     email: str = Form(...),
@@ -17,7 +18,7 @@ def register_as_professor( first_name: str = Form(...),
     profile_picture: UploadFile = File(...),
     db: Session = Depends(connect_databse),):
     
-    return register_professor( first_name,
+    return await register_professor( first_name,
     last_name,
     phone_number,
     email,
@@ -29,14 +30,14 @@ def register_as_professor( first_name: str = Form(...),
     db)
     
 @router.post("/professor_login") 
-def login_as_professor(payload:professor_login,db:Session=Depends(connect_databse)):
-    return login_professor(payload,db)
+async def login_as_professor(payload:professor_login,db:Session=Depends(connect_databse)):
+    return await login_professor(payload,db)
     
 
     
 @router.post("/professor_profile")
-def view_profile_as_professor(authorization: str | None = Header(None),db: Session = Depends(connect_databse)):
-    return view_profile(authorization,db)
+def view_profile_as_professor(principal: Principal = Depends(require_professor),db: Session = Depends(connect_databse)):
+    return view_profile(principal,db)
 
 
 @router.put("/professor_edit_profile")
@@ -49,7 +50,7 @@ def edit_profile_as_profile(first_name: str = Form(...),
     description: str = Form(...),  
     profile_picture: UploadFile = File(...),
     db: Session = Depends(connect_databse),
-    authorization: str | None = Header(None)):
+    principal: Principal = Depends(require_professor)):
     
     return edit_profile(
     first_name,
@@ -61,4 +62,4 @@ def edit_profile_as_profile(first_name: str = Form(...),
     description,  
     profile_picture,
     db,
-    authorization)
\ No newline at end of file
+    principal)
\ No newline at end of file
@@ -1,5 +1,13 @@
+from typing import Literal
+
 from pydantic import BaseModel
 
 
 class ChatRequest(BaseModel):
-    message: str
\ No newline at end of file
+    message: str
+    retrieval_mode: Literal["bm25", "dense"] = "bm25"
+    # skips the answer cache lookup, the fresh answer still replaces the cached one
+    bypass_cache: bool = False
+    # continues a session from /view_pdf_by_id/{pdf_id}/chat_sessions, without
+    # one every question is answered on its own
+    session_id: int | None = None
@@ -0,0 +1,61 @@
+# Queues an ingestion job for every pdf whose chunks still live in
+# pdf_inventory.pdf_chunked_text, so they land in pdf_chunk and become
+# searchable.
+#
+#   python -m Scripts.backfill_pdf_chunks --batch-size 100
+#
+# The running app (or any process that starts the ingest queue) picks the jobs
+# up. Pdfs that already have a queued or running job are skipped, so the
+# script can be run again safely. Run `alembic upgrade head` first.
+import argparse
+
+from sqlalchemy import exists
+
+from Database.connection import SessionLocal
+from Models import Students, Proffessor, Classes, Classroom_Content, Enrolled_classes  # noqa: F401
+from Models.Pdfinventory import Pdfinventory
+from Models.Pdf_ingest_job import PdfIngestJob
+from Models.Pdf_chunk import PdfChunk
+
+
+def backfill_pdf_chunks(batch_size: int) -> int:
+    queued = 0
+    last_pdf_id = 0
+
+    while True:
+        db = SessionLocal()
+        try:
+            rows = (
+                db.query(Pdfinventory.pdf_id)
+                .filter(
+                    Pdfinventory.pdf_id > last_pdf_id,
+                    Pdfinventory.pdf_sha256.isnot(None),
+                    ~exists().where(PdfChunk.pdf_id == Pdfinventory.pdf_id),
+                    ~exists().where(
+                        PdfIngestJob.pdf_id == Pdfinventory.pdf_id,
+                        PdfIngestJob.status.in_(("queued", "running")),
+                    ),
+                )
+                .order_by(Pdfinventory.pdf_id)
+                .limit(batch_size)
+                .all()
+            )
+            pdf_ids = [row.pdf_id for row in rows]
+            if not pdf_ids:
+                return queued
+
+            db.add_all(PdfIngestJob(pdf_id=pdf_id) for pdf_id in pdf_ids)
+            db.commit()
+            last_pdf_id = pdf_ids[-1]
+            queued += len(pdf_ids)
+            print(f"queued {queued} pdfs for re-indexing")
+        finally:
+            db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--batch-size", type=int, default=100)
+    args = parser.parse_args()
+
+    print(f"done, {backfill_pdf_chunks(args.batch_size)} pdfs queued")
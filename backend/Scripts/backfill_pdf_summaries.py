@@ -0,0 +1,103 @@
+# Precomputes summaries for every stored pdf that has none for the current
+# model and prompt version.
+#
+#   python -m Scripts.backfill_pdf_summaries --concurrency 2 --limit 100
+#
+# Documents are summarized --concurrency at a time, each with the usual
+# map-reduce fan-out. Every summary is committed as soon as it is done, so the
+# script can be stopped and started again without redoing finished ones.
+# Run `alembic upgrade head` first.
+import argparse
+import asyncio
+
+from sqlalchemy import exists
+
+from Database.connection import SessionLocal
+from Models import Students, Proffessor, Classes, Classroom_Content, Enrolled_classes  # noqa: F401
+from Models.Pdfinventory import Pdfinventory
+from Models.Pdf_summary import PdfSummary
+from Utils.llm_client import CHAT_MODEL, llm_client
+from Utils.summarizer import SUMMARY_PROMPT_VERSION, split_sections, summarize_sections
+from Utils.summary_store import load_or_extract_pages, store_summary
+from Utils.text_extractor import shutdown_extraction_pool
+
+
+def pending_hashes(limit: int | None) -> list[str]:
+    db = SessionLocal()
+    try:
+        query = (
+            db.query(Pdfinventory.pdf_sha256)
+            .filter(
+                Pdfinventory.pdf_sha256.isnot(None),
+                ~exists().where(
+                    PdfSummary.pdf_sha256 == Pdfinventory.pdf_sha256,
+                    PdfSummary.model == CHAT_MODEL,
+                    PdfSummary.prompt_version == SUMMARY_PROMPT_VERSION,
+                ),
+            )
+            .distinct()
+            .order_by(Pdfinventory.pdf_sha256)
+        )
+        if limit:
+            query = query.limit(limit)
+        return [row.pdf_sha256 for row in query]
+    finally:
+        db.close()
+
+
+def sections_for(pdf_sha256: str) -> list[dict]:
+    db = SessionLocal()
+    try:
+        pages = load_or_extract_pages(db, pdf_sha256)
+    finally:
+        db.close()
+    return split_sections((page["page"], page["page_content"]) for page in pages)
+
+
+def save_summary(pdf_sha256: str, summary: str, section_count: int) -> None:
+    db = SessionLocal()
+    try:
+        store_summary(db, pdf_sha256, summary, section_count)
+    finally:
+        db.close()
+
+
+async def backfill_pdf_summaries(concurrency: int, limit: int | None) -> tuple[int, int]:
+    hashes = pending_hashes(limit)
+    slots = asyncio.Semaphore(concurrency)
+    done = 0
+    failed = 0
+
+    async def summarize_one(pdf_sha256: str):
+        nonlocal done, failed
+        async with slots:
+            try:
+                sections = await asyncio.to_thread(sections_for, pdf_sha256)
+                if not sections:
+                    print(f"{pdf_sha256}: no text, skipped")
+                    return
+                summary = await summarize_sections(sections)
+                await asyncio.to_thread(save_summary, pdf_sha256, summary, len(sections))
+                done += 1
+                print(f"{pdf_sha256}: {len(sections)} sections summarized ({done}/{len(hashes)})")
+            except Exception as e:
+                failed += 1
+                print(f"{pdf_sha256}: failed, {type(e).__name__}: {e}")
+
+    await llm_client.start()
+    try:
+        await asyncio.gather(*(summarize_one(pdf_sha256) for pdf_sha256 in hashes))
+    finally:
+        await llm_client.close()
+        shutdown_extraction_pool()
+    return done, failed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--concurrency", type=int, default=2)
+    parser.add_argument("--limit", type=int, default=None)
+    args = parser.parse_args()
+
+    done, failed = asyncio.run(backfill_pdf_summaries(args.concurrency, args.limit))
+    print(f"done, {done} summaries stored, {failed} failed")
@@ -0,0 +1,93 @@
+# Fails when the class detail page starts issuing a query per file again.
+#
+#   alembic upgrade head
+#   python -m Scripts.check_query_counts
+#
+# Creates one enrolled class per entry in --contents, each with that many
+# files, in DATABASE_URL (use a scratch database), then loads every class
+# through the controller and counts the statements it sends. Exits 1 unless
+# the count is --expected for every class, however many files it has.
+import argparse
+import sys
+import time
+
+from sqlalchemy import insert
+
+from Controller.Classes_controller import fetch_enrolled_classes_by_id
+from Database.connection import SessionLocal
+from Models import Pdfinventory  # noqa: F401
+from Models.Classes import Classes
+from Models.Classroom_Content import ClassroomContent
+from Models.Enrolled_classes import Enrolled_classes
+from Models.Proffessor import Proffessor
+from Models.Students import Student
+from Utils.auth import STUDENT, Principal
+from Utils.db_metrics import RequestDbStats, request_db_stats
+
+
+def create_classes(contents: list[int]) -> tuple[int, dict[int, int]]:
+    tag = int(time.time() * 1000)
+    db = SessionLocal()
+    try:
+        professor = Proffessor(first_name="count", last_name="count", phone_number=1,
+                               email=f"count-{tag}@example.com", password="x", country="x",
+                               educational_field="x", description="x", profile_picture="x")
+        student = Student(first_name="count", last_name="count", email=f"count-{tag}@example.com",
+                          password="x", phone_number="1", academic_level="x", profile_image="x",
+                          country="x", descritpion="x")
+        db.add_all([professor, student])
+        db.flush()
+
+        classes = {}
+        for files in contents:
+            classroom = Classes(professor_id=professor.id, class_title=f"count {tag} {files}", class_capacity=None,
+                                class_field="x", description="x", classroom_picture="x", classroom_password="x")
+            db.add(classroom)
+            db.flush()
+            db.add(Enrolled_classes(enrolled_student_id=student.student_id, enrolled_class_id=classroom.class_id))
+            if files:
+                db.execute(insert(ClassroomContent), [
+                    {"classroom_id": classroom.class_id, "filename": f"{number}.pdf",
+                     "cloudinary_public_id": "x", "description": "x"}
+                    for number in range(files)
+                ])
+            classes[classroom.class_id] = files
+        db.commit()
+        return student.student_id, classes
+    finally:
+        db.close()
+
+
+def count_queries(student_id: int, classes: dict[int, int]) -> dict[int, int]:
+    principal = Principal(student_id, STUDENT, {})
+    counts = {}
+    for class_id, files in classes.items():
+        db = SessionLocal()
+        stats = RequestDbStats()
+        token = request_db_stats.set(stats)
+        try:
+            detail = fetch_enrolled_classes_by_id(class_id, principal, db)
+        finally:
+            request_db_stats.reset(token)
+            db.close()
+        if len(detail["contents"]) != files:
+            sys.exit(f"class {class_id}: expected {files} files, got {len(detail['contents'])}")
+        counts[files] = stats.queries
+    return counts
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--contents", type=int, nargs="+", default=[0, 1, 25, 100])
+    parser.add_argument("--expected", type=int, default=2, help="queries allowed per class detail")
+    args = parser.parse_args()
+
+    student_id, classes = create_classes(args.contents)
+    counts = count_queries(student_id, classes)
+
+    ok = True
+    for files, queries in counts.items():
+        passed = queries == args.expected
+        ok = ok and passed
+        print(f"{'ok  ' if passed else 'FAIL'} {files:>4} files: {queries} queries")
+    sys.exit(0 if ok else 1)
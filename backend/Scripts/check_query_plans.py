@@ -0,0 +1,162 @@
+# Fails when one of the hot lookups would read a whole table instead of
+# using an index.
+#
+#   alembic upgrade head
+#   python -m Scripts.check_query_plans --seed 20000
+#
+# Point DATABASE_URL at a scratch database: --seed fills the empty tables with
+# a dataset big enough that the planner prefers an index wherever one exists,
+# on a handful of rows a sequential scan is always cheapest. Without --seed the
+# plans are checked against whatever data is already there. Exits 1 and prints
+# the offending plans when a query regresses to a sequential scan.
+import argparse
+import json
+import sys
+
+from sqlalchemy import func, insert, select, text
+
+from Database.connection import engine
+from Models import Pdf_chat_message, Pdf_chat_session, Pdf_chunk, Pdf_ingest_job, Pdfinventory  # noqa: F401
+from Models.Classes import Classes
+from Models.Classroom_Content import ClassroomContent
+from Models.Enrolled_classes import Enrolled_classes
+from Models.Proffessor import Proffessor
+from Models.Students import Student
+
+STUDENTS_PER_PROFESSOR = 10
+CLASSES_PER_PROFESSOR = 2
+ENROLLMENTS_PER_STUDENT = 3
+CONTENT_PER_CLASS = 5
+CLASS_FIELDS = 20
+CATALOG_PAGE = 21
+INSERT_BATCH = 5000
+
+# the statements the controllers run, with one concrete value each
+HOT_QUERIES = {
+    "student login": select(Student).filter(Student.email == "student7@example.com"),
+    "professor login": select(Proffessor).filter(Proffessor.email == "professor7@example.com"),
+    "already enrolled": select(Enrolled_classes).filter(
+        Enrolled_classes.enrolled_student_id == 7, Enrolled_classes.enrolled_class_id == 7),
+    "enrolled classes": select(Classes).join(
+        Enrolled_classes, Enrolled_classes.enrolled_class_id == Classes.class_id
+    ).filter(Enrolled_classes.enrolled_student_id == 7),
+    "class roster size": select(func.count()).select_from(Enrolled_classes).filter(
+        Enrolled_classes.enrolled_class_id == 7),
+    "professor classes": select(Classes).filter(Classes.professor_id == 7),
+    "class content": select(ClassroomContent).filter(ClassroomContent.classroom_id == 7),
+    "class catalog": select(Classes).order_by(Classes.created_at.desc(), Classes.class_id.desc()).limit(CATALOG_PAGE),
+    "class catalog by field": select(Classes).filter(Classes.class_field == "field7").order_by(
+        Classes.created_at.desc(), Classes.class_id.desc()).limit(CATALOG_PAGE),
+}
+
+
+def insert_batches(connection, table, rows):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == INSERT_BATCH:
+            connection.execute(insert(table), batch)
+            batch = []
+    if batch:
+        connection.execute(insert(table), batch)
+
+
+def seed(students: int):
+    professors = max(students // STUDENTS_PER_PROFESSOR, 1)
+    classes = professors * CLASSES_PER_PROFESSOR
+
+    with engine.begin() as connection:
+        if connection.scalar(select(func.count()).select_from(Student)):
+            sys.exit("--seed needs an empty database, the student table already has rows")
+
+        insert_batches(connection, Proffessor, (
+            {"id": number, "first_name": "p", "last_name": "p", "phone_number": number,
+             "email": f"professor{number}@example.com", "password": "x", "country": "x",
+             "educational_field": "x", "description": "x", "profile_picture": "x"}
+            for number in range(1, professors + 1)
+        ))
+        insert_batches(connection, Student, (
+            {"student_id": number, "first_name": "s", "last_name": "s", "email": f"student{number}@example.com",
+             "password": "x", "phone_number": "1", "academic_level": "x", "profile_image": "x",
+             "country": "x", "descritpion": "x"}
+            for number in range(1, students + 1)
+        ))
+        insert_batches(connection, Classes, (
+            {"class_id": number, "professor_id": (number - 1) // CLASSES_PER_PROFESSOR + 1,
+             "class_title": f"class {number}", "class_capacity": 100, "class_field": f"field{number % CLASS_FIELDS}", "description": "x",
+             "classroom_picture": "x", "classroom_password": f"password{number}"}
+            for number in range(1, classes + 1)
+        ))
+        insert_batches(connection, Enrolled_classes, (
+            {"enrolled_student_id": student, "enrolled_class_id": (student * 7 + offset * 13) % classes + 1}
+            for student in range(1, students + 1)
+            for offset in range(ENROLLMENTS_PER_STUDENT)
+        ))
+        insert_batches(connection, ClassroomContent, (
+            {"classroom_id": class_id, "filename": "f.pdf", "cloudinary_public_id": "x", "description": "x"}
+            for class_id in range(1, classes + 1)
+            for _ in range(CONTENT_PER_CLASS)
+        ))
+
+        if engine.dialect.name == "postgresql":
+            # the explicit ids above leave the serial sequences behind
+            for table, column in (("professor", "id"), ("student", "student_id"), ("classes", "class_id")):
+                connection.execute(text(
+                    f"SELECT setval(pg_get_serial_sequence('{table}', '{column}'), (SELECT MAX({column}) FROM {table}))"
+                ))
+
+    with engine.begin() as connection:
+        connection.execute(text("ANALYZE"))
+
+
+def postgres_sequential_scans(connection, sql: str) -> tuple[list[str], str]:
+    plan = connection.scalar(text(f"EXPLAIN (FORMAT JSON) {sql}"))
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    scans = []
+
+    def walk(node):
+        if node["Node Type"] == "Seq Scan":
+            scans.append(node["Relation Name"])
+        for child in node.get("Plans", []):
+            walk(child)
+
+    walk(plan[0]["Plan"])
+    return scans, json.dumps(plan[0]["Plan"], indent=2)
+
+
+def sqlite_sequential_scans(connection, sql: str) -> tuple[list[str], str]:
+    rows = connection.execute(text(f"EXPLAIN QUERY PLAN {sql}")).all()
+    # "SCAN student" reads every row; "SEARCH student USING INDEX ..." and an
+    # ordered "SCAN classes USING INDEX ..." under a LIMIT do not
+    scans = [row[3].split()[1] for row in rows if row[3].startswith("SCAN ") and " USING " not in row[3]]
+    return scans, "\n".join(row[3] for row in rows)
+
+
+def check_plans() -> bool:
+    explain = {"postgresql": postgres_sequential_scans, "sqlite": sqlite_sequential_scans}.get(engine.dialect.name)
+    if explain is None:
+        sys.exit(f"no plan check for {engine.dialect.name}")
+
+    ok = True
+    with engine.connect() as connection:
+        for name, statement in HOT_QUERIES.items():
+            sql = str(statement.compile(dialect=engine.dialect, compile_kwargs={"literal_binds": True}))
+            scans, plan = explain(connection, sql)
+            if scans:
+                ok = False
+                print(f"FAIL {name}: sequential scan on {', '.join(scans)}\n{sql}\n{plan}\n")
+            else:
+                print(f"ok   {name}")
+    return ok
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--seed", type=int, metavar="STUDENTS",
+                        help="fill an empty database with this many students and matching classes first")
+    args = parser.parse_args()
+
+    if args.seed:
+        seed(args.seed)
+    sys.exit(0 if check_plans() else 1)
@@ -0,0 +1,70 @@
+# Fails when a model error during /pdf_analyzer ends the stream without an
+# error event.
+#
+#   LLM_PROVIDER=fake FAKE_LLM_URL=http://127.0.0.1:9/v1 LLM_MAX_RETRIES=0 uvicorn main:app --port 8000 &
+#   python -m Scripts.check_summary_errors
+#
+# Nothing listens on the fake provider's port, so every map call fails with
+# a 502 while the other sections' calls are still running. The app and this
+# script must share SECRET_KEY so the minted token is accepted. Exits 1
+# unless the last event of the stream is an error.
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import httpx
+
+from Benchmarks.extraction_benchmark import make_pdf
+from Utils.auth import STUDENT
+from Utils.jwt_logic import create_access_token
+
+
+def read_events(response: httpx.Response) -> list[tuple[str, str]]:
+    events = []
+    event, data = "message", ""
+    for line in response.iter_lines():
+        if line.startswith("event:"):
+            event = line[len("event:"):].strip()
+        elif line.startswith("data:"):
+            data = line[len("data:"):].strip()
+        elif not line and data:
+            events.append((event, data))
+            event, data = "message", ""
+    return events
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--app-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--student-id", type=int, default=1)
+    parser.add_argument("--pages", type=int, default=30, help="enough pages for several sections")
+    parser.add_argument("--timeout", type=float, default=120)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        path = os.path.join(workdir, "failing.pdf")
+        # a fresh seed so no stored summary answers from the cache
+        make_pdf(path, args.pages, seed=time.time_ns())
+        with open(path, "rb") as pdf:
+            pdf_bytes = pdf.read()
+
+    headers = {"Authorization": "Bearer " + create_access_token({"sub": str(args.student_id), "role": STUDENT})}
+    events = []
+    with httpx.Client(base_url=args.app_url, timeout=args.timeout) as client:
+        try:
+            with client.stream("POST", "/pdf_analyzer", headers=headers,
+                               files={"file": ("failing.pdf", pdf_bytes, "application/pdf")}) as response:
+                print(f"status {response.status_code}")
+                if response.status_code == 200:
+                    events = read_events(response)
+        except httpx.HTTPError as error:
+            # the server dropped the stream instead of reporting the error
+            print(f"stream broken: {error}")
+
+    for event, data in events[-3:]:
+        print(f"{event}: {data[:120]}")
+    ok = bool(events) and events[-1][0] == "error"
+    print("ok" if ok else "FAIL: the stream did not end with an error event")
+    sys.exit(0 if ok else 1)
@@ -0,0 +1,58 @@
+# Fails when dense retrieval stops finding the chunk a question is about.
+#
+#   python -m Scripts.check_vector_index
+#
+# Builds the vector index of --chunks synthetic chunks of --words words each,
+# the size the chunker produces, and plants the terms of one question in one
+# chunk per question. Exits 1 unless every embedding is finite and each
+# question ranks its own chunk first.
+import argparse
+import random
+import sys
+
+import numpy as np
+
+from Utils.vector_index import build_vector_index, load_vector_index, search_vector_index
+
+QUESTIONS = [
+    "photosynthesis chlorophyll absorption",
+    "treaty of westphalia sovereignty",
+    "dijkstra shortest path relaxation",
+    "keynesian multiplier aggregate demand",
+    "mitochondria oxidative phosphorylation",
+]
+
+
+def make_chunks(count: int, words: int, seed: int) -> list[dict]:
+    rng = random.Random(seed)
+    vocabulary = [f"term{number}" for number in range(3000)]
+    return [{"text": " ".join(rng.choice(vocabulary) for _ in range(words))} for _ in range(count)]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--chunks", type=int, default=200)
+    parser.add_argument("--words", type=int, default=300)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    chunks = make_chunks(args.chunks, args.words, args.seed)
+    rng = random.Random(args.seed)
+    targets = rng.sample(range(len(chunks)), len(QUESTIONS))
+    for question, target in zip(QUESTIONS, targets):
+        words = chunks[target]["text"].split()
+        words[rng.randrange(len(words)):0] = question.split()
+        chunks[target]["text"] = " ".join(words)
+
+    blob = build_vector_index(chunks)
+    not_finite = int((~np.isfinite(load_vector_index(blob))).any(axis=1).sum())
+    print(f"{not_finite}/{len(chunks)} embeddings are not finite")
+    ok = not_finite == 0
+
+    for question, target in zip(QUESTIONS, targets):
+        ranked = search_vector_index(blob, question, top_k=3)
+        print(f"{question!r}: expected chunk {target}, got {ranked}")
+        ok = ok and bool(ranked) and ranked[0][0] == target and np.isfinite(ranked[0][1])
+
+    print("ok" if ok else "FAIL")
+    sys.exit(0 if ok else 1)
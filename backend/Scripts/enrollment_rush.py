@@ -0,0 +1,120 @@
+# Registration-day rush: many students enroll into one small class at the
+# same moment, and exactly as many as there are seats may get in.
+#
+#   uvicorn main:app --port 8000 &
+#   python -m Scripts.enrollment_rush --students 1000 --capacity 30
+#
+# Creates a class and --students students in DATABASE_URL (use a scratch
+# database), releases all the enrollment requests at once against the running
+# app, then checks the responses, the enrolled_courses rows and the class's
+# enrolled_count against the capacity. Exits 1 on any mismatch, and on any
+# answer other than 200 or 409, 5xx and dropped connections included. The
+# app and this script must share SECRET_KEY and DATABASE_URL.
+import argparse
+import asyncio
+import sys
+import time
+from collections import Counter
+
+import httpx
+from sqlalchemy import func, insert, select
+
+from Database.connection import SessionLocal
+from Models import Classroom_Content, Pdfinventory  # noqa: F401
+from Models.Classes import Classes
+from Models.Enrolled_classes import Enrolled_classes
+from Models.Proffessor import Proffessor
+from Models.Students import Student
+from Utils.auth import STUDENT
+from Utils.jwt_logic import create_access_token
+
+CLASSROOM_PASSWORD = "rush"
+
+
+def create_rush(students: int, capacity: int) -> tuple[int, list[int]]:
+    tag = int(time.time() * 1000)
+    db = SessionLocal()
+    try:
+        professor = Proffessor(first_name="rush", last_name="rush", phone_number=1, email=f"rush-{tag}@example.com",
+                               password="x", country="x", educational_field="x", description="x",
+                               profile_picture="x")
+        db.add(professor)
+        db.flush()
+        classroom = Classes(professor_id=professor.id, class_title=f"rush {tag}", class_capacity=capacity,
+                            class_field="x", description="x", classroom_picture="x",
+                            classroom_password=CLASSROOM_PASSWORD)
+        db.add(classroom)
+        db.flush()
+        student_ids = db.scalars(insert(Student).returning(Student.student_id), [
+            {"first_name": "rush", "last_name": str(number), "email": f"rush-{tag}-{number}@example.com",
+             "password": "x", "phone_number": "1", "academic_level": "x", "profile_image": "x",
+             "country": "x", "descritpion": "x"}
+            for number in range(students)
+        ]).all()
+        db.commit()
+        return classroom.class_id, list(student_ids)
+    finally:
+        db.close()
+
+
+async def rush(app_url: str, class_id: int, student_ids: list[int], timeout: float) -> Counter:
+    headers = [
+        {"Authorization": "Bearer " + create_access_token({"sub": str(student_id), "role": STUDENT})}
+        for student_id in student_ids
+    ]
+    body = {"class_id": class_id, "classroom_password": CLASSROOM_PASSWORD}
+    go = asyncio.Event()
+    limits = httpx.Limits(max_connections=len(headers), max_keepalive_connections=len(headers))
+
+    async with httpx.AsyncClient(base_url=app_url, timeout=httpx.Timeout(timeout), limits=limits) as client:
+        async def enroll(student_headers: dict):
+            await go.wait()
+            try:
+                response = await client.post("/enroll_in_a_course", json=body, headers=student_headers)
+                return response.status_code
+            except httpx.HTTPError as error:
+                return type(error).__name__
+
+        tasks = [asyncio.create_task(enroll(student_headers)) for student_headers in headers]
+        await asyncio.sleep(0)
+        go.set()
+        return Counter(await asyncio.gather(*tasks))
+
+
+def check(class_id: int, students: int, capacity: int, statuses: Counter) -> bool:
+    db = SessionLocal()
+    try:
+        rows = db.scalar(select(func.count()).select_from(Enrolled_classes).filter(
+            Enrolled_classes.enrolled_class_id == class_id))
+        enrolled_count = db.scalar(select(Classes.enrolled_count).filter(Classes.class_id == class_id))
+    finally:
+        db.close()
+
+    print(f"responses: {dict(statuses)}")
+    print(f"enrollment rows: {rows}, enrolled_count: {enrolled_count}, capacity: {capacity}")
+    # a request that errored may have been the one owed a seat, so the seat
+    # counts adding up does not make the run a pass
+    failed = {status: count for status, count in statuses.items() if status not in (200, 409)}
+    if failed:
+        print(f"failed requests: {failed}")
+    seats = min(students, capacity)
+    return (not failed and statuses[409] == students - seats
+            and statuses[200] == rows == enrolled_count == seats)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--app-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--students", type=int, default=1000)
+    parser.add_argument("--capacity", type=int, default=30)
+    parser.add_argument("--timeout", type=float, default=120)
+    args = parser.parse_args()
+
+    class_id, student_ids = create_rush(args.students, args.capacity)
+    started = time.perf_counter()
+    statuses = asyncio.run(rush(args.app_url, class_id, student_ids, args.timeout))
+    print(f"{args.students} enrollments in {time.perf_counter() - started:.1f}s")
+
+    ok = check(class_id, args.students, args.capacity, statuses)
+    print("ok" if ok else "FAIL")
+    sys.exit(0 if ok else 1)
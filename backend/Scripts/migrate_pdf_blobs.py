@@ -0,0 +1,65 @@
+# Moves pdf_inventory.pdf_content into the blob store in batches.
+#
+#   python -m Scripts.migrate_pdf_blobs --batch-size 50
+#
+# Each batch is committed on its own, so the script can be stopped and resumed
+# at any point; rows that already have a pdf_sha256 are skipped.
+import argparse
+
+from sqlalchemy import inspect, text
+from sqlalchemy.orm import load_only
+
+from Database.connection import SessionLocal, engine
+from Models import Students, Proffessor, Classes, Classroom_Content, Enrolled_classes  # noqa: F401
+from Models.Pdfinventory import Pdfinventory
+from Utils.blob_store import get_blob_store
+
+
+def ensure_blob_columns():
+    columns = {column["name"] for column in inspect(engine).get_columns("pdf_inventory")}
+    with engine.begin() as connection:
+        if "pdf_sha256" not in columns:
+            connection.execute(text("ALTER TABLE pdf_inventory ADD COLUMN pdf_sha256 VARCHAR(64)"))
+            connection.execute(text("CREATE INDEX IF NOT EXISTS ix_pdf_inventory_pdf_sha256 ON pdf_inventory (pdf_sha256)"))
+        if "pdf_size" not in columns:
+            connection.execute(text("ALTER TABLE pdf_inventory ADD COLUMN pdf_size BIGINT"))
+        if engine.dialect.name == "postgresql":
+            connection.execute(text("ALTER TABLE pdf_inventory ALTER COLUMN pdf_content DROP NOT NULL"))
+
+
+def migrate_pdf_blobs(batch_size: int) -> int:
+    store = get_blob_store()
+    moved = 0
+
+    while True:
+        db = SessionLocal()
+        try:
+            batch = (
+                db.query(Pdfinventory)
+                .options(load_only(Pdfinventory.pdf_id, Pdfinventory.pdf_content))
+                .filter(Pdfinventory.pdf_sha256.is_(None), Pdfinventory.pdf_content.isnot(None))
+                .order_by(Pdfinventory.pdf_id)
+                .limit(batch_size)
+                .all()
+            )
+            if not batch:
+                return moved
+
+            for pdf in batch:
+                pdf.pdf_sha256, pdf.pdf_size = store.put(pdf.pdf_content)
+                pdf.pdf_content = None
+
+            db.commit()
+            moved += len(batch)
+            print(f"moved {moved} pdfs to the blob store")
+        finally:
+            db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--batch-size", type=int, default=50)
+    args = parser.parse_args()
+
+    ensure_blob_columns()
+    print(f"done, {migrate_pdf_blobs(args.batch_size)} pdfs moved")
@@ -0,0 +1,156 @@
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from datetime import timedelta, timezone
+
+from dotenv import load_dotenv
+from sqlalchemy.exc import SQLAlchemyError
+
+from Database.connection import SessionLocal
+from Models.Pdf_answer_cache import PdfAnswerCache
+from Models.Pdf_ingest_job import utcnow
+
+load_dotenv()
+
+ANSWER_CACHE_SIZE = int(os.getenv("ANSWER_CACHE_SIZE", "1024"))
+ANSWER_CACHE_TTL_SECONDS = int(os.getenv("ANSWER_CACHE_TTL_SECONDS", "86400"))
+# the database tier is shared by every worker process, the in-process tier only
+# by the threads of one
+ANSWER_CACHE_DB = os.getenv("ANSWER_CACHE_DB", "0") == "1"
+
+WHITESPACE_PATTERN = re.compile(r"\s+")
+TRAILING_PUNCTUATION = "?!. "
+
+
+def normalize_question(question: str) -> str:
+    return WHITESPACE_PATTERN.sub(" ", question).strip().lower().rstrip(TRAILING_PUNCTUATION)
+
+
+def context_hash(chunks: list[dict]) -> str:
+    digest = hashlib.sha256()
+    for chunk in chunks:
+        digest.update(chunk["text"].encode())
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def answer_cache_key(pdf_sha256: str, model: str, question: str, chunks: list[dict]) -> str:
+    # the retrieved context is part of the key, so a re-chunked or re-indexed
+    # document never gets answers that were built from other excerpts
+    parts = [pdf_sha256, model, normalize_question(question), context_hash(chunks)]
+    return hashlib.sha256(json.dumps(parts).encode()).hexdigest()
+
+
+class AnswerCache:
+
+    def __init__(self, max_entries: int, ttl_seconds: int, use_db: bool):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.use_db = use_db
+        self.entries: OrderedDict[str, tuple[float, str]] = OrderedDict()
+        self.lock = threading.Lock()
+        self.counters = {"memory_hits": 0, "db_hits": 0, "misses": 0, "bypasses": 0, "stores": 0}
+
+    def count(self, counter: str) -> None:
+        with self.lock:
+            self.counters[counter] += 1
+
+    def get(self, key: str) -> str | None:
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                expires_at, answer = entry
+                if expires_at > time.monotonic():
+                    self.entries.move_to_end(key)
+                    self.counters["memory_hits"] += 1
+                    return answer
+                del self.entries[key]
+
+        answer = self._db_get(key) if self.use_db else None
+        if answer is None:
+            self.count("misses")
+            return None
+
+        self.count("db_hits")
+        self._remember(key, answer)
+        return answer
+
+    def put(self, key: str, answer: str) -> None:
+        self._remember(key, answer)
+        if self.use_db:
+            self._db_put(key, answer)
+        self.count("stores")
+
+    def clear(self) -> None:
+        with self.lock:
+            self.entries.clear()
+
+    def stats(self) -> dict:
+        with self.lock:
+            counters = dict(self.counters)
+            entries = len(self.entries)
+        lookups = counters["memory_hits"] + counters["db_hits"] + counters["misses"]
+        return {
+            **counters,
+            "entries": entries,
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "db_tier": self.use_db,
+            "hit_rate": ((counters["memory_hits"] + counters["db_hits"]) / lookups) if lookups else 0.0,
+        }
+
+    def _remember(self, key: str, answer: str) -> None:
+        with self.lock:
+            self.entries[key] = (time.monotonic() + self.ttl_seconds, answer)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    # the database tier is best effort: a failing cache table must never fail
+    # the chat request, so errors are swallowed and treated as a miss
+    def _db_get(self, key: str) -> str | None:
+        db = SessionLocal()
+        try:
+            row = db.get(PdfAnswerCache, key)
+            if row is None:
+                return None
+            # sqlite hands the utc time back naive, postgres as an aware
+            # time in the session's time zone
+            expires_at = row.expires_at
+            if expires_at.tzinfo is None:
+                expires_at = expires_at.replace(tzinfo=timezone.utc)
+            else:
+                expires_at = expires_at.astimezone(timezone.utc)
+            if expires_at <= utcnow():
+                db.delete(row)
+                db.commit()
+                return None
+            return row.answer
+        except SQLAlchemyError:
+            db.rollback()
+            return None
+        finally:
+            db.close()
+
+    def _db_put(self, key: str, answer: str) -> None:
+        db = SessionLocal()
+        try:
+            db.merge(PdfAnswerCache(
+                cache_key=key,
+                answer=answer,
+                created_at=utcnow(),
+                expires_at=utcnow() + timedelta(seconds=self.ttl_seconds),
+            ))
+            db.commit()
+        except SQLAlchemyError:
+            # another worker stored the same answer first
+            db.rollback()
+        finally:
+            db.close()
+
+
+answer_cache = AnswerCache(ANSWER_CACHE_SIZE, ANSWER_CACHE_TTL_SECONDS, ANSWER_CACHE_DB)
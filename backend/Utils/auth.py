@@ -0,0 +1,119 @@
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from dotenv import load_dotenv
+from fastapi import Depends, HTTPException, Header
+
+from Utils.jwt_logic import verify_access_token
+
+load_dotenv()
+
+AUTH_TOKEN_CACHE_SIZE = int(os.getenv("AUTH_TOKEN_CACHE_SIZE", "4096"))
+# the pool, cache and hashing stats endpoints show how busy the app is and
+# what it caches; they answer 404 unless this is set
+OPS_STATS_ENABLED = os.getenv("OPS_STATS_ENABLED", "0") == "1"
+
+STUDENT = "student"
+PROFESSOR = "professor"
+
+
+class Principal:
+    # who a request acts for. tokens issued before logins added the role
+    # claim have role None and are accepted for either role until they expire
+
+    __slots__ = ("user_id", "role", "claims")
+
+    def __init__(self, user_id: int, role: str | None, claims: dict):
+        self.user_id = user_id
+        self.role = role
+        self.claims = claims
+
+    def has_role(self, role: str) -> bool:
+        return self.role is None or self.role == role
+
+
+class TokenCache:
+    # verified claims keyed by the sha256 of the token, so the raw token is
+    # never kept in memory; entries are dropped once the token's exp passes
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self.entries: OrderedDict[bytes, tuple[float, dict]] = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def decode(self, token: str) -> dict | None:
+        key = hashlib.sha256(token.encode()).digest()
+        now = time.time()
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                expires_at, claims = entry
+                if expires_at > now:
+                    self.entries.move_to_end(key)
+                    self.hits += 1
+                    return claims
+                del self.entries[key]
+                return None
+            self.misses += 1
+
+        # only successfully verified tokens are cached, garbage tokens cannot
+        # push real ones out
+        claims = verify_access_token(token)
+        if not claims or "sub" not in claims or "exp" not in claims:
+            return None
+
+        with self.lock:
+            self.entries[key] = (float(claims["exp"]), claims)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+        return claims
+
+    def clear(self) -> None:
+        with self.lock:
+            self.entries.clear()
+
+
+token_cache = TokenCache(AUTH_TOKEN_CACHE_SIZE)
+
+
+# async so the dependency runs on the event loop instead of taking a
+# threadpool hop per request; a cache miss costs one HMAC verification
+async def get_principal(authorization: str | None = Header(None)) -> Principal:
+    if not authorization:
+        raise HTTPException(status_code=401, detail="Authorization header missing")
+
+    if not authorization.startswith("Bearer "):
+        raise HTTPException(status_code=401, detail="Invalid authorization header")
+
+    claims = token_cache.decode(authorization.split(" ")[1])
+    if not claims:
+        raise HTTPException(status_code=401, detail="Invalid or expired token")
+
+    try:
+        user_id = int(claims["sub"])
+    except (TypeError, ValueError):
+        raise HTTPException(status_code=401, detail="Invalid or expired token")
+
+    return Principal(user_id, claims.get("role"), claims)
+
+
+async def require_student(principal: Principal = Depends(get_principal)) -> Principal:
+    if not principal.has_role(STUDENT):
+        raise HTTPException(status_code=403, detail="Only students can do this")
+    return principal
+
+
+async def require_professor(principal: Principal = Depends(get_principal)) -> Principal:
+    if not principal.has_role(PROFESSOR):
+        raise HTTPException(status_code=403, detail="Only professors can do this")
+    return principal
+
+
+async def require_ops_stats() -> None:
+    if not OPS_STATS_ENABLED:
+        raise HTTPException(status_code=404, detail="Not Found")
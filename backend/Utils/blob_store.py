@@ -0,0 +1,136 @@
+import hashlib
+import mmap
+import os
+import tempfile
+from abc import ABC, abstractmethod
+from typing import BinaryIO
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+READ_CHUNK_SIZE = 1024 * 1024
+
+
+class BlobStore(ABC):
+    # blobs are addressed by the sha256 of their content, so storing the same
+    # bytes twice is a no-op and a hash can be used as an ETag as is
+
+    @abstractmethod
+    def put_file(self, fileobj: BinaryIO) -> tuple[str, int]:
+        ...
+
+    @abstractmethod
+    def put(self, data: bytes) -> tuple[str, int]:
+        ...
+
+    @abstractmethod
+    def exists(self, sha256: str) -> bool:
+        ...
+
+    @abstractmethod
+    def open(self, sha256: str) -> BinaryIO:
+        ...
+
+    def read(self, sha256: str):
+        with self.open(sha256) as blob:
+            return blob.read()
+
+    def local_path(self, sha256: str) -> str | None:
+        # backends that can hand out a real file let the server use sendfile
+        return None
+
+    @abstractmethod
+    def delete(self, sha256: str) -> None:
+        ...
+
+
+class LocalBlobStore(BlobStore):
+    def __init__(self, root: str):
+        self.root = os.path.abspath(root)
+        os.makedirs(os.path.join(self.root, "tmp"), exist_ok=True)
+
+    def _path(self, sha256: str) -> str:
+        return os.path.join(self.root, sha256[:2], sha256[2:4], sha256)
+
+    def put_file(self, fileobj: BinaryIO) -> tuple[str, int]:
+        fileobj.seek(0)
+        digest = hashlib.sha256()
+        size = 0
+
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.join(self.root, "tmp"))
+        try:
+            with os.fdopen(fd, "wb") as tmp:
+                while chunk := fileobj.read(READ_CHUNK_SIZE):
+                    digest.update(chunk)
+                    tmp.write(chunk)
+                    size += len(chunk)
+
+            sha256 = digest.hexdigest()
+            final_path = self._path(sha256)
+            if os.path.exists(final_path):
+                os.remove(tmp_path)
+            else:
+                os.makedirs(os.path.dirname(final_path), exist_ok=True)
+                os.replace(tmp_path, final_path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        finally:
+            fileobj.seek(0)
+
+        return sha256, size
+
+    def put(self, data: bytes) -> tuple[str, int]:
+        sha256 = hashlib.sha256(data).hexdigest()
+        final_path = self._path(sha256)
+        if not os.path.exists(final_path):
+            os.makedirs(os.path.dirname(final_path), exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.join(self.root, "tmp"))
+            with os.fdopen(fd, "wb") as tmp:
+                tmp.write(data)
+            os.replace(tmp_path, final_path)
+        return sha256, len(data)
+
+    def exists(self, sha256: str) -> bool:
+        return os.path.exists(self._path(sha256))
+
+    def open(self, sha256: str) -> BinaryIO:
+        return open(self._path(sha256), "rb")
+
+    def read(self, sha256: str):
+        # mmap lets the page cache back the bytes instead of copying the whole
+        # file onto the python heap
+        with self.open(sha256) as blob:
+            if os.fstat(blob.fileno()).st_size == 0:
+                return b""
+            return mmap.mmap(blob.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def local_path(self, sha256: str) -> str | None:
+        return self._path(sha256)
+
+    def delete(self, sha256: str) -> None:
+        if os.path.exists(self._path(sha256)):
+            os.remove(self._path(sha256))
+
+
+BLOB_STORE_BACKENDS = {
+    "local": lambda: LocalBlobStore(os.getenv("BLOB_STORE_DIR", "blob_store")),
+}
+
+_blob_store: BlobStore | None = None
+
+
+def register_blob_store_backend(name: str, factory) -> None:
+    BLOB_STORE_BACKENDS[name] = factory
+
+
+def get_blob_store() -> BlobStore:
+    global _blob_store
+    if _blob_store is None:
+        backend = os.getenv("BLOB_STORE_BACKEND", "local")
+        if backend not in BLOB_STORE_BACKENDS:
+            raise RuntimeError(f"Unknown blob store backend: {backend}")
+        _blob_store = BLOB_STORE_BACKENDS[backend]()
+    return _blob_store
@@ -0,0 +1,72 @@
+import math
+import re
+from collections import Counter
+
+from Utils.chunker import chunk_label
+
+TOKEN_PATTERN = re.compile(r"\w+")
+K1 = 1.5
+B = 0.75
+
+
+def tokenize(text: str) -> list[str]:
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+class Bm25IndexBuilder:
+    # chunks are added one by one while they stream out of the chunker, the
+    # index only keeps term statistics keyed by chunk ordinal
+
+    def __init__(self):
+        self.postings: dict[str, list[list[int]]] = {}
+        self.doc_lengths: list[int] = []
+
+    def add(self, text: str) -> None:
+        chunk_number = len(self.doc_lengths)
+        terms = tokenize(text)
+        self.doc_lengths.append(len(terms))
+        for term, count in Counter(terms).items():
+            self.postings.setdefault(term, []).append([chunk_number, count])
+
+    def build(self) -> dict:
+        return {
+            "postings": self.postings,
+            "doc_lengths": self.doc_lengths,
+            "avgdl": (sum(self.doc_lengths) / len(self.doc_lengths)) if self.doc_lengths else 0.0,
+        }
+
+
+def build_bm25_index(chunks: list[dict]) -> dict:
+    builder = Bm25IndexBuilder()
+    for chunk in chunks:
+        builder.add(chunk["text"])
+    return builder.build()
+
+
+def search_bm25_index(index: dict, query: str, top_k: int = 5) -> list[tuple[int, float]]:
+    doc_lengths = index["doc_lengths"]
+    total = len(doc_lengths)
+    if not total:
+        return []
+
+    avgdl = index["avgdl"] or 1.0
+
+    scores: dict[int, float] = {}
+    for term in set(tokenize(query)):
+        term_postings = index["postings"].get(term)
+        if not term_postings:
+            continue
+        idf = math.log(1 + (total - len(term_postings) + 0.5) / (len(term_postings) + 0.5))
+        for chunk_number, tf in term_postings:
+            norm = K1 * (1 - B + B * doc_lengths[chunk_number] / avgdl)
+            scores[chunk_number] = scores.get(chunk_number, 0.0) + idf * tf * (K1 + 1) / (tf + norm)
+
+    ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:top_k]
+    if not ranked:
+        # nothing matched lexically, fall back to the beginning of the document
+        ranked = [(chunk_number, 0.0) for chunk_number in range(min(top_k, total))]
+    return ranked
+
+
+def format_chunks_for_prompt(chunks: list[dict]) -> str:
+    return "\n\n".join(f"[{chunk_label(chunk)}]\n{chunk['text']}" for chunk in chunks)
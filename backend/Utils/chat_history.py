@@ -0,0 +1,135 @@
+import os
+
+from dotenv import load_dotenv
+from fastapi import HTTPException
+from openai import OpenAIError
+from sqlalchemy import update
+from starlette.concurrency import run_in_threadpool
+
+from Database.connection import SessionLocal
+from Models.Pdf_chat_message import PdfChatMessage
+from Models.Pdf_chat_session import PdfChatSession
+from Models.Pdf_ingest_job import utcnow
+from Utils.chunker import WORD_PATTERN
+from Utils.llm_client import llm_client
+
+load_dotenv()
+
+# tokens are counted as whitespace separated words, like the chunker does.
+# once the turns after the summary pass CHAT_HISTORY_TOKENS, the oldest ones
+# are rolled into the summary until at most CHAT_HISTORY_KEEP_TOKENS are left.
+# the prompt never carries more than CHAT_HISTORY_TOKENS of turns either way
+CHAT_HISTORY_TOKENS = int(os.getenv("CHAT_HISTORY_TOKENS", "1500"))
+CHAT_HISTORY_KEEP_TOKENS = int(os.getenv("CHAT_HISTORY_KEEP_TOKENS", "600"))
+
+COMPACTION_PROMPT = (
+    "You keep a running summary of a student's conversation about a PDF. "
+    "Merge the new turns into the summary. Keep what the student asked, the answers with their page "
+    "references and anything left open. Answer with the updated summary only."
+)
+
+
+def count_tokens(text: str) -> int:
+    return len(WORD_PATTERN.findall(text))
+
+
+def history_messages(db, chat_session: PdfChatSession) -> list[PdfChatMessage]:
+    return (
+        db.query(PdfChatMessage)
+        .filter(
+            PdfChatMessage.session_id == chat_session.session_id,
+            PdfChatMessage.message_id > chat_session.summarized_through,
+        )
+        .order_by(PdfChatMessage.message_id)
+        .all()
+    )
+
+
+def record_turn(db, chat_session: PdfChatSession, question: str, answer: str) -> bool:
+    # stores both sides of the turn and tells whether the history went over budget
+    db.add_all([
+        PdfChatMessage(session_id=chat_session.session_id, role="user", content=question,
+                       token_count=count_tokens(question)),
+        PdfChatMessage(session_id=chat_session.session_id, role="assistant", content=answer,
+                       token_count=count_tokens(answer)),
+    ])
+    chat_session.updated_at = utcnow()
+    db.commit()
+    return sum(message.token_count for message in history_messages(db, chat_session)) > CHAT_HISTORY_TOKENS
+
+
+def messages_to_compact(history: list[PdfChatMessage]) -> list[PdfChatMessage]:
+    # the oldest whole turns, leaving the newest ones within the keep budget
+    remaining = sum(message.token_count for message in history)
+    rolled = []
+    for message in history:
+        if remaining <= CHAT_HISTORY_KEEP_TOKENS and message.role == "user":
+            break
+        rolled.append(message)
+        remaining -= message.token_count
+    return rolled
+
+
+def within_history_budget(history: list[PdfChatMessage]) -> list[PdfChatMessage]:
+    # the newest whole turns that fit in CHAT_HISTORY_TOKENS. Compaction runs
+    # after the answer and may fail or fall behind, this keeps the prompt
+    # bounded regardless; turns dropped here still reach the summary later
+    kept = []
+    total = 0
+    for message in reversed(history):
+        total += message.token_count
+        if total > CHAT_HISTORY_TOKENS:
+            break
+        kept.append(message)
+    kept.reverse()
+    # an answer whose question did not fit is dropped with it
+    while kept and kept[0].role != "user":
+        kept.pop(0)
+    return kept
+
+
+async def compact_chat_session(session_id: int, user_id: int | None = None) -> None:
+    def load():
+        db = SessionLocal()
+        try:
+            chat_session = db.get(PdfChatSession, session_id)
+            rolled = messages_to_compact(history_messages(db, chat_session))
+            return chat_session.summary, chat_session.summarized_through, [
+                (message.message_id, message.role, message.content) for message in rolled
+            ]
+        finally:
+            db.close()
+
+    def store(previous_through: int, summary: str, through: int):
+        db = SessionLocal()
+        try:
+            # a concurrent compaction of the same session may have won, in
+            # which case this one is dropped rather than overwriting it
+            db.execute(
+                update(PdfChatSession)
+                .where(
+                    PdfChatSession.session_id == session_id,
+                    PdfChatSession.summarized_through == previous_through,
+                )
+                .values(summary=summary, summarized_through=through)
+            )
+            db.commit()
+        finally:
+            db.close()
+
+    previous_summary, previous_through, rolled = await run_in_threadpool(load)
+    if not rolled:
+        return
+
+    turns = "\n\n".join(f"{role}: {content}" for _, role, content in rolled)
+    try:
+        summary = await llm_client.complete([
+            {"role": "system", "content": COMPACTION_PROMPT},
+            {"role": "user", "content": f"Current summary:\n{previous_summary or '(none yet)'}\n\nNew turns:\n{turns}"},
+        ], user_id=user_id)
+    except (HTTPException, OpenAIError):
+        # compaction is best effort, the history is just longer until the
+        # next turn tries again
+        return
+    if summary:
+        await run_in_threadpool(store, previous_through, summary, rolled[-1][0])
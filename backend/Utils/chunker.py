@@ -0,0 +1,94 @@
+import os
+import re
+from collections import deque
+from typing import Iterable, Iterator
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# "tokens" are whitespace separated words, which is close enough to model
+# tokens for budgeting and needs no tokenizer download
+CHUNK_TOKENS = int(os.getenv("CHUNK_TOKENS", "300"))
+CHUNK_OVERLAP_TOKENS = int(os.getenv("CHUNK_OVERLAP_TOKENS", "50"))
+PAGE_SEPARATOR = "\n"
+
+WORD_PATTERN = re.compile(r"\S+")
+
+
+def chunk_pages(
+    pages: Iterable[tuple[int, str]],
+    chunk_tokens: int = CHUNK_TOKENS,
+    overlap_tokens: int = CHUNK_OVERLAP_TOKENS,
+) -> Iterator[dict]:
+    # pages are consumed one at a time and only the text of the pages the
+    # current window still points into is kept, so memory is bounded by the
+    # chunk size rather than the document size. char offsets are positions in
+    # the document text with pages joined by PAGE_SEPARATOR
+    if not 0 <= overlap_tokens < chunk_tokens:
+        raise ValueError("overlap_tokens must be smaller than chunk_tokens")
+
+    window: deque[tuple[int, int, int, int]] = deque()
+    page_texts: dict[int, tuple[str, int]] = {}
+    document_offset = 0
+    ordinal = 0
+
+    def emit():
+        nonlocal ordinal
+        first_page, first_start, _, first_offset = window[0]
+        last_page, _, last_end, _ = window[-1]
+        pieces = []
+        for page_number in range(first_page, last_page + 1):
+            if page_number not in page_texts:
+                continue
+            text, _ = page_texts[page_number]
+            start = first_start if page_number == first_page else 0
+            end = last_end if page_number == last_page else len(text)
+            pieces.append(text[start:end])
+        text = PAGE_SEPARATOR.join(pieces)
+        chunk = {
+            "ordinal": ordinal,
+            "page_start": first_page,
+            "page_end": last_page,
+            "char_start": first_offset,
+            "char_end": page_texts[last_page][1] + last_end,
+            "text": text,
+        }
+        ordinal += 1
+        return chunk
+
+    def slide(current_page):
+        for _ in range(chunk_tokens - overlap_tokens):
+            window.popleft()
+        oldest_page = window[0][0] if window else current_page
+        for page_number in [page for page in page_texts if page < oldest_page]:
+            del page_texts[page_number]
+
+    for page_number, text in pages:
+        if not text:
+            continue
+        page_texts[page_number] = (text, document_offset)
+        for match in WORD_PATTERN.finditer(text):
+            window.append((page_number, match.start(), match.end(), document_offset + match.start()))
+            if len(window) == chunk_tokens:
+                yield emit()
+                slide(page_number)
+        document_offset += len(text) + len(PAGE_SEPARATOR)
+
+    # whatever is left is only emitted if it holds more than the overlap that
+    # the previous chunk already covered
+    if window and (ordinal == 0 or len(window) > overlap_tokens):
+        yield emit()
+
+
+def chunks_from_pages(pages: list[dict]) -> list[dict]:
+    # pdf_chunked_text used to hold one {"page", "page_content"} dict per page
+    if pages and "page_content" in pages[0]:
+        return list(chunk_pages((page["page"], page["page_content"]) for page in pages))
+    return pages
+
+
+def chunk_label(chunk: dict) -> str:
+    if chunk["page_start"] == chunk["page_end"]:
+        return f"page {chunk['page_start']}"
+    return f"pages {chunk['page_start']}-{chunk['page_end']}"
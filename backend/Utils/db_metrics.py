@@ -0,0 +1,169 @@
+import contextvars
+import logging
+import os
+import threading
+import time
+
+from dotenv import load_dotenv
+from sqlalchemy import event
+from sqlalchemy.pool import QueuePool
+from starlette.datastructures import MutableHeaders
+
+load_dotenv()
+
+# statements slower than this are logged with their bound values replaced
+# by type names, so emails, password hashes and PDF text never reach the log
+DB_SLOW_QUERY_MS = float(os.getenv("DB_SLOW_QUERY_MS", "200"))
+# adds X-DB-Query-Count, X-DB-Time-Ms and Server-Timing to every response
+DB_DEBUG_HEADERS = os.getenv("DB_DEBUG_HEADERS", "0") == "1"
+SLOW_QUERY_STATEMENT_CHARS = 1000
+
+logger = logging.getLogger(__name__)
+
+
+class RequestDbStats:
+
+    __slots__ = ("queries", "time_ms")
+
+    def __init__(self):
+        self.queries = 0
+        self.time_ms = 0.0
+
+
+# set per request by DbMetricsMiddleware; handlers that run in the
+# threadpool see the same object
+request_db_stats: contextvars.ContextVar[RequestDbStats | None] = contextvars.ContextVar(
+    "request_db_stats", default=None)
+
+
+def redact_parameters(parameters):
+    if isinstance(parameters, dict):
+        return {key: type(value).__name__ for key, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        if parameters and isinstance(parameters[0], (dict, list, tuple)):
+            return [redact_parameters(row) for row in parameters[:3]] + (
+                [f"... {len(parameters) - 3} more rows"] if len(parameters) > 3 else [])
+        return [type(value).__name__ for value in parameters]
+    return type(parameters).__name__
+
+
+class DbMetrics:
+    # process wide counters for every engine passed to track_engine, plus
+    # the wait for a pooled connection measured by TimedQueuePool
+
+    def __init__(self, slow_query_ms: float = DB_SLOW_QUERY_MS):
+        self.slow_query_ms = slow_query_ms
+        self.engines = {}
+        self.lock = threading.Lock()
+        self.queries = 0
+        self.slow_queries = 0
+        self.total_query_ms = 0.0
+        self.checkouts = 0
+        self.total_wait_ms = 0.0
+        self.max_wait_ms = 0.0
+
+    def track_engine(self, name: str, engine):
+        self.engines[name] = engine
+        event.listen(engine, "before_cursor_execute", self._before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", self._after_cursor_execute)
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        elapsed_ms = (time.perf_counter() - conn.info["query_started"].pop()) * 1000
+        with self.lock:
+            self.queries += 1
+            self.total_query_ms += elapsed_ms
+
+        stats = request_db_stats.get()
+        if stats is not None:
+            stats.queries += 1
+            stats.time_ms += elapsed_ms
+
+        if elapsed_ms >= self.slow_query_ms:
+            with self.lock:
+                self.slow_queries += 1
+            logger.warning("slow query %.1fms: %s params=%s", elapsed_ms,
+                           " ".join(statement.split())[:SLOW_QUERY_STATEMENT_CHARS], redact_parameters(parameters))
+
+    def record_wait(self, wait_ms: float):
+        with self.lock:
+            self.checkouts += 1
+            self.total_wait_ms += wait_ms
+            self.max_wait_ms = max(self.max_wait_ms, wait_ms)
+
+    def pool_status(self, pool) -> dict:
+        status = {"class": type(pool).__name__}
+        if isinstance(pool, QueuePool):
+            status.update({
+                "size": pool.size(),
+                "checked_out": pool.checkedout(),
+                "checked_in": pool.checkedin(),
+                # negative while the pool has not opened all of its connections yet
+                "overflow": pool.overflow(),
+                "max_overflow": pool._max_overflow,
+                "timeout_seconds": pool.timeout(),
+            })
+        return status
+
+    def stats(self) -> dict:
+        with self.lock:
+            counters = {
+                "queries": self.queries,
+                "slow_queries": self.slow_queries,
+                "slow_query_ms": self.slow_query_ms,
+                "mean_query_ms": self.total_query_ms / self.queries if self.queries else 0.0,
+                "checkouts": self.checkouts,
+                "mean_checkout_wait_ms": self.total_wait_ms / self.checkouts if self.checkouts else 0.0,
+                "max_checkout_wait_ms": self.max_wait_ms,
+            }
+        return {
+            **counters,
+            "pools": {name: self.pool_status(engine.pool) for name, engine in self.engines.items()},
+        }
+
+
+db_metrics = DbMetrics()
+
+
+# QueuePool has no event for the time spent waiting on a full pool, so the
+# pool class itself times the checkout; opening a new connection when
+# the pool is not full yet counts as waiting too
+class TimedQueuePool(QueuePool):
+
+    def _do_get(self):
+        started = time.perf_counter()
+        connection = super()._do_get()
+        db_metrics.record_wait((time.perf_counter() - started) * 1000)
+        return connection
+
+
+class DbMetricsMiddleware:
+    # plain ASGI middleware rather than BaseHTTPMiddleware, which would run
+    # the endpoint in another task and buffer streamed responses
+
+    def __init__(self, app, debug_headers: bool = DB_DEBUG_HEADERS):
+        self.app = app
+        self.debug_headers = debug_headers
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestDbStats()
+        token = request_db_stats.set(stats)
+
+        async def send_with_headers(message):
+            if self.debug_headers and message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                headers["X-DB-Query-Count"] = str(stats.queries)
+                headers["X-DB-Time-Ms"] = f"{stats.time_ms:.1f}"
+                headers.append("Server-Timing", f"db;dur={stats.time_ms:.1f}")
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_headers)
+        finally:
+            request_db_stats.reset(token)
@@ -0,0 +1,71 @@
+from fastapi import HTTPException, status
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from Utils.bm25_index import tokenize
+
+HIGHLIGHT_START = "<mark>"
+HIGHLIGHT_STOP = "</mark>"
+
+# ranking runs on the index alone, ts_headline only for the rows returned
+POSTGRES_SEARCH = text(f"""
+    SELECT ranked.pdf_id, ranked.pdf_name, ranked.ordinal, ranked.page_start, ranked.page_end, ranked.rank,
+           ts_headline('english', ranked.text, ranked.query,
+                       'StartSel={HIGHLIGHT_START}, StopSel={HIGHLIGHT_STOP}, MaxFragments=2, MinWords=8, MaxWords=30')
+               AS snippet
+    FROM (
+        SELECT c.pdf_id, p.pdf_name, c.ordinal, c.page_start, c.page_end, c.text, query,
+               ts_rank_cd(c.search_vector, query) AS rank
+        FROM pdf_chunk c
+        JOIN pdf_inventory p ON p.pdf_id = c.pdf_id,
+             websearch_to_tsquery('english', :q) AS query
+        WHERE p.student_id = :student_id AND c.search_vector @@ query
+        ORDER BY rank DESC
+        LIMIT :limit
+    ) AS ranked
+    ORDER BY ranked.rank DESC
+""")
+
+SQLITE_SEARCH = text(f"""
+    SELECT c.pdf_id, p.pdf_name, c.ordinal, c.page_start, c.page_end,
+           -bm25(pdf_chunk_fts) AS rank,
+           snippet(pdf_chunk_fts, 0, '{HIGHLIGHT_START}', '{HIGHLIGHT_STOP}', '...', 24) AS snippet
+    FROM pdf_chunk_fts
+    JOIN pdf_chunk c ON c.chunk_id = pdf_chunk_fts.rowid
+    JOIN pdf_inventory p ON p.pdf_id = c.pdf_id
+    WHERE pdf_chunk_fts MATCH :q AND p.student_id = :student_id
+    ORDER BY bm25(pdf_chunk_fts)
+    LIMIT :limit
+""")
+
+
+def fts5_query(query: str) -> str:
+    # every term is quoted so user input can never be read as fts5 syntax
+    return " ".join('"' + term.replace('"', '""') + '"' for term in tokenize(query))
+
+
+def search_chunks(db: Session, student_id: int, query: str, limit: int) -> list[dict]:
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        rows = db.execute(POSTGRES_SEARCH, {"q": query, "student_id": student_id, "limit": limit})
+    elif dialect == "sqlite":
+        match = fts5_query(query)
+        if not match:
+            return []
+        rows = db.execute(SQLITE_SEARCH, {"q": match, "student_id": student_id, "limit": limit})
+    else:
+        raise HTTPException(status_code=status.HTTP_501_NOT_IMPLEMENTED,
+                            detail=f"Full-text search is not available on {dialect}")
+
+    return [
+        {
+            "pdf_id": row.pdf_id,
+            "pdf_name": row.pdf_name,
+            "ordinal": row.ordinal,
+            "page_start": row.page_start,
+            "page_end": row.page_end,
+            "rank": float(row.rank),
+            "snippet": row.snippet,
+        }
+        for row in rows
+    ]
@@ -1,7 +1,140 @@
+import asyncio
+import math
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
 import bcrypt
+from dotenv import load_dotenv
+from fastapi import HTTPException
+
+load_dotenv()
+
+# bcrypt runs on its own small pool so a burst of logins cannot take the
+# threads every other sync endpoint runs on; past PASSWORD_HASH_MAX_PENDING
+# waiting or running hashes new ones are turned away with a 429
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", "2"))
+PASSWORD_HASH_MAX_PENDING = int(os.getenv("PASSWORD_HASH_MAX_PENDING", "32"))
+# a fixed cost skips the startup calibration, which otherwise picks the
+# highest cost whose hash still fits in BCRYPT_TARGET_MS on this machine
+BCRYPT_ROUNDS = os.getenv("BCRYPT_ROUNDS")
+BCRYPT_TARGET_MS = float(os.getenv("BCRYPT_TARGET_MS", "250"))
+BCRYPT_MIN_ROUNDS = int(os.getenv("BCRYPT_MIN_ROUNDS", "10"))
+BCRYPT_MAX_ROUNDS = int(os.getenv("BCRYPT_MAX_ROUNDS", "15"))
+
+bcrypt_rounds = int(BCRYPT_ROUNDS) if BCRYPT_ROUNDS else 12
+
 
 def hash_password(password: str) -> str:
-    return bcrypt.hashpw(password.encode(), bcrypt.gensalt()).decode()
+    return bcrypt.hashpw(password.encode(), bcrypt.gensalt(rounds=bcrypt_rounds)).decode()
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return bcrypt.checkpw(plain_password.encode(), hashed_password.encode())
+
+def hash_rounds(hashed_password: str) -> int:
+    # "$2b$12$<salt and hash>"
+    return int(hashed_password.split("$")[2])
+
+def needs_rehash(hashed_password: str) -> bool:
+    # only ever upgraded, a slower machine calibrating lower does not weaken
+    # hashes made elsewhere
+    return hash_rounds(hashed_password) < bcrypt_rounds
+
+
+def calibrate_bcrypt_rounds() -> int:
+    # each extra round doubles the work, so one timing at the minimum cost
+    # is enough to extrapolate
+    password = b"calibration"
+    started = time.perf_counter()
+    bcrypt.hashpw(password, bcrypt.gensalt(rounds=BCRYPT_MIN_ROUNDS))
+    elapsed_ms = max((time.perf_counter() - started) * 1000, 0.001)
+
+    extra_rounds = math.floor(math.log2(BCRYPT_TARGET_MS / elapsed_ms)) if elapsed_ms < BCRYPT_TARGET_MS else 0
+    return max(BCRYPT_MIN_ROUNDS, min(BCRYPT_MAX_ROUNDS, BCRYPT_MIN_ROUNDS + extra_rounds))
+
+
+class PasswordHasher:
+
+    def __init__(self, workers: int = PASSWORD_HASH_WORKERS, max_pending: int = PASSWORD_HASH_MAX_PENDING):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.executor = None
+        # only touched from the event loop
+        self.pending = 0
+        self.completed = 0
+        self.rejected = 0
+        self.rehashed = 0
+        self.rehash_skipped = 0
+        self.total_wait_ms = 0.0
+        self.total_run_ms = 0.0
+
+    async def start(self):
+        global bcrypt_rounds
+        self.executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="password-hash")
+        if not BCRYPT_ROUNDS:
+            bcrypt_rounds = await asyncio.get_running_loop().run_in_executor(self.executor, calibrate_bcrypt_rounds)
+
+    def stop(self):
+        if self.executor:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+
+    async def _run(self, fn, *args):
+        if self.pending >= self.max_pending:
+            self.rejected += 1
+            raise HTTPException(status_code=429, detail="Too many logins right now, try again shortly",
+                                headers={"Retry-After": "1"})
+
+        submitted = time.perf_counter()
+        timings = {}
+
+        def timed():
+            timings["started"] = time.perf_counter()
+            return fn(*args)
+
+        self.pending += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self.executor, timed)
+        finally:
+            self.pending -= 1
+            finished = time.perf_counter()
+            if "started" in timings:
+                self.completed += 1
+                self.total_wait_ms += (timings["started"] - submitted) * 1000
+                self.total_run_ms += (finished - timings["started"]) * 1000
+
+    async def hash(self, password: str) -> str:
+        return await self._run(hash_password, password)
+
+    async def rehash(self, password: str) -> str | None:
+        # the opportunistic rehash at login must not fail a login that was
+        # already verified; when the hasher is full it is skipped and tried
+        # again on a later login
+        try:
+            new_hash = await self.hash(password)
+        except HTTPException:
+            self.rehash_skipped += 1
+            return None
+        self.rehashed += 1
+        return new_hash
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return await self._run(verify_password, plain_password, hashed_password)
+
+    def stats(self) -> dict:
+        return {
+            "bcrypt_rounds": bcrypt_rounds,
+            "workers": self.workers,
+            "max_pending": self.max_pending,
+            "pending": self.pending,
+            "running": min(self.pending, self.workers),
+            "queued": max(self.pending - self.workers, 0),
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "rehashed": self.rehashed,
+            "rehash_skipped": self.rehash_skipped,
+            "mean_wait_ms": self.total_wait_ms / self.completed if self.completed else 0.0,
+            "mean_run_ms": self.total_run_ms / self.completed if self.completed else 0.0,
+        }
+
+
+password_hasher = PasswordHasher()
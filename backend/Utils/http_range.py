@@ -0,0 +1,74 @@
+import hashlib
+import json
+import re
+from urllib.parse import quote
+
+from fastapi import HTTPException, status
+
+STREAM_CHUNK_SIZE = 64 * 1024
+
+
+def parse_range_header(range_header: str | None, size: int) -> tuple[int, int] | None:
+    # only single byte ranges are honoured, anything else falls back to the
+    # full body which RFC 9110 allows
+    if not range_header or not range_header.startswith("bytes=") or "," in range_header:
+        return None
+
+    # a range that is not well formed, bytes=5-3 included, is ignored like an
+    # unknown unit; only a well formed one that misses the file gets a 416
+    match = re.fullmatch(r"(\d*)-(\d*)", range_header[len("bytes="):].strip())
+    if not match or match.groups() == ("", ""):
+        return None
+    start_text, end_text = match.groups()
+    if start_text:
+        start = int(start_text)
+        end = int(end_text) if end_text else size - 1
+        if end_text and end < start:
+            return None
+    else:
+        suffix = int(end_text)
+        start = max(size - suffix, 0) if suffix else size
+        end = size - 1
+
+    if start >= size:
+        raise HTTPException(
+            status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+            detail="Requested range not satisfiable",
+            headers={"Content-Range": f"bytes */{size}"},
+        )
+    return start, min(end, size - 1)
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    # If-None-Match uses the weak comparison, W/"x" and "x" match each other
+    if not if_none_match:
+        return False
+    candidates = [candidate.strip().removeprefix("W/") for candidate in if_none_match.split(",")]
+    return "*" in candidates or etag.removeprefix("W/") in candidates
+
+
+def weak_etag(*parts) -> str:
+    raw = json.dumps(parts, default=str, separators=(",", ":")).encode()
+    return f'W/"{hashlib.sha256(raw).hexdigest()[:32]}"'
+
+
+def content_disposition(disposition: str, filename: str) -> str:
+    # filename= for old clients, ascii only and without quotes, backslashes
+    # or line breaks that would end the header; filename*= carries the real
+    # name percent-encoded as RFC 5987 asks
+    fallback = re.sub(r'[^\x20-\x7e]|["\\]', "_", filename)
+    return f"{disposition}; filename=\"{fallback}\"; filename*=UTF-8''{quote(filename, safe='')}"
+
+
+def iter_file_range(fileobj, start: int, end: int):
+    try:
+        fileobj.seek(start)
+        remaining = end - start + 1
+        while remaining > 0:
+            chunk = fileobj.read(min(STREAM_CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+    finally:
+        fileobj.close()
@@ -0,0 +1,233 @@
+import os
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from dotenv import load_dotenv
+from pypdf import PdfReader
+from sqlalchemy import insert, update
+
+from Database.connection import SessionLocal
+from Models.Pdf_ingest_job import PdfIngestJob, utcnow
+from Models.Pdfinventory import Pdfinventory
+from Models.Pdf_chunk import PdfChunk
+from Utils.blob_store import get_blob_store
+from Utils.bm25_index import Bm25IndexBuilder
+from Utils.chunker import chunk_pages
+from Utils.text_extractor import iter_pages, iter_pdf_file_pages, shutdown_extraction_pool
+from Utils.vector_index import embed_texts, stack_vectors
+
+load_dotenv()
+
+INGEST_CONCURRENCY = int(os.getenv("INGEST_CONCURRENCY", "2"))
+INGEST_MAX_ATTEMPTS = int(os.getenv("INGEST_MAX_ATTEMPTS", "3"))
+INGEST_POLL_SECONDS = float(os.getenv("INGEST_POLL_SECONDS", "2"))
+# a running job whose heartbeat is older than this belongs to a worker that died
+INGEST_STALE_SECONDS = int(os.getenv("INGEST_STALE_SECONDS", "300"))
+PROGRESS_EVERY_PAGES = 10
+CHUNK_INSERT_BATCH = 200
+
+
+class IngestQueue:
+    # jobs live in the pdf_ingest_job table, this class only moves them along:
+    # a dispatcher thread claims queued rows and hands them to a bounded pool
+
+    def __init__(self, concurrency: int = INGEST_CONCURRENCY):
+        self.concurrency = concurrency
+        self.wakeup = threading.Event()
+        self.stopping = threading.Event()
+        self.slots = threading.Semaphore(concurrency)
+        self.executor = None
+        self.dispatcher = None
+
+    def start(self):
+        self.executor = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="pdf-ingest")
+        self.dispatcher = threading.Thread(target=self._dispatch_loop, name="pdf-ingest-dispatcher", daemon=True)
+        self.dispatcher.start()
+
+    def stop(self):
+        self.stopping.set()
+        self.wakeup.set()
+        if self.dispatcher:
+            self.dispatcher.join(timeout=5)
+        if self.executor:
+            # running jobs are left as "running" and requeued once their
+            # heartbeat goes stale
+            self.executor.shutdown(wait=False, cancel_futures=True)
+        shutdown_extraction_pool()
+
+    def notify(self):
+        self.wakeup.set()
+
+    def _dispatch_loop(self):
+        while not self.stopping.is_set():
+            try:
+                self._requeue_stale_jobs()
+                while not self.stopping.is_set() and self.slots.acquire(blocking=False):
+                    claim = self._claim_next_job()
+                    if claim is None:
+                        self.slots.release()
+                        break
+                    self.executor.submit(self._run_and_release, *claim)
+            except Exception:
+                traceback.print_exc()
+
+            self.wakeup.wait(INGEST_POLL_SECONDS)
+            self.wakeup.clear()
+
+    def _requeue_stale_jobs(self):
+        db = SessionLocal()
+        try:
+            stale = (
+                PdfIngestJob.status == "running",
+                PdfIngestJob.updated_at < utcnow() - timedelta(seconds=INGEST_STALE_SECONDS),
+            )
+            # a document that takes its worker down every time would otherwise
+            # be picked up again forever
+            db.execute(
+                update(PdfIngestJob)
+                .where(*stale, PdfIngestJob.attempts >= INGEST_MAX_ATTEMPTS)
+                .values(
+                    status="failed",
+                    error=f"worker stopped sending heartbeats for {INGEST_STALE_SECONDS}s",
+                    updated_at=utcnow(),
+                )
+            )
+            db.execute(update(PdfIngestJob).where(*stale).values(status="queued", updated_at=utcnow()))
+            db.commit()
+        finally:
+            db.close()
+
+    def _claim_next_job(self):
+        db = SessionLocal()
+        try:
+            while True:
+                job_id = (
+                    db.query(PdfIngestJob.job_id)
+                    .filter(PdfIngestJob.status == "queued")
+                    .order_by(PdfIngestJob.created_at, PdfIngestJob.job_id)
+                    .limit(1)
+                    .scalar()
+                )
+                if job_id is None:
+                    return None
+
+                # the conditional update makes the claim safe when several
+                # app processes share the table
+                attempts = db.execute(
+                    update(PdfIngestJob)
+                    .where(PdfIngestJob.job_id == job_id, PdfIngestJob.status == "queued")
+                    .values(
+                        status="running",
+                        attempts=PdfIngestJob.attempts + 1,
+                        pages_done=0,
+                        updated_at=utcnow(),
+                    )
+                    .returning(PdfIngestJob.attempts)
+                ).scalar()
+                db.commit()
+                if attempts is not None:
+                    return job_id, attempts
+        finally:
+            db.close()
+
+    def _run_and_release(self, job_id: int, attempts: int):
+        try:
+            run_ingest_job(job_id, attempts)
+        finally:
+            self.slots.release()
+            self.wakeup.set()
+
+
+class JobSuperseded(Exception):
+    pass
+
+
+def commit_claimed(db, job_id: int, attempts: int, **values):
+    # a worker that stalled past INGEST_STALE_SECONDS may still be running
+    # after its job was requeued and claimed again. Each transaction of a run
+    # commits only while the row still carries the claim it started with, so
+    # the stale worker's chunks and results are rolled back instead of landing
+    # next to the new run's
+    claimed = db.execute(
+        update(PdfIngestJob)
+        .where(PdfIngestJob.job_id == job_id, PdfIngestJob.status == "running", PdfIngestJob.attempts == attempts)
+        .values(updated_at=utcnow(), **values)
+    ).rowcount
+    if not claimed:
+        db.rollback()
+        raise JobSuperseded(job_id)
+    db.commit()
+
+
+def index_pages(db, pdf_id: int, pages):
+    # pages stream through the chunker; every chunk is indexed as soon as it is
+    # emitted and written to pdf_chunk in batches, so the document text is
+    # never held in memory as a whole
+    bm25 = Bm25IndexBuilder()
+    vectors = []
+    batch = []
+    for chunk in chunk_pages(pages):
+        bm25.add(chunk["text"])
+        vectors.append(embed_texts([chunk["text"]]))
+        batch.append({"pdf_id": pdf_id, **chunk})
+        if len(batch) == CHUNK_INSERT_BATCH:
+            db.execute(insert(PdfChunk), batch)
+            batch = []
+    if batch:
+        db.execute(insert(PdfChunk), batch)
+    return bm25.build(), stack_vectors(vectors)
+
+
+def run_ingest_job(job_id: int, attempts: int):
+    db = SessionLocal()
+    try:
+        job = db.get(PdfIngestJob, job_id)
+        pdf = db.get(Pdfinventory, job.pdf_id)
+
+        try:
+            # a retried job starts over, drop whatever an earlier attempt wrote
+            db.query(PdfChunk).filter(PdfChunk.pdf_id == pdf.pdf_id).delete()
+            commit_claimed(db, job_id, attempts)
+
+            store = get_blob_store()
+            local_path = store.local_path(pdf.pdf_sha256)
+
+            def report_progress(page_number):
+                if page_number - job.pages_done >= PROGRESS_EVERY_PAGES or page_number == job.pages_total:
+                    commit_claimed(db, job_id, attempts, pages_done=page_number)
+
+            if local_path:
+                # large documents are sharded across the extraction process pool
+                reader = PdfReader(local_path)
+                commit_claimed(db, job_id, attempts, pages_total=len(reader.pages))
+                search_index, embeddings = index_pages(
+                    db, pdf.pdf_id, iter_pdf_file_pages(local_path, on_page=report_progress, reader=reader)
+                )
+            else:
+                with store.open(pdf.pdf_sha256) as blob:
+                    reader = PdfReader(blob)
+                    commit_claimed(db, job_id, attempts, pages_total=len(reader.pages))
+                    search_index, embeddings = index_pages(db, pdf.pdf_id, iter_pages(reader, on_page=report_progress))
+
+            pdf.pdf_chunked_text = None
+            pdf.pdf_search_index = search_index
+            pdf.pdf_embeddings = embeddings
+            pdf.pdf_page_count = job.pages_total
+            commit_claimed(db, job_id, attempts, status="done", error=None)
+        except JobSuperseded:
+            raise
+        except Exception as e:
+            db.rollback()
+            commit_claimed(db, job_id, attempts,
+                           status="queued" if attempts < INGEST_MAX_ATTEMPTS else "failed",
+                           error=f"{type(e).__name__}: {e}")
+    except JobSuperseded:
+        # the run holding the newer claim owns the job and its chunks now
+        pass
+    finally:
+        db.close()
+
+
+ingest_queue = IngestQueue()
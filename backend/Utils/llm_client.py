@@ -0,0 +1,212 @@
+import asyncio
+import os
+import random
+from contextlib import asynccontextmanager
+
+import anyio
+import httpx
+from dotenv import load_dotenv
+from fastapi import HTTPException
+from openai import (
+    APIConnectionError,
+    APITimeoutError,
+    AsyncOpenAI,
+    InternalServerError,
+    RateLimitError,
+)
+
+load_dotenv()
+
+CHAT_MODEL = os.getenv("CHAT_MODEL", "cognitivecomputations/dolphin-mistral-24b-venice-edition:free")
+
+LLM_CONNECT_TIMEOUT = float(os.getenv("LLM_CONNECT_TIMEOUT", "5"))
+LLM_READ_TIMEOUT = float(os.getenv("LLM_READ_TIMEOUT", "60"))
+LLM_MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", "64"))
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "32"))
+LLM_MAX_CONCURRENCY_PER_USER = int(os.getenv("LLM_MAX_CONCURRENCY_PER_USER", "2"))
+# how long a request waits for a free slot before it is turned away with a 429
+LLM_QUEUE_TIMEOUT = float(os.getenv("LLM_QUEUE_TIMEOUT", "10"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "3"))
+LLM_RETRY_BASE_SECONDS = float(os.getenv("LLM_RETRY_BASE_SECONDS", "0.5"))
+LLM_RETRY_MAX_SECONDS = float(os.getenv("LLM_RETRY_MAX_SECONDS", "8"))
+
+RETRYABLE_ERRORS = (APIConnectionError, APITimeoutError, RateLimitError, InternalServerError)
+
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+
+class LlmProvider:
+    # anything that speaks the OpenAI chat-completions API; the key is read
+    # when the client starts so it can come from .env
+
+    def __init__(self, name: str, base_url: str, api_key_env: str | None = None, api_key: str | None = None):
+        self.name = name
+        self.base_url = base_url
+        self.api_key_env = api_key_env
+        self.fixed_api_key = api_key
+
+    def api_key(self) -> str | None:
+        if self.fixed_api_key:
+            return self.fixed_api_key
+        load_dotenv()
+        return os.getenv(self.api_key_env) if self.api_key_env else None
+
+
+LLM_PROVIDERS = {
+    "openrouter": lambda: LlmProvider(
+        "OpenRouter",
+        os.getenv("OPENROUTER_BASE_URL", "https://openrouter.ai/api/v1"),
+        api_key_env="OPENROUTER_API_KEY",
+    ),
+    # Benchmarks/fake_llm_server.py, for load tests that must not reach a real provider
+    "fake": lambda: LlmProvider("Fake LLM", os.getenv("FAKE_LLM_URL", "http://127.0.0.1:8900/v1"), api_key="fake"),
+}
+
+
+def register_llm_provider(name: str, factory) -> None:
+    LLM_PROVIDERS[name] = factory
+
+
+def get_llm_provider() -> LlmProvider:
+    provider = os.getenv("LLM_PROVIDER", "openrouter")
+    if provider not in LLM_PROVIDERS:
+        raise RuntimeError(f"Unknown LLM provider: {provider}")
+    return LLM_PROVIDERS[provider]()
+
+
+def retry_delay(attempt: int, error: Exception) -> float:
+    # honour Retry-After from the provider, otherwise exponential backoff with
+    # full jitter so retries from many requests do not arrive in lockstep
+    response = getattr(error, "response", None)
+    retry_after = response.headers.get("retry-after") if response is not None else None
+    if retry_after:
+        try:
+            return min(float(retry_after), LLM_RETRY_MAX_SECONDS)
+        except ValueError:
+            pass
+    return random.uniform(0, min(LLM_RETRY_MAX_SECONDS, LLM_RETRY_BASE_SECONDS * 2 ** attempt))
+
+
+class LlmClient:
+    # one AsyncOpenAI client over one pooled http client for the whole app,
+    # opened and closed by the FastAPI lifespan
+
+    def __init__(self):
+        self.http_client: httpx.AsyncClient | None = None
+        self.client: AsyncOpenAI | None = None
+        self.provider: LlmProvider | None = None
+        self.api_key = None
+        self.global_slots = asyncio.Semaphore(LLM_MAX_CONCURRENCY)
+        self.user_slots: dict[str, list] = {}
+
+    async def start(self) -> None:
+        self.provider = get_llm_provider()
+        self.api_key = self.provider.api_key()
+        self.http_client = httpx.AsyncClient(
+            http2=HTTP2_AVAILABLE,
+            timeout=httpx.Timeout(LLM_READ_TIMEOUT, connect=LLM_CONNECT_TIMEOUT),
+            limits=httpx.Limits(
+                max_connections=LLM_MAX_CONNECTIONS,
+                max_keepalive_connections=LLM_MAX_CONNECTIONS,
+                keepalive_expiry=60,
+            ),
+        )
+        # retries are done here, with jitter and the slot held, not by the sdk
+        self.client = AsyncOpenAI(
+            api_key=self.api_key or "missing",
+            base_url=self.provider.base_url,
+            http_client=self.http_client,
+            max_retries=0,
+        )
+
+    async def close(self) -> None:
+        if self.client is not None:
+            await self.client.close()
+        self.client = None
+        self.http_client = None
+
+    def _require_client(self) -> AsyncOpenAI:
+        if self.client is None:
+            raise HTTPException(status_code=503, detail="Language model client is not running")
+        if not self.api_key:
+            raise HTTPException(status_code=500, detail=f"{self.provider.name} API key not configured")
+        return self.client
+
+    @asynccontextmanager
+    async def slot(self, user_id: int | None = None):
+        user_entry = None
+        if user_id is not None:
+            # [semaphore, holders]; dropped again once nobody holds or waits on it
+            user_entry = self.user_slots.setdefault(
+                user_id, [asyncio.Semaphore(LLM_MAX_CONCURRENCY_PER_USER), 0]
+            )
+            user_entry[1] += 1
+
+        acquired = []
+        try:
+            try:
+                async with asyncio.timeout(LLM_QUEUE_TIMEOUT):
+                    if user_entry is not None:
+                        await user_entry[0].acquire()
+                        acquired.append(user_entry[0])
+                    await self.global_slots.acquire()
+                    acquired.append(self.global_slots)
+            except TimeoutError:
+                raise HTTPException(status_code=429, detail="Too many questions in flight, try again shortly")
+            yield
+        finally:
+            for semaphore in acquired:
+                semaphore.release()
+            if user_entry is not None:
+                user_entry[1] -= 1
+                if not user_entry[1]:
+                    self.user_slots.pop(user_id, None)
+
+    async def complete(self, messages: list[dict], user_id: int | None = None, model: str = CHAT_MODEL) -> str:
+        client = self._require_client()
+        async with self.slot(user_id):
+            for attempt in range(LLM_MAX_RETRIES + 1):
+                try:
+                    completion = await client.chat.completions.create(
+                        extra_body={}, model=model, messages=messages
+                    )
+                    return completion.choices[0].message.content
+                except RETRYABLE_ERRORS as e:
+                    if attempt == LLM_MAX_RETRIES:
+                        if isinstance(e, APITimeoutError):
+                            raise HTTPException(status_code=504, detail="Language model timed out")
+                        raise HTTPException(status_code=502, detail="Language model is unavailable")
+                    await asyncio.sleep(retry_delay(attempt, e))
+
+    async def stream(self, messages: list[dict], user_id: int | None = None, model: str = CHAT_MODEL):
+        # yields content deltas; only opening the stream is retried, once a
+        # token has been relayed a failure is passed on to the caller
+        client = self._require_client()
+        async with self.slot(user_id):
+            for attempt in range(LLM_MAX_RETRIES + 1):
+                try:
+                    stream = await client.chat.completions.create(
+                        extra_body={}, model=model, messages=messages, stream=True
+                    )
+                    break
+                except RETRYABLE_ERRORS as e:
+                    if attempt == LLM_MAX_RETRIES:
+                        raise
+                    await asyncio.sleep(retry_delay(attempt, e))
+
+            try:
+                async for chunk in stream:
+                    if chunk.choices and chunk.choices[0].delta.content:
+                        yield chunk.choices[0].delta.content
+            finally:
+                # also runs when the consumer is cancelled on a client
+                # disconnect, closing the response aborts the upstream request
+                with anyio.CancelScope(shield=True):
+                    await stream.response.aclose()
+
+
+llm_client = LlmClient()
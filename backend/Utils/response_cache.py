@@ -0,0 +1,273 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from datetime import timedelta
+
+from dotenv import load_dotenv
+from fastapi import Response, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from sqlalchemy import and_, delete, func, select
+from sqlalchemy.exc import SQLAlchemyError
+
+from Database.connection import INSERT_BY_DIALECT, SessionLocal
+from Models.Pdf_ingest_job import utcnow
+from Models.Response_cache import ResponseCacheEntry, ResponseCacheTag
+from Utils.auth import Principal
+from Utils.http_range import etag_matches, weak_etag
+
+load_dotenv()
+
+# "memory" keeps the entries and the tag versions in this process, so a write
+# served by one worker leaves the other workers' entries in place until the
+# TTL runs out; "database" shares both between every worker
+RESPONSE_CACHE_BACKEND = os.getenv("RESPONSE_CACHE_BACKEND", "memory")
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", "2048"))
+RESPONSE_CACHE_TTL_SECONDS = int(os.getenv("RESPONSE_CACHE_TTL_SECONDS", "300"))
+
+# the responses are per user and carry an ETag, browsers revalidate every time
+# and get a 304 while nothing changed
+CACHE_HEADERS = {"Cache-Control": "private, no-cache", "Vary": "Authorization"}
+
+logger = logging.getLogger(__name__)
+
+# every class, the catalog pages depend on all of them
+CATALOG_TAG = "catalog"
+
+
+def professor_classes_tag(professor_id: int) -> str:
+    return f"professor:{professor_id}:classes"
+
+
+def class_content_tag(class_id: int) -> str:
+    return f"class:{class_id}:content"
+
+
+def profile_tag(role: str, user_id: int) -> str:
+    return f"{role}:{user_id}:profile"
+
+
+def response_cache_key(route: str, params: dict, principal: Principal | None) -> str:
+    caller = [principal.role, principal.user_id] if principal is not None else None
+    parts = [route, sorted(params.items()), caller]
+    return hashlib.sha256(json.dumps(parts, default=str).encode()).hexdigest()
+
+
+class ResponseCacheBackend(ABC):
+    # a tag's version only ever goes up, so the sum over an entry's tags
+    # changes exactly when one of them was invalidated; entries remember the
+    # sum from before their response was loaded
+
+    @abstractmethod
+    def lookup(self, key: str, tags: list[str]) -> tuple[int, tuple[str, str] | None]:
+        # the current generation for tags, and the (etag, body) stored under
+        # key if it is still of that generation
+        ...
+
+    @abstractmethod
+    def store(self, key: str, generation: int, etag: str, body: str) -> None:
+        ...
+
+    @abstractmethod
+    def bump(self, tags: list[str]) -> None:
+        ...
+
+    def stats(self) -> dict:
+        return {}
+
+
+class MemoryResponseBackend(ResponseCacheBackend):
+
+    name = "memory"
+
+    def __init__(self, max_entries: int = RESPONSE_CACHE_SIZE, ttl_seconds: int = RESPONSE_CACHE_TTL_SECONDS):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.entries: OrderedDict[str, tuple[float, int, str, str]] = OrderedDict()
+        self.versions: dict[str, int] = {}
+        self.lock = threading.Lock()
+
+    def lookup(self, key: str, tags: list[str]) -> tuple[int, tuple[str, str] | None]:
+        with self.lock:
+            generation = sum(self.versions.get(tag, 0) for tag in tags)
+            entry = self.entries.get(key)
+            if entry is None:
+                return generation, None
+            expires_at, entry_generation, etag, body = entry
+            if expires_at <= time.monotonic() or entry_generation != generation:
+                del self.entries[key]
+                return generation, None
+            self.entries.move_to_end(key)
+            return generation, (etag, body)
+
+    def store(self, key: str, generation: int, etag: str, body: str) -> None:
+        with self.lock:
+            self.entries[key] = (time.monotonic() + self.ttl_seconds, generation, etag, body)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def bump(self, tags: list[str]) -> None:
+        with self.lock:
+            for tag in tags:
+                self.versions[tag] = self.versions.get(tag, 0) + 1
+
+    def stats(self) -> dict:
+        with self.lock:
+            return {"entries": len(self.entries), "max_entries": self.max_entries}
+
+
+class DatabaseResponseBackend(ResponseCacheBackend):
+
+    name = "database"
+
+    def __init__(self, ttl_seconds: int = RESPONSE_CACHE_TTL_SECONDS):
+        self.ttl_seconds = ttl_seconds
+
+    def lookup(self, key: str, tags: list[str]) -> tuple[int, tuple[str, str] | None]:
+        # one round trip for hits and misses alike: the aggregate always
+        # returns a row, the entry is joined to it when there is one
+        current = select(
+            func.coalesce(func.sum(ResponseCacheTag.version), 0).label("generation")
+        ).filter(ResponseCacheTag.tag.in_(tags)).subquery()
+        with SessionLocal() as db:
+            generation, entry_generation, etag, body = db.execute(
+                select(current.c.generation, ResponseCacheEntry.generation, ResponseCacheEntry.etag,
+                       ResponseCacheEntry.body)
+                .select_from(current)
+                .outerjoin(ResponseCacheEntry, and_(
+                    ResponseCacheEntry.cache_key == key,
+                    ResponseCacheEntry.expires_at > utcnow()
+                ))
+            ).one()
+        if body is None or entry_generation != generation:
+            return generation, None
+        return generation, (etag, body)
+
+    def store(self, key: str, generation: int, etag: str, body: str) -> None:
+        with SessionLocal() as db:
+            insert = INSERT_BY_DIALECT[db.get_bind().dialect.name]
+            statement = insert(ResponseCacheEntry).values(
+                cache_key=key,
+                generation=generation,
+                etag=etag,
+                body=body,
+                created_at=utcnow(),
+                expires_at=utcnow() + timedelta(seconds=self.ttl_seconds),
+            )
+            db.execute(statement.on_conflict_do_update(
+                index_elements=["cache_key"],
+                set_={column: statement.excluded[column]
+                      for column in ("generation", "etag", "body", "created_at", "expires_at")},
+            ))
+            db.commit()
+
+    def bump(self, tags: list[str]) -> None:
+        with SessionLocal() as db:
+            insert = INSERT_BY_DIALECT[db.get_bind().dialect.name]
+            db.execute(
+                insert(ResponseCacheTag)
+                .values([{"tag": tag, "version": 1} for tag in tags])
+                .on_conflict_do_update(index_elements=["tag"], set_={"version": ResponseCacheTag.version + 1})
+            )
+            # writes are rare next to reads, a good moment to drop what expired
+            db.execute(delete(ResponseCacheEntry).filter(ResponseCacheEntry.expires_at <= utcnow()))
+            db.commit()
+
+
+RESPONSE_CACHE_BACKENDS = {
+    "memory": MemoryResponseBackend,
+    "database": DatabaseResponseBackend,
+}
+
+
+class ResponseCache:
+
+    def __init__(self, backend: ResponseCacheBackend):
+        self.backend = backend
+        self.lock = threading.Lock()
+        self.counters = {"hits": 0, "misses": 0, "not_modified": 0, "stores": 0, "invalidations": 0, "errors": 0}
+        self.routes: dict[str, dict[str, int]] = {}
+
+    def count(self, counter: str, route: str | None = None) -> None:
+        with self.lock:
+            self.counters[counter] += 1
+            if route is not None:
+                counters = self.routes.setdefault(route, {"hits": 0, "misses": 0})
+                counters[counter] += 1
+
+    def respond(self, route: str, params: dict, tags: list[str], principal: Principal | None,
+                if_none_match: str | None, load) -> Response:
+        # load is only called on a miss and returns what the endpoint would
+        # have returned; principal is None for responses that are the same
+        # for every caller
+        key = response_cache_key(route, params, principal)
+        tags = sorted(set(tags))
+
+        # the backend is best effort: a failing cache must never fail the
+        # request, errors are counted and the response is loaded as usual
+        try:
+            generation, cached = self.backend.lookup(key, tags)
+        except SQLAlchemyError:
+            logger.warning("response cache lookup failed for %s", route, exc_info=True)
+            self.count("errors")
+            generation, cached = None, None
+
+        if cached is not None:
+            self.count("hits", route)
+            etag, body = cached
+        else:
+            self.count("misses", route)
+            body = JSONResponse(jsonable_encoder(load())).body.decode()
+            etag = weak_etag(body)
+            if generation is not None:
+                try:
+                    self.backend.store(key, generation, etag, body)
+                    self.count("stores")
+                except SQLAlchemyError:
+                    logger.warning("response cache store failed for %s", route, exc_info=True)
+                    self.count("errors")
+
+        headers = {**CACHE_HEADERS, "ETag": etag, "X-Cache": "HIT" if cached is not None else "MISS"}
+        if etag_matches(if_none_match, etag):
+            self.count("not_modified")
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        return Response(content=body, media_type="application/json", headers=headers)
+
+    def invalidate(self, *tags: str) -> None:
+        # called once the write has committed, so a response loaded from
+        # before the write was stored under the old generation and is
+        # never served again
+        try:
+            self.backend.bump(sorted(set(tags)))
+            self.count("invalidations")
+        except SQLAlchemyError:
+            logger.warning("response cache invalidation failed for %s", tags, exc_info=True)
+            self.count("errors")
+
+    def stats(self) -> dict:
+        with self.lock:
+            counters = dict(self.counters)
+            routes = {route: dict(route_counters) for route, route_counters in self.routes.items()}
+        lookups = counters["hits"] + counters["misses"]
+        for route_counters in routes.values():
+            route_lookups = route_counters["hits"] + route_counters["misses"]
+            route_counters["hit_rate"] = route_counters["hits"] / route_lookups if route_lookups else 0.0
+        return {
+            **counters,
+            "hit_rate": counters["hits"] / lookups if lookups else 0.0,
+            "backend": self.backend.name,
+            **self.backend.stats(),
+            "ttl_seconds": self.backend.ttl_seconds,
+            "routes": routes,
+        }
+
+
+if RESPONSE_CACHE_BACKEND not in RESPONSE_CACHE_BACKENDS:
+    raise RuntimeError(f"Unknown response cache backend: {RESPONSE_CACHE_BACKEND}")
+response_cache = ResponseCache(RESPONSE_CACHE_BACKENDS[RESPONSE_CACHE_BACKEND]())
@@ -0,0 +1,100 @@
+import asyncio
+import os
+from typing import Callable, Iterable
+
+from dotenv import load_dotenv
+
+from Utils.chunker import chunk_label, chunk_pages
+from Utils.llm_client import LLM_MAX_CONCURRENCY_PER_USER, llm_client
+
+load_dotenv()
+
+# a section is sized to fit comfortably in the model's context together with
+# the prompt and the answer
+SUMMARY_SECTION_TOKENS = int(os.getenv("SUMMARY_SECTION_TOKENS", "2500"))
+# how many partial summaries one reduce call merges
+SUMMARY_REDUCE_FANIN = int(os.getenv("SUMMARY_REDUCE_FANIN", "6"))
+# model calls in flight for one document, the llm client's global limit
+# still applies across documents
+SUMMARY_CONCURRENCY = int(os.getenv("SUMMARY_CONCURRENCY", "4"))
+
+SUMMARY_SEPARATOR = "\n\n---\n\n"
+# stored summaries are keyed on this, bump it whenever the prompts or the way
+# sections are built change so old summaries are recomputed
+SUMMARY_PROMPT_VERSION = "1"
+
+MAP_PROMPT = (
+    "You summarize one section of a longer PDF. Keep the key facts, definitions and arguments, "
+    "and say which pages they come from."
+)
+REDUCE_PROMPT = (
+    "You merge summaries of consecutive parts of one PDF into a single coherent summary. "
+    "Remove repetition, keep the structure of the document and the page references."
+)
+
+
+def split_sections(pages: Iterable[tuple[int, str]]) -> list[dict]:
+    return list(chunk_pages(pages, chunk_tokens=SUMMARY_SECTION_TOKENS, overlap_tokens=0))
+
+
+async def summarize_sections(sections: list[dict], on_progress: Callable[[dict], None] | None = None,
+                             user_id: int | None = None) -> str:
+    # map every section to a summary, then merge SUMMARY_REDUCE_FANIN summaries
+    # at a time until one is left. calls of one level run concurrently, so the
+    # wall time grows with the number of levels rather than with the page count.
+    # user_id puts the calls under that user's share of the llm client; more
+    # calls than that share would only wait in its queue and could time out
+    concurrency = SUMMARY_CONCURRENCY
+    if user_id is not None:
+        concurrency = min(concurrency, LLM_MAX_CONCURRENCY_PER_USER)
+    slots = asyncio.Semaphore(concurrency)
+
+    def report(event: dict):
+        if on_progress:
+            on_progress(event)
+
+    async def summarize(system_prompt: str, text: str) -> str:
+        async with slots:
+            return await llm_client.complete([
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": text},
+            ], user_id=user_id)
+
+    async def run_level(stage: str, level: int, system_prompt: str, texts: list[str]) -> list[str]:
+        results = [None] * len(texts)
+        done = 0
+
+        async def run(index: int, text: str):
+            nonlocal done
+            results[index] = await summarize(system_prompt, text)
+            done += 1
+            report({"stage": stage, "level": level, "done": done, "total": len(texts)})
+
+        report({"stage": stage, "level": level, "done": 0, "total": len(texts)})
+        try:
+            async with asyncio.TaskGroup() as group:
+                for index, text in enumerate(texts):
+                    group.create_task(run(index, text))
+        except ExceptionGroup as failures:
+            # the group cancels the other calls after the first failure, so
+            # that one is the error; callers catch it as a plain exception
+            raise failures.exceptions[0] from None
+        return results
+
+    summaries = await run_level(
+        "map", 0, MAP_PROMPT,
+        [f"[{chunk_label(section)}]\n{section['text']}" for section in sections],
+    )
+
+    level = 0
+    while len(summaries) > 1:
+        level += 1
+        groups = [summaries[i:i + SUMMARY_REDUCE_FANIN] for i in range(0, len(summaries), SUMMARY_REDUCE_FANIN)]
+        merged = iter(await run_level(
+            "reduce", level, REDUCE_PROMPT,
+            [SUMMARY_SEPARATOR.join(group) for group in groups if len(group) > 1],
+        ))
+        # a group left with a single summary has nothing to merge and moves up as is
+        summaries = [next(merged) if len(group) > 1 else group[0] for group in groups]
+
+    return summaries[0]
@@ -0,0 +1,58 @@
+from pypdf import PdfReader
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, undefer
+
+from Models.Pdf_extracted_text import PdfExtractedText
+from Models.Pdf_summary import PdfSummary
+from Utils.blob_store import get_blob_store
+from Utils.llm_client import CHAT_MODEL
+from Utils.summarizer import SUMMARY_PROMPT_VERSION
+from Utils.text_extractor import extract_pages, extract_pdf_file
+
+
+def load_summary(db: Session, pdf_sha256: str, model: str = CHAT_MODEL) -> PdfSummary | None:
+    return db.query(PdfSummary).filter(
+        PdfSummary.pdf_sha256 == pdf_sha256,
+        PdfSummary.model == model,
+        PdfSummary.prompt_version == SUMMARY_PROMPT_VERSION,
+    ).first()
+
+
+def store_summary(db: Session, pdf_sha256: str, summary: str, section_count: int, model: str = CHAT_MODEL) -> None:
+    db.add(PdfSummary(
+        pdf_sha256=pdf_sha256,
+        model=model,
+        prompt_version=SUMMARY_PROMPT_VERSION,
+        summary=summary,
+        section_count=section_count,
+    ))
+    try:
+        db.commit()
+    except IntegrityError:
+        # a concurrent upload of the same file stored its summary first
+        db.rollback()
+
+
+def load_or_extract_pages(db: Session, pdf_sha256: str) -> list[dict]:
+    # the blob has to be in the blob store already; the extracted text is kept
+    # so a new model or prompt version only pays for the model calls
+    stored = db.get(PdfExtractedText, pdf_sha256, options=[undefer(PdfExtractedText.pages)])
+    if stored:
+        return stored.pages
+
+    store = get_blob_store()
+    local_path = store.local_path(pdf_sha256)
+    if local_path:
+        reader = PdfReader(local_path)
+        pages = extract_pdf_file(local_path, reader=reader)
+    else:
+        with store.open(pdf_sha256) as blob:
+            reader = PdfReader(blob)
+            pages = extract_pages(reader)
+
+    db.add(PdfExtractedText(pdf_sha256=pdf_sha256, page_count=len(reader.pages), pages=pages))
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+    return pages
@@ -1,22 +1,121 @@
-from fastapi import File,UploadFile,HTTPException,status
+import math
+import multiprocessing
+import os
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from dotenv import load_dotenv
 from pypdf import PdfReader
-def textextractor(file:UploadFile=File(...)):
-    if not file.filename.endswith("pdf"):
-        raise HTTPException(status_code=status.HTTP_406_NOT_ACCEPTABLE,detail="pls upload a pdf")
-    
-    
+
+load_dotenv()
+
+# documents shorter than this are extracted inline, below it the cost of
+# re-parsing the file in every worker is larger than what the cores win back
+PARALLEL_EXTRACTION_MIN_PAGES = int(os.getenv("PARALLEL_EXTRACTION_MIN_PAGES", "48"))
+EXTRACTION_PROCESSES = int(os.getenv("EXTRACTION_PROCESSES", str(os.cpu_count() or 1)))
+SHARDS_PER_PROCESS = 4
+# caps how much extracted text a single shard, and so the parent, holds at once
+MAX_SHARD_PAGES = 64
+
+_extraction_pool = None
+_extraction_pool_lock = threading.Lock()
+
+
+def extract_pages(reader:PdfReader,on_page=None):
     pdf_content=[]
-    
-    reader=PdfReader(file.file)
-    
+
     for page_number, page  in enumerate(reader.pages,start=1):
         text=page.extract_text()
-        
+
         if text:
             pdf_content.append({
                 "page":page_number,
                 "page_content":text
             })
-            
+        if on_page:
+            on_page(page_number)
+
     return pdf_content
-    
\ No newline at end of file
+
+
+def iter_pages(reader:PdfReader,on_page=None):
+    for page_number, page in enumerate(reader.pages,start=1):
+        text=page.extract_text() or ""
+        if on_page:
+            on_page(page_number)
+        yield page_number,text
+
+
+def _extract_page_range(path:str,first_page:int,last_page:int):
+    reader=PdfReader(path)
+    return [
+        (page_number,reader.pages[page_number-1].extract_text() or "")
+        for page_number in range(first_page,last_page+1)
+    ]
+
+
+def get_extraction_pool():
+    global _extraction_pool
+    with _extraction_pool_lock:
+        if _extraction_pool is None:
+            # spawn instead of fork, the ingest workers run on threads
+            _extraction_pool = ProcessPoolExecutor(
+                max_workers=EXTRACTION_PROCESSES,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _extraction_pool
+
+
+def shutdown_extraction_pool():
+    global _extraction_pool
+    with _extraction_pool_lock:
+        if _extraction_pool is not None:
+            _extraction_pool.shutdown(wait=False, cancel_futures=True)
+            _extraction_pool = None
+
+
+def page_ranges(page_count:int,shard_count:int):
+    shard_size=min(math.ceil(page_count/shard_count),MAX_SHARD_PAGES)
+    return [
+        (first_page,min(first_page+shard_size-1,page_count))
+        for first_page in range(1,page_count+1,shard_size)
+    ]
+
+
+def iter_pdf_file_pages(path:str,on_page=None,parallel:bool|None=None,reader:PdfReader|None=None):
+    # yields (page_number, text) in page order, from a process pool when the
+    # document is large enough to be worth sharding
+    reader=reader or PdfReader(path)
+    page_count=len(reader.pages)
+
+    if parallel is None:
+        parallel=EXTRACTION_PROCESSES>1 and page_count>=PARALLEL_EXTRACTION_MIN_PAGES
+    if not parallel:
+        yield from iter_pages(reader,on_page)
+        return
+
+    pool=get_extraction_pool()
+    shards=deque(page_ranges(page_count,EXTRACTION_PROCESSES*SHARDS_PER_PROCESS))
+    in_flight=deque()
+    max_in_flight=EXTRACTION_PROCESSES*2
+
+    while shards or in_flight:
+        while shards and len(in_flight)<max_in_flight:
+            first_page,last_page=shards.popleft()
+            in_flight.append((last_page,pool.submit(_extract_page_range,path,first_page,last_page)))
+
+        # waiting on the oldest shard keeps the output in page order
+        last_page,future=in_flight.popleft()
+        pages=future.result()
+        if on_page:
+            on_page(last_page)
+        yield from pages
+
+
+def extract_pdf_file(path:str,on_page=None,parallel:bool|None=None,reader:PdfReader|None=None):
+    return [
+        {"page":page_number,"page_content":text}
+        for page_number,text in iter_pdf_file_pages(path,on_page,parallel,reader)
+        if text
+    ]
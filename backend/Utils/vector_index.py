@@ -0,0 +1,68 @@
+import hashlib
+
+import numpy as np
+
+from Utils.bm25_index import tokenize
+
+# chunks are embedded with signed feature hashing of unigrams and bigrams, so
+# no model download or external service is needed and vectors from different
+# uploads live in the same space. fewer dimensions let the hundreds of
+# features of a chunk collide so often that a question's few terms drown in
+# the noise; rows are stored as float16 to keep the blob small
+EMBEDDING_DIM = 4096
+STORED_DTYPE = np.float16
+
+
+def _hashed_features(text: str) -> dict[int, float]:
+    terms = tokenize(text)
+    features: dict[int, float] = {}
+    for feature in terms + [f"{a} {b}" for a, b in zip(terms, terms[1:])]:
+        digest = hashlib.blake2b(feature.encode(), digest_size=8).digest()
+        value = int.from_bytes(digest, "little")
+        bucket = value % EMBEDDING_DIM
+        sign = 1.0 if (value >> 63) & 1 else -1.0
+        features[bucket] = features.get(bucket, 0.0) + sign
+    return features
+
+
+def embed_texts(texts: list[str]) -> np.ndarray:
+    matrix = np.zeros((len(texts), EMBEDDING_DIM), dtype=np.float32)
+    for row, text in enumerate(texts):
+        for bucket, count in _hashed_features(text).items():
+            # features of opposite sign can cancel out, log(0) would make the
+            # whole row NaN once it is normalized
+            if count:
+                matrix[row, bucket] = np.sign(count) * (1.0 + np.log(abs(count)))
+
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    matrix /= norms
+    return np.ascontiguousarray(matrix, dtype=np.float32)
+
+
+def build_vector_index(chunks: list[dict]) -> bytes:
+    return stack_vectors([embed_texts([chunk["text"] for chunk in chunks])])
+
+
+def stack_vectors(rows: list[np.ndarray]) -> bytes:
+    if not rows:
+        return b""
+    return np.ascontiguousarray(np.vstack(rows), dtype=STORED_DTYPE).tobytes()
+
+
+def load_vector_index(blob: bytes) -> np.ndarray:
+    return np.frombuffer(blob, dtype=STORED_DTYPE).reshape(-1, EMBEDDING_DIM).astype(np.float32)
+
+
+def search_vector_index(blob: bytes, query: str, top_k: int = 5) -> list[tuple[int, float]]:
+    matrix = load_vector_index(blob)
+    if matrix.shape[0] == 0:
+        return []
+
+    # rows are unit length so one matrix-vector product gives every cosine similarity
+    scores = matrix @ embed_texts([query])[0]
+    top_k = min(top_k, scores.shape[0])
+    best = np.argpartition(-scores, top_k - 1)[:top_k]
+    best = best[np.argsort(-scores[best])]
+
+    return [(int(row), float(scores[row])) for row in best]
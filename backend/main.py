@@ -6,26 +6,57 @@ from Routes import Classes_content_route
 from Routes import classes_route
 from Routes import Student_route
 from fastapi import FastAPI
-from Database.connection import engine, Base
+from Database.connection import engine
 from fastapi.middleware.cors import CORSMiddleware
 from Models import Enrolled_classes
 from Models import Pdfinventory
 from Routes import PDF_route
+from Routes import database_route
+from Models import Pdf_ingest_job
+from Models import Pdf_chunk
+from Models import Pdf_answer_cache
+from Models import Pdf_extracted_text
+from Models import Pdf_summary
+from Models import Pdf_chat_session
+from Models import Pdf_chat_message
+from Models import Response_cache
+from Utils.ingest_queue import ingest_queue
+from Utils.llm_client import llm_client
+from Utils.hash_password import password_hasher
+from Utils.db_metrics import DbMetricsMiddleware
+from contextlib import asynccontextmanager
 
-# Create database tables
-Base.metadata.create_all(bind=engine)
+# the schema is managed by the migrations in migrations/, run
+# `alembic upgrade head` before starting the app
 
-app=FastAPI()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    ingest_queue.start()
+    await llm_client.start()
+    await password_hasher.start()
+    yield
+    password_hasher.stop()
+    await llm_client.close()
+    ingest_queue.stop()
+    engine.dispose()
+
+
+app=FastAPI(lifespan=lifespan)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],  # restreins en prod
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # pdf.js only fetches the viewer's pages as ranges when it can read these two
+    expose_headers=["X-DB-Query-Count", "X-DB-Time-Ms", "Server-Timing", "ETag", "X-Cache", "Accept-Ranges", "Content-Range"],
 )
+app.add_middleware(DbMetricsMiddleware)
 app.include_router(professor_route.router)
 app.include_router(classes_route.router)
 app.include_router(Classes_content_route.router)
 app.include_router(Student_route.router)
 app.include_router(PDF_route.router)
+app.include_router(database_route.router)
 
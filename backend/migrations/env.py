@@ -0,0 +1,60 @@
+from logging.config import fileConfig
+
+from alembic import context
+
+from Database.connection import Base, engine
+# every model has to be imported for its table to be in Base.metadata
+from Models import (  # noqa: F401
+    Classes, Classroom_Content, Enrolled_classes, Pdf_answer_cache, Pdf_chat_message, Pdf_chat_session,
+    Pdf_chunk, Pdf_extracted_text, Pdf_ingest_job, Pdf_summary, Pdfinventory, Proffessor, Response_cache, Students,
+)
+
+config = context.config
+
+if config.config_file_name is not None:
+    fileConfig(config.config_file_name, disable_existing_loggers=False)
+
+target_metadata = Base.metadata
+
+
+# the full-text objects are created by the migrations with raw DDL and are
+# not on the models, autogenerate should not try to drop them
+FULLTEXT_OBJECTS = {"search_vector", "ix_pdf_chunk_search_vector"}
+
+
+def include_object(object, name, type_, reflected, compare_to):
+    if type_ == "table" and name.startswith("pdf_chunk_fts"):
+        return False
+    return not (reflected and compare_to is None and name in FULLTEXT_OBJECTS)
+
+
+def run_migrations_offline() -> None:
+    context.configure(
+        url=engine.url.render_as_string(hide_password=False),
+        target_metadata=target_metadata,
+        literal_binds=True,
+        include_object=include_object,
+    )
+
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online() -> None:
+    # the app's sync engine, so migrations use the same DATABASE_URL and driver
+    with engine.connect() as connection:
+        context.configure(
+            connection=connection,
+            target_metadata=target_metadata,
+            include_object=include_object,
+            render_as_batch=connection.dialect.name == "sqlite",
+        )
+
+        with context.begin_transaction():
+            context.run_migrations()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
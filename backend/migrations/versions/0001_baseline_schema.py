@@ -0,0 +1,122 @@
+"""baseline schema
+
+The six tables of the app before any of the PDF work. Deployments created
+them with main.py's create_all, possibly in a later shape (see 0002); a
+table that already exists is left as it is, so such a database upgrades
+with a plain
+
+    alembic upgrade head
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0001'
+down_revision: Union[str, Sequence[str], None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    existing = set(sa.inspect(op.get_bind()).get_table_names())
+
+    if 'professor' not in existing:
+        op.create_table('professor',
+        sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('first_name', sa.String(), nullable=False),
+        sa.Column('last_name', sa.String(), nullable=False),
+        sa.Column('phone_number', sa.Numeric(), nullable=False),
+        sa.Column('email', sa.String(), nullable=False),
+        sa.Column('password', sa.String(), nullable=False),
+        sa.Column('country', sa.String(), nullable=False),
+        sa.Column('educational_field', sa.String(), nullable=False),
+        sa.Column('description', sa.String(), nullable=False),
+        sa.Column('joined_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('profile_picture', sa.String(), nullable=False),
+        sa.PrimaryKeyConstraint('id')
+        )
+        op.create_index(op.f('ix_professor_id'), 'professor', ['id'], unique=False)
+    if 'student' not in existing:
+        op.create_table('student',
+        sa.Column('student_id', sa.Integer(), nullable=False),
+        sa.Column('first_name', sa.String(), nullable=False),
+        sa.Column('last_name', sa.String(), nullable=False),
+        sa.Column('email', sa.String(), nullable=False),
+        sa.Column('password', sa.String(), nullable=False),
+        sa.Column('phone_number', sa.String(), nullable=False),
+        sa.Column('academic_level', sa.String(), nullable=False),
+        sa.Column('profile_image', sa.String(), nullable=False),
+        sa.Column('country', sa.String(), nullable=False),
+        sa.Column('descritpion', sa.String(), nullable=False),
+        sa.Column('joined_at', sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint('student_id')
+        )
+        op.create_index(op.f('ix_student_student_id'), 'student', ['student_id'], unique=False)
+    if 'classes' not in existing:
+        op.create_table('classes',
+        sa.Column('class_id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('professor_id', sa.Integer(), nullable=False),
+        sa.Column('class_title', sa.String(), nullable=False),
+        sa.Column('class_capacity', sa.Integer(), nullable=True),
+        sa.Column('class_field', sa.String(), nullable=False),
+        sa.Column('description', sa.String(), nullable=False),
+        sa.Column('classroom_picture', sa.String(), nullable=False),
+        sa.Column('classroom_password', sa.String(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+        sa.ForeignKeyConstraint(['professor_id'], ['professor.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('class_id')
+        )
+        op.create_index(op.f('ix_classes_class_id'), 'classes', ['class_id'], unique=False)
+    if 'pdf_inventory' not in existing:
+        op.create_table('pdf_inventory',
+        sa.Column('pdf_id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('student_id', sa.Integer(), nullable=False),
+        sa.Column('pdf_name', sa.String(), nullable=False),
+        sa.Column('pdf_content', sa.LargeBinary(), nullable=False),
+        sa.Column('pdf_chunked_text', sa.JSON(), nullable=False),
+        sa.ForeignKeyConstraint(['student_id'], ['student.student_id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('pdf_id')
+        )
+    if 'classroom_content' not in existing:
+        op.create_table('classroom_content',
+        sa.Column('classroom_content_id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('classroom_id', sa.Integer(), nullable=False),
+        sa.Column('filename', sa.String(), nullable=False),
+        sa.Column('cloudinary_public_id', sa.String(), nullable=False),
+        sa.Column('description', sa.Text(), nullable=False),
+        sa.Column('uploaded_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+        sa.ForeignKeyConstraint(['classroom_id'], ['classes.class_id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('classroom_content_id')
+        )
+    if 'enrolled_courses' not in existing:
+        op.create_table('enrolled_courses',
+        sa.Column('enrolled_courses_id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('enrolled_student_id', sa.Integer(), nullable=False),
+        sa.Column('enrolled_class_id', sa.Integer(), nullable=False),
+        sa.Column('joined_at', sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(['enrolled_class_id'], ['classes.class_id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['enrolled_student_id'], ['student.student_id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('enrolled_courses_id')
+        )
+        op.create_index(op.f('ix_enrolled_courses_enrolled_courses_id'), 'enrolled_courses', ['enrolled_courses_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_enrolled_courses_enrolled_courses_id'), table_name='enrolled_courses')
+    op.drop_table('enrolled_courses')
+    op.drop_table('classroom_content')
+    op.drop_table('pdf_inventory')
+    op.drop_index(op.f('ix_classes_class_id'), table_name='classes')
+    op.drop_table('classes')
+    op.drop_index(op.f('ix_student_student_id'), table_name='student')
+    op.drop_table('student')
+    op.drop_index(op.f('ix_professor_id'), table_name='professor')
+    op.drop_table('professor')
@@ -0,0 +1,197 @@
+"""pdf schema from before migrations
+
+The columns and tables the PDF features added while main.py still ran
+create_all, which creates missing tables but never alters an existing one.
+A database from that time can have any mix of them, so only what is missing
+is added; pdf_sha256 and pdf_size may also come from
+Scripts/migrate_pdf_blobs.py.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0002'
+down_revision: Union[str, Sequence[str], None] = '0001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# same full-text setup as the after_create hooks in Models/Pdf_chunk.py
+POSTGRES_FULLTEXT = (
+    "ALTER TABLE pdf_chunk ADD COLUMN search_vector tsvector "
+    "GENERATED ALWAYS AS (to_tsvector('english', text)) STORED",
+    "CREATE INDEX ix_pdf_chunk_search_vector ON pdf_chunk USING GIN (search_vector)",
+)
+SQLITE_FULLTEXT = (
+    "CREATE VIRTUAL TABLE pdf_chunk_fts USING fts5(text, content='pdf_chunk', content_rowid='chunk_id')",
+    "CREATE TRIGGER pdf_chunk_fts_insert AFTER INSERT ON pdf_chunk BEGIN "
+    "INSERT INTO pdf_chunk_fts(rowid, text) VALUES (new.chunk_id, new.text); END",
+    "CREATE TRIGGER pdf_chunk_fts_delete AFTER DELETE ON pdf_chunk BEGIN "
+    "INSERT INTO pdf_chunk_fts(pdf_chunk_fts, rowid, text) VALUES ('delete', old.chunk_id, old.text); END",
+    "CREATE TRIGGER pdf_chunk_fts_update AFTER UPDATE ON pdf_chunk BEGIN "
+    "INSERT INTO pdf_chunk_fts(pdf_chunk_fts, rowid, text) VALUES ('delete', old.chunk_id, old.text); "
+    "INSERT INTO pdf_chunk_fts(rowid, text) VALUES (new.chunk_id, new.text); END",
+)
+
+
+def pdf_inventory_columns() -> list[sa.Column]:
+    return [
+        sa.Column('pdf_sha256', sa.String(length=64), nullable=True),
+        sa.Column('pdf_size', sa.BigInteger(), nullable=True),
+        sa.Column('pdf_page_count', sa.Integer(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+        sa.Column('pdf_search_index', sa.JSON(), nullable=True),
+        sa.Column('pdf_embeddings', sa.LargeBinary(), nullable=True),
+    ]
+
+
+# the file moved to the blob store and the text to pdf_chunk, both are only
+# kept for rows that were not migrated
+NULLABLE_PDF_INVENTORY_COLUMNS = {'pdf_content': sa.LargeBinary(), 'pdf_chunked_text': sa.JSON()}
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    existing = set(inspector.get_table_names())
+    columns = {column['name']: column for column in inspector.get_columns('pdf_inventory')}
+    indexes = {index['name'] for index in inspector.get_indexes('pdf_inventory')}
+
+    missing = [column for column in pdf_inventory_columns() if column.name not in columns]
+    not_null = [name for name in NULLABLE_PDF_INVENTORY_COLUMNS if not columns[name]['nullable']]
+    if missing or not_null:
+        # sqlite can neither drop NOT NULL nor add a column defaulting to
+        # now() in place, it gets the table rebuilt
+        with op.batch_alter_table('pdf_inventory', recreate='always' if bind.dialect.name == 'sqlite' else 'auto') as batch_op:
+            for column in missing:
+                batch_op.add_column(column)
+            for name in not_null:
+                batch_op.alter_column(name, existing_type=NULLABLE_PDF_INVENTORY_COLUMNS[name], nullable=True)
+    if 'ix_pdf_inventory_pdf_sha256' not in indexes:
+        op.create_index(op.f('ix_pdf_inventory_pdf_sha256'), 'pdf_inventory', ['pdf_sha256'], unique=False)
+    if 'ix_pdf_inventory_student_created' not in indexes:
+        op.create_index('ix_pdf_inventory_student_created', 'pdf_inventory', ['student_id', 'created_at', 'pdf_id'], unique=False)
+
+    if 'pdf_answer_cache' not in existing:
+        op.create_table('pdf_answer_cache',
+        sa.Column('cache_key', sa.String(length=64), nullable=False),
+        sa.Column('answer', sa.Text(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('expires_at', sa.DateTime(timezone=True), nullable=False),
+        sa.PrimaryKeyConstraint('cache_key')
+        )
+        op.create_index(op.f('ix_pdf_answer_cache_expires_at'), 'pdf_answer_cache', ['expires_at'], unique=False)
+    if 'pdf_extracted_text' not in existing:
+        op.create_table('pdf_extracted_text',
+        sa.Column('pdf_sha256', sa.String(length=64), nullable=False),
+        sa.Column('page_count', sa.Integer(), nullable=False),
+        sa.Column('pages', sa.JSON(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+        sa.PrimaryKeyConstraint('pdf_sha256')
+        )
+    if 'pdf_summary' not in existing:
+        op.create_table('pdf_summary',
+        sa.Column('summary_id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('pdf_sha256', sa.String(length=64), nullable=False),
+        sa.Column('model', sa.String(), nullable=False),
+        sa.Column('prompt_version', sa.String(length=16), nullable=False),
+        sa.Column('summary', sa.Text(), nullable=False),
+        sa.Column('section_count', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+        sa.PrimaryKeyConstraint('summary_id'),
+        sa.UniqueConstraint('pdf_sha256', 'model', 'prompt_version', name='uq_pdf_summary_sha_model_version')
+        )
+    if 'pdf_chat_session' not in existing:
+        op.create_table('pdf_chat_session',
+        sa.Column('session_id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('student_id', sa.Integer(), nullable=False),
+        sa.Column('pdf_id', sa.Integer(), nullable=False),
+        sa.Column('context_chunks', sa.JSON(), nullable=True),
+        sa.Column('summary', sa.Text(), nullable=True),
+        sa.Column('summarized_through', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=False),
+        sa.ForeignKeyConstraint(['pdf_id'], ['pdf_inventory.pdf_id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['student_id'], ['student.student_id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('session_id')
+        )
+        op.create_index('ix_pdf_chat_session_student_pdf', 'pdf_chat_session', ['student_id', 'pdf_id', 'updated_at'], unique=False)
+    if 'pdf_chunk' not in existing:
+        op.create_table('pdf_chunk',
+        sa.Column('chunk_id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('pdf_id', sa.Integer(), nullable=False),
+        sa.Column('ordinal', sa.Integer(), nullable=False),
+        sa.Column('page_start', sa.Integer(), nullable=False),
+        sa.Column('page_end', sa.Integer(), nullable=False),
+        sa.Column('char_start', sa.Integer(), nullable=False),
+        sa.Column('char_end', sa.Integer(), nullable=False),
+        sa.Column('text', sa.Text(), nullable=False),
+        sa.ForeignKeyConstraint(['pdf_id'], ['pdf_inventory.pdf_id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('chunk_id'),
+        sa.UniqueConstraint('pdf_id', 'ordinal', name='uq_pdf_chunk_pdf_ordinal')
+        )
+        # create_all ran the same hooks, a pdf_chunk table from it already
+        # has its full-text index
+        for statement in {"postgresql": POSTGRES_FULLTEXT, "sqlite": SQLITE_FULLTEXT}.get(bind.dialect.name, ()):
+            op.execute(statement)
+    if 'pdf_ingest_job' not in existing:
+        op.create_table('pdf_ingest_job',
+        sa.Column('job_id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('pdf_id', sa.Integer(), nullable=False),
+        sa.Column('status', sa.String(length=16), nullable=False),
+        sa.Column('attempts', sa.Integer(), nullable=False),
+        sa.Column('pages_done', sa.Integer(), nullable=False),
+        sa.Column('pages_total', sa.Integer(), nullable=True),
+        sa.Column('error', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=False),
+        sa.ForeignKeyConstraint(['pdf_id'], ['pdf_inventory.pdf_id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('job_id')
+        )
+        op.create_index(op.f('ix_pdf_ingest_job_pdf_id'), 'pdf_ingest_job', ['pdf_id'], unique=False)
+        op.create_index('ix_pdf_ingest_job_status_created', 'pdf_ingest_job', ['status', 'created_at'], unique=False)
+    if 'pdf_chat_message' not in existing:
+        op.create_table('pdf_chat_message',
+        sa.Column('message_id', sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column('session_id', sa.Integer(), nullable=False),
+        sa.Column('role', sa.String(length=16), nullable=False),
+        sa.Column('content', sa.Text(), nullable=False),
+        sa.Column('token_count', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+        sa.ForeignKeyConstraint(['session_id'], ['pdf_chat_session.session_id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('message_id')
+        )
+        op.create_index('ix_pdf_chat_message_session_message', 'pdf_chat_message', ['session_id', 'message_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_pdf_chat_message_session_message', table_name='pdf_chat_message')
+    op.drop_table('pdf_chat_message')
+    op.drop_index('ix_pdf_ingest_job_status_created', table_name='pdf_ingest_job')
+    op.drop_index(op.f('ix_pdf_ingest_job_pdf_id'), table_name='pdf_ingest_job')
+    op.drop_table('pdf_ingest_job')
+    if op.get_bind().dialect.name == "sqlite":
+        op.execute("DROP TABLE pdf_chunk_fts")
+    op.drop_table('pdf_chunk')
+    op.drop_index('ix_pdf_chat_session_student_pdf', table_name='pdf_chat_session')
+    op.drop_table('pdf_chat_session')
+    op.drop_table('pdf_summary')
+    op.drop_table('pdf_extracted_text')
+    op.drop_index(op.f('ix_pdf_answer_cache_expires_at'), table_name='pdf_answer_cache')
+    op.drop_table('pdf_answer_cache')
+
+    op.drop_index('ix_pdf_inventory_student_created', table_name='pdf_inventory')
+    op.drop_index(op.f('ix_pdf_inventory_pdf_sha256'), table_name='pdf_inventory')
+    # pdf_content and pdf_chunked_text stay nullable, rows whose file went to
+    # the blob store or whose text went to pdf_chunk have neither
+    with op.batch_alter_table('pdf_inventory') as batch_op:
+        for column in reversed(pdf_inventory_columns()):
+            batch_op.drop_column(column.name)
@@ -0,0 +1,71 @@
+"""hot path indexes and unique constraints
+
+Logins look students and professors up by email, enrollments by student
+and class, class pages by professor and content by class; none of those
+columns was indexed. Duplicate enrollments are collapsed onto the oldest
+row first. Duplicate emails belong to different accounts and are not
+merged here, the upgrade stops and lists them instead.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0003'
+down_revision: Union[str, Sequence[str], None] = '0002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def ensure_unique_emails(table: str):
+    duplicates = op.get_bind().execute(sa.text(
+        f"SELECT email, COUNT(*) FROM {table} GROUP BY email HAVING COUNT(*) > 1"
+    )).all()
+    if duplicates:
+        listed = ", ".join(f"{email} ({count})" for email, count in duplicates[:20])
+        raise RuntimeError(f"{len(duplicates)} emails are used by more than one {table}: {listed}. "
+                           f"Resolve them before upgrading.")
+
+
+def upgrade() -> None:
+    ensure_unique_emails("student")
+    ensure_unique_emails("professor")
+
+    op.execute(
+        "DELETE FROM enrolled_courses WHERE enrolled_courses_id NOT IN ("
+        "SELECT MIN(enrolled_courses_id) FROM enrolled_courses "
+        "GROUP BY enrolled_student_id, enrolled_class_id)"
+    )
+
+    # batch mode so sqlite, which cannot add a constraint in place, rebuilds
+    # the table; postgres gets a plain ALTER TABLE
+    with op.batch_alter_table('student') as batch_op:
+        batch_op.create_unique_constraint('uq_student_email', ['email'])
+    with op.batch_alter_table('professor') as batch_op:
+        batch_op.create_unique_constraint('uq_professor_email', ['email'])
+    with op.batch_alter_table('enrolled_courses') as batch_op:
+        batch_op.create_unique_constraint('uq_enrolled_courses_student_class', ['enrolled_student_id', 'enrolled_class_id'])
+
+    op.create_index('ix_enrolled_courses_class_id', 'enrolled_courses', ['enrolled_class_id'], unique=False)
+    op.create_index(op.f('ix_classes_professor_id'), 'classes', ['professor_id'], unique=False)
+    op.create_index(op.f('ix_classroom_content_classroom_id'), 'classroom_content', ['classroom_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_classroom_content_classroom_id'), table_name='classroom_content')
+    op.drop_index(op.f('ix_classes_professor_id'), table_name='classes')
+    op.drop_index('ix_enrolled_courses_class_id', table_name='enrolled_courses')
+
+    with op.batch_alter_table('enrolled_courses') as batch_op:
+        batch_op.drop_constraint('uq_enrolled_courses_student_class', type_='unique')
+    with op.batch_alter_table('professor') as batch_op:
+        batch_op.drop_constraint('uq_professor_email', type_='unique')
+    with op.batch_alter_table('student') as batch_op:
+        batch_op.drop_constraint('uq_student_email', type_='unique')
@@ -0,0 +1,34 @@
+"""class enrolled count
+
+classes.enrolled_count is the seat counter enrollment updates atomically to
+enforce class_capacity. It starts from the enrollments already there.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0004'
+down_revision: Union[str, Sequence[str], None] = '0003'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('classes', sa.Column('enrolled_count', sa.Integer(), server_default='0', nullable=False))
+    op.execute(
+        "UPDATE classes SET enrolled_count = ("
+        "SELECT COUNT(*) FROM enrolled_courses WHERE enrolled_courses.enrolled_class_id = classes.class_id)"
+    )
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('classes') as batch_op:
+        batch_op.drop_column('enrolled_count')
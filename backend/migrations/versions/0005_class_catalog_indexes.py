@@ -0,0 +1,31 @@
+"""class catalog indexes
+
+The catalog pages through classes newest first, on its own or within one
+class_field, with a keyset on (created_at, class_id).
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0005'
+down_revision: Union[str, Sequence[str], None] = '0004'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_classes_created', 'classes', ['created_at', 'class_id'], unique=False)
+    op.create_index('ix_classes_field_created', 'classes', ['class_field', 'created_at', 'class_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_classes_field_created', table_name='classes')
+    op.drop_index('ix_classes_created', table_name='classes')
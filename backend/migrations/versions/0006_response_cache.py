@@ -0,0 +1,48 @@
+"""response cache
+
+The shared backend of Utils/response_cache.py, used with
+RESPONSE_CACHE_BACKEND=database: cached responses, and the tag versions
+that the write paths bump to invalidate them.
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0006'
+down_revision: Union[str, Sequence[str], None] = '0005'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'response_cache_entry',
+        sa.Column('cache_key', sa.String(length=64), nullable=False),
+        sa.Column('generation', sa.Integer(), nullable=False),
+        sa.Column('etag', sa.String(length=64), nullable=False),
+        sa.Column('body', sa.Text(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('expires_at', sa.DateTime(timezone=True), nullable=False),
+        sa.PrimaryKeyConstraint('cache_key'),
+    )
+    op.create_index(op.f('ix_response_cache_entry_expires_at'), 'response_cache_entry', ['expires_at'], unique=False)
+    op.create_table(
+        'response_cache_tag',
+        sa.Column('tag', sa.String(length=128), nullable=False),
+        sa.Column('version', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('tag'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('response_cache_tag')
+    op.drop_index(op.f('ix_response_cache_entry_expires_at'), table_name='response_cache_entry')
+    op.drop_table('response_cache_entry')
@@ -0,0 +1,33 @@
+"""drop stale pdf embeddings
+
+Embeddings written before this revision are 512-dimensional float32 rows,
+and nearly all of them are NaN: a hash bucket whose features cancelled out
+took the log of 0. The index is now 4096-dimensional float16, so the old
+blobs cannot even be read. They are dropped; dense retrieval rebuilds a
+PDF's embeddings from its pdf_chunk rows the first time it needs them.
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-19
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0007'
+down_revision: Union[str, Sequence[str], None] = '0006'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute("UPDATE pdf_inventory SET pdf_embeddings = NULL WHERE pdf_embeddings IS NOT NULL")
+
+
+def downgrade() -> None:
+    # the older code would read the new blobs as 512-dimensional float32
+    # rows; without embeddings dense retrieval needs the PDF ingested again
+    op.execute("UPDATE pdf_inventory SET pdf_embeddings = NULL WHERE pdf_embeddings IS NOT NULL")
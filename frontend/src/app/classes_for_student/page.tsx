@@ -1,6 +1,6 @@
 "use client";
 
-import { useEffect, useState } from "react";
+import { useCallback, useEffect, useState } from "react";
 import { useRouter } from "next/navigation";
 
 type Classroom = {
@@ -14,53 +14,81 @@ type Classroom = {
   created_at: string;
 };
 
+// classes fetched per request, "Load more" asks for the next page
+const PAGE_SIZE = 24;
+
+type Filters = {
+  q: string;
+  class_field: string;
+  available: boolean;
+};
+
 export default function StudentClasses() {
   const router = useRouter();
   const [classes, setClasses] = useState<Classroom[]>([]);
   const [loading, setLoading] = useState(true);
+  const [loadingMore, setLoadingMore] = useState(false);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
+  const [filters, setFilters] = useState<Filters>({ q: "", class_field: "", available: false });
+  const [appliedFilters, setAppliedFilters] = useState<Filters>(filters);
   const [error, setError] = useState("");
   const [message, setMessage] = useState("");
   const [refetch, setRefetch] = useState(false); // Add refetch state
 
-  // Fetch available classes
-  useEffect(() => {
-    const fetchClasses = async () => {
-      const token = localStorage.getItem("token");
-      if (!token) {
-        router.push("/Student_login");
-        return;
-      }
+  // Fetch available classes, from the first page when cursor is null
+  const fetchClasses = useCallback(async (cursor: string | null) => {
+    const token = localStorage.getItem("token");
+    if (!token) {
+      router.push("/Student_login");
+      return;
+    }
 
-      try {
-        const response = await fetch(
-          "https://studdy-buddy-4.onrender.com/fetch_classrooms_for_students",
-          {
-            method: "GET",
-            headers: { Authorization: `Bearer ${token}` },
-          }
-        );
-
-        if (!response.ok) {
-          if (response.status === 401) {
-            setError("Unauthorized. Please log in again.");
-            router.push("/Student_login");
-            return;
-          }
-          const data = await response.json();
-          throw new Error(data.detail || "Failed to fetch classes");
+    const params = new URLSearchParams({ limit: String(PAGE_SIZE) });
+    if (cursor) params.set("cursor", cursor);
+    if (appliedFilters.q.trim()) params.set("q", appliedFilters.q.trim());
+    if (appliedFilters.class_field.trim()) params.set("class_field", appliedFilters.class_field.trim());
+    if (appliedFilters.available) params.set("available", "true");
+
+    if (cursor) setLoadingMore(true);
+    try {
+      const response = await fetch(
+        `https://studdy-buddy-4.onrender.com/fetch_classrooms_for_students?${params}`,
+        {
+          method: "GET",
+          headers: { Authorization: `Bearer ${token}` },
         }
+      );
 
-        const data: Classroom[] = await response.json();
-        setClasses(data);
-      } catch (err: any) {
-        setError(err.message || "Something went wrong while fetching classes.");
-      } finally {
-        setLoading(false);
+      if (!response.ok) {
+        if (response.status === 401) {
+          setError("Unauthorized. Please log in again.");
+          router.push("/Student_login");
+          return;
+        }
+        const data = await response.json();
+        throw new Error(data.detail || "Failed to fetch classes");
       }
-    };
 
-    fetchClasses();
-  }, [router, refetch]); // Add refetch to dependencies
+      const data: { items: Classroom[]; next_cursor: string | null } = await response.json();
+      setClasses((prev) => (cursor ? [...prev, ...data.items] : data.items));
+      setNextCursor(data.next_cursor);
+    } catch (err: any) {
+      setError(err.message || "Something went wrong while fetching classes.");
+    } finally {
+      setLoading(false);
+      setLoadingMore(false);
+    }
+  }, [router, appliedFilters]);
+
+  useEffect(() => {
+    fetchClasses(null);
+  }, [fetchClasses, refetch]); // Add refetch to dependencies
+
+  const handleSearch = (e: React.FormEvent) => {
+    e.preventDefault();
+    setError("");
+    setAppliedFilters({ ...filters });
+  };
 
   // Handle enrollment
   const handleEnroll = async (classId: number) => {
@@ -116,6 +144,41 @@ export default function StudentClasses() {
       {error && <p className="text-red-500 mb-4">{error}</p>}
       {message && <p className="text-green-600 mb-4">{message}</p>}
 
+      <form onSubmit={handleSearch} className="flex flex-wrap items-center gap-3 mb-6">
+        <input
+          type="text"
+          placeholder="Search classes"
+          value={filters.q}
+          onChange={(e) => setFilters({ ...filters, q: e.target.value })}
+          className="border rounded px-3 py-2"
+        />
+        <input
+          type="text"
+          placeholder="Field"
+          value={filters.class_field}
+          onChange={(e) => setFilters({ ...filters, class_field: e.target.value })}
+          className="border rounded px-3 py-2"
+        />
+        <label className="flex items-center gap-2 text-sm">
+          <input
+            type="checkbox"
+            checked={filters.available}
+            onChange={(e) => setFilters({ ...filters, available: e.target.checked })}
+          />
+          Only classes with free seats
+        </label>
+        <button
+          type="submit"
+          className="px-4 py-2 bg-blue-600 text-white rounded hover:bg-blue-700 transition-colors"
+        >
+          Search
+        </button>
+      </form>
+
+      {classes.length === 0 && !error && (
+        <p className="text-gray-600">No classes match your search.</p>
+      )}
+
       <div className="grid grid-cols-1 md:grid-cols-3 gap-6">
         {classes.map((cls) => (
           <div
@@ -157,6 +220,18 @@ export default function StudentClasses() {
           </div>
         ))}
       </div>
+
+      {nextCursor && (
+        <div className="mt-6 text-center">
+          <button
+            onClick={() => fetchClasses(nextCursor)}
+            className="px-4 py-2 border border-blue-600 text-blue-600 rounded hover:bg-blue-50 transition-colors"
+            disabled={loadingMore}
+          >
+            {loadingMore ? "Loading..." : "Load more"}
+          </button>
+        </div>
+      )}
     </div>
   );
 }
\ No newline at end of file
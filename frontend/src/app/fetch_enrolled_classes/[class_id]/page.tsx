@@ -3,21 +3,31 @@
 import React, { useEffect, useState, use } from "react";
 import { useRouter } from "next/navigation";
 
+type ClassroomContent = {
+  content_id: number;
+  file: string;
+  filecontent: string;
+  description: string;
+  upload_date: string;
+};
+
 type ClassDetail = {
   class_id: number;
   title: string;
   field: string;
   capacity: number;
+  enrolled_count: number;
   description: string;
   picture: string;
   created_at: string;
-};
-
-type ClassroomContent = {
-  file: string;
-  filecontent: string;
-  description: string;
-  upload_date: string;
+  professor: {
+    professor_id: number;
+    first_name: string;
+    last_name: string;
+    educational_field: string;
+    profile_picture: string;
+  };
+  contents: ClassroomContent[];
 };
 
 export default function ClassDetailPage({ params }: { params: Promise<{ class_id: number }> }) {
@@ -25,11 +35,8 @@ export default function ClassDetailPage({ params }: { params: Promise<{ class_id
   const router = useRouter();
 
   const [classData, setClassData] = useState<ClassDetail | null>(null);
-  const [contentData, setContentData] = useState<ClassroomContent[]>([]);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState<string | null>(null);
-  const [loadingContent, setLoadingContent] = useState(true);
-  const [errorContent, setErrorContent] = useState<string | null>(null);
 
   
   useEffect(() => {
@@ -56,8 +63,9 @@ export default function ClassDetailPage({ params }: { params: Promise<{ class_id
           throw new Error("Failed to fetch class data");
         }
 
-        const data = await response.json();
-        setClassData(data[0]);
+        // the class comes back with its contents and professor in one response
+        const data: ClassDetail = await response.json();
+        setClassData(data);
       } catch (err: any) {
         setError(err.message || "Something went wrong");
       } finally {
@@ -68,38 +76,6 @@ export default function ClassDetailPage({ params }: { params: Promise<{ class_id
     fetchClassById();
   }, [class_id, router]);
 
-  // Second endpoint: fetch classroom content
-  useEffect(() => {
-    const fetchClassroomContent = async () => {
-      const token = localStorage.getItem("token");
-      if (!token) {
-        setErrorContent("Authentication required. Please log in.");
-        return;
-      }
-
-      try {
-        const response = await fetch(`https://studdy-buddy-4.onrender.com/classroom_content/${class_id}`, {
-          method: "GET",
-          headers: {
-            Authorization: `Bearer ${token}`,
-            "Content-Type": "application/json",
-          },
-        });
-
-        if (!response.ok) throw new Error("Failed to fetch classroom content");
-
-        const data = await response.json();
-        setContentData(data);
-      } catch (err: any) {
-        setErrorContent(err.message || "Something went wrong");
-      } finally {
-        setLoadingContent(false);
-      }
-    };
-
-    fetchClassroomContent();
-  }, [class_id]);
-
   if (loading) return <div>Loading class...</div>;
   if (error) return (
     <div>
@@ -129,6 +105,8 @@ export default function ClassDetailPage({ params }: { params: Promise<{ class_id
         <p>{classData.description}</p>
         <h2>Class Information</h2>
         <p>Capacity: {classData.capacity} students</p>
+        <p>Enrolled: {classData.enrolled_count} students</p>
+        <p>Professor: {classData.professor.first_name} {classData.professor.last_name}</p>
         <p>Field: {classData.field}</p>
         <p>Class ID: #{classData.class_id}</p>
         <p>Created: {new Date(classData.created_at).toLocaleDateString()}</p>
@@ -137,16 +115,12 @@ export default function ClassDetailPage({ params }: { params: Promise<{ class_id
       {/* Classroom Content */}
       <div>
         <h2>Classroom Content</h2>
-        {loadingContent ? (
-          <p>Loading content...</p>
-        ) : errorContent ? (
-          <p style={{ color: "red" }}>{errorContent}</p>
-        ) : contentData.length === 0 ? (
+        {classData.contents.length === 0 ? (
           <p>No content uploaded yet.</p>
         ) : (
           <ul>
-            {contentData.map((content, idx) => (
-              <li key={idx}>
+            {classData.contents.map((content) => (
+              <li key={content.content_id}>
                 <p><strong>{content.file}</strong> - {content.description}</p>
                 <p>Uploaded on: {new Date(content.upload_date).toLocaleDateString()}</p>
                 <a href={content.filecontent} target="_blank" rel="noopener noreferrer">
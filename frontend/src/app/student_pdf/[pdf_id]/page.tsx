@@ -2,19 +2,28 @@
 
 import { useState, useEffect } from "react"
 import { useRouter } from "next/navigation"
+import dynamic from "next/dynamic"
 import { FiFileText, FiDownload, FiMessageCircle, FiSend, FiBook, FiEye, FiArrowLeft, FiHash, FiCalendar } from "react-icons/fi"
 import { FaRobot, FaUser } from "react-icons/fa"
 import NavBar from "@/components/NavBar"
 
+// pdf.js needs the browser, the viewer is never rendered on the server
+const PdfViewer = dynamic(() => import("@/components/PdfViewer"), { ssr: false })
+
 type ChunkedTextItem = {
-  page: number
-  page_content: string
+  ordinal: number
+  page_start: number
+  page_end: number
+  char_start: number
+  char_end: number
+  text: string
 }
 
 type PdfResponse = {
   pdf_name: string
-  pdf_content: string // base64
-  chunked_text: ChunkedTextItem[]
+  pdf_size: number
+  file_url: string
+  chunked_text: ChunkedTextItem[] | null // null until ingestion finishes
 }
 
 type ChatMessage = {
@@ -25,6 +34,7 @@ type ChatMessage = {
 export default function PdfPage({ params }: { params: Promise<{ pdf_id: number }> }) {
   const [resolvedParams, setResolvedParams] = useState<{ pdf_id: number } | null>(null)
   const [pdfUrl, setPdfUrl] = useState<string | null>(null)
+  const [token, setToken] = useState<string | null>(null)
   const [pdfName, setPdfName] = useState<string>("")
   const [chunkedText, setChunkedText] = useState<ChunkedTextItem[]>([])
   const [chat, setChat] = useState<ChatMessage[]>([]) // chat history
@@ -32,6 +42,7 @@ export default function PdfPage({ params }: { params: Promise<{ pdf_id: number }
   const [error, setError] = useState("")
   const [loading, setLoading] = useState(true)
   const [sending, setSending] = useState(false)
+  const [sessionId, setSessionId] = useState<number | null>(null) // created on the first question
   const router = useRouter()
 
   useEffect(() => {
@@ -56,8 +67,7 @@ export default function PdfPage({ params }: { params: Promise<{ pdf_id: number }
       router.push("/Student_login")
       return
     }
-
-    let objectUrl: string | null = null
+    setToken(token)
 
     const fetchPdf = async () => {
       try {
@@ -74,18 +84,10 @@ export default function PdfPage({ params }: { params: Promise<{ pdf_id: number }
         const data: PdfResponse = await response.json()
 
         setPdfName(data.pdf_name)
-        setChunkedText(data.chunked_text)
+        setChunkedText(data.chunked_text ?? [])
 
-        // base64 → Blob
-        const byteCharacters = atob(data.pdf_content)
-        const byteNumbers = new Array(byteCharacters.length)
-        for (let i = 0; i < byteCharacters.length; i++) {
-          byteNumbers[i] = byteCharacters.charCodeAt(i)
-        }
-        const byteArray = new Uint8Array(byteNumbers)
-        const blob = new Blob([byteArray], { type: "application/pdf" })
-        objectUrl = URL.createObjectURL(blob)
-        setPdfUrl(objectUrl)
+        // the viewer loads the file itself, a few byte ranges at a time
+        setPdfUrl(`https://studdy-buddy-4.onrender.com${data.file_url}`)
       } catch (err: any) {
         setError(err.message)
       } finally {
@@ -94,11 +96,29 @@ export default function PdfPage({ params }: { params: Promise<{ pdf_id: number }
     }
 
     fetchPdf()
-    return () => {
-      if (objectUrl) URL.revokeObjectURL(objectUrl)
-    }
   }, [resolvedParams, router])
 
+  // the whole file is only fetched when the student asks for a copy
+  const downloadPdf = async () => {
+    if (!pdfUrl || !token) return
+    try {
+      const response = await fetch(pdfUrl, {
+        method: "GET",
+        headers: { Authorization: `Bearer ${token}` },
+      })
+      if (!response.ok) throw new Error("Failed to fetch PDF file")
+
+      const objectUrl = URL.createObjectURL(await response.blob())
+      const link = document.createElement("a")
+      link.href = objectUrl
+      link.download = pdfName || `pdf_${resolvedParams?.pdf_id}.pdf`
+      link.click()
+      setTimeout(() => URL.revokeObjectURL(objectUrl), 1000)
+    } catch (err: any) {
+      setError(err.message)
+    }
+  }
+
   
   const sendMessage = async () => {
     if (!resolvedParams || !userInput.trim()) return
@@ -115,23 +135,64 @@ export default function PdfPage({ params }: { params: Promise<{ pdf_id: number }
     setSending(true)
 
     try {
+      let currentSessionId = sessionId
+      if (currentSessionId === null) {
+        const sessionResponse = await fetch(
+          `https://studdy-buddy-4.onrender.com/view_pdf_by_id/${resolvedParams.pdf_id}/chat_sessions`,
+          {
+            method: "POST",
+            headers: { Authorization: `Bearer ${token}` },
+          }
+        )
+        if (!sessionResponse.ok) throw new Error("Failed to start a chat session")
+        currentSessionId = (await sessionResponse.json()).session_id as number
+        setSessionId(currentSessionId)
+      }
+
       const response = await fetch(
-        `https://studdy-buddy-4.onrender.com/view_pdf_by_id/${resolvedParams.pdf_id}/chat`,
+        `https://studdy-buddy-4.onrender.com/view_pdf_by_id/${resolvedParams.pdf_id}/chat/stream`,
         {
           method: "POST",
           headers: {
             "Content-Type": "application/json",
             Authorization: `Bearer ${token}`,
           },
-          body: JSON.stringify({ message: newMessage.content }),
+          body: JSON.stringify({ message: newMessage.content, session_id: currentSessionId }),
         }
       )
 
-      if (!response.ok) throw new Error("Failed to get AI response")
+      if (!response.ok || !response.body) throw new Error("Failed to get AI response")
+
+      // the answer arrives as server-sent events, each delta is appended to
+      // the last assistant message as soon as it is read
+      setChat((prev) => [...prev, { role: "assistant", content: "" }])
+      const reader = response.body.getReader()
+      const decoder = new TextDecoder()
+      let buffer = ""
 
-      const data = await response.json()
-      const aiMessage: ChatMessage = { role: "assistant", content: data.message }
-      setChat((prev) => [...prev, aiMessage])
+      while (true) {
+        const { done, value } = await reader.read()
+        if (done) break
+        buffer += decoder.decode(value, { stream: true })
+
+        const events = buffer.split("\n\n")
+        buffer = events.pop() ?? ""
+        for (const rawEvent of events) {
+          const lines = rawEvent.split("\n")
+          const eventName = lines.find((line) => line.startsWith("event: "))?.slice(7)
+          const dataLine = lines.find((line) => line.startsWith("data: "))
+          if (!dataLine) continue
+          const data = JSON.parse(dataLine.slice(6))
+
+          if (eventName === "error") throw new Error(data.detail || "Failed to get AI response")
+          if (data.delta) {
+            setChat((prev) => {
+              const last = prev[prev.length - 1]
+              return [...prev.slice(0, -1), { ...last, content: last.content + data.delta }]
+            })
+          }
+        }
+      }
     } catch (err: any) {
       setError(err.message)
     } finally {
@@ -220,14 +281,13 @@ export default function PdfPage({ params }: { params: Promise<{ pdf_id: number }
                 
                 <div className="flex items-center space-x-4">
                   {pdfUrl && (
-                    <a
-                      href={pdfUrl}
-                      download={pdfName || `pdf_${resolvedParams?.pdf_id}.pdf`}
+                    <button
+                      onClick={downloadPdf}
                       className="flex items-center px-6 py-3 bg-white/20 backdrop-blur-sm border border-white/30 text-white rounded-xl hover:bg-white/30 transition-all duration-200 font-medium shadow-lg hover:shadow-xl transform hover:-translate-y-0.5"
                     >
                       <FiDownload className="mr-2 text-lg" />
                       Download PDF
-                    </a>
+                    </button>
                   )}
                 </div>
               </div>
@@ -285,11 +345,13 @@ export default function PdfPage({ params }: { params: Promise<{ pdf_id: number }
                       <div key={index} className="p-4 border-b border-slate-200/50 last:border-b-0 hover:bg-white/50 transition-colors">
                         <div className="flex items-center mb-3">
                           <span className="bg-gradient-to-r from-blue-500 to-indigo-600 text-white text-xs font-bold px-3 py-1 rounded-full">
-                            Page {chunk.page}
+                            {chunk.page_start === chunk.page_end
+                              ? `Page ${chunk.page_start}`
+                              : `Pages ${chunk.page_start}-${chunk.page_end}`}
                           </span>
                         </div>
                         <div className="text-sm text-slate-700 whitespace-pre-wrap leading-relaxed line-clamp-4">
-                          {chunk.page_content}
+                          {chunk.text}
                         </div>
                       </div>
                     ))}
@@ -386,7 +448,7 @@ export default function PdfPage({ params }: { params: Promise<{ pdf_id: number }
             {/* PDF Viewer - Right Side */}
             <div className="lg:col-span-2">
               <div className="bg-white/80 backdrop-blur-sm rounded-3xl shadow-2xl border border-white/20 h-full overflow-hidden">
-                {pdfUrl ? (
+                {pdfUrl && token ? (
                   <div className="h-full flex flex-col">
                     <div className="bg-gradient-to-r from-slate-700 to-slate-800 text-white px-6 py-4 flex items-center justify-between">
                       <div className="flex items-center">
@@ -402,12 +464,8 @@ export default function PdfPage({ params }: { params: Promise<{ pdf_id: number }
                         Interactive PDF Preview
                       </div>
                     </div>
-                    <div className="flex-1">
-                      <iframe 
-                        src={pdfUrl} 
-                        className="w-full h-full border-0" 
-                        title="PDF Viewer"
-                      />
+                    <div className="flex-1 min-h-0">
+                      <PdfViewer url={pdfUrl} token={token} onError={setError} />
                     </div>
                   </div>
                 ) : (
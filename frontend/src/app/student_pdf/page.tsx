@@ -1,6 +1,6 @@
 "use client"
 
-import { useState, useEffect } from "react"
+import { useState, useEffect, useCallback } from "react"
 import { useRouter } from "next/navigation"
 import Link from "next/link"
 import { FiFileText, FiDownload, FiEye, FiBook, FiLoader, FiFolder } from "react-icons/fi"
@@ -10,16 +10,25 @@ import NavBar from "@/components/NavBar"
 type Pdf = {
   pdf_id: number
   pdf_name: string
-  pdffile: string
+  pdf_size: number
+  page_count: number
+  created_at: string
+  file_url: string
 }
 
+// PDFs fetched per request, "Load more" asks for the next page
+const PAGE_SIZE = 24
+
 export default function PdfList() {
   const [pdfs, setPdfs] = useState<Pdf[]>([])
   const [error, setError] = useState("")
   const [loading, setLoading] = useState(true)
+  const [nextCursor, setNextCursor] = useState<string | null>(null)
+  const [loadingMore, setLoadingMore] = useState(false)
   const router = useRouter()
 
-  useEffect(() => {
+  // newest first, from the first page when cursor is null
+  const fetchPdfs = useCallback(async (cursor: string | null) => {
     const token = localStorage.getItem("token")
 
     if (!token) {
@@ -28,31 +37,37 @@ export default function PdfList() {
       return
     }
 
-    const fetchPdfs = async () => {
-      try {
-        const response = await fetch("https://studdy-buddy-4.onrender.com/fetch_your_pdfs", {
-          method: "GET",
-          headers: {
-            Authorization: `Bearer ${token}`,
-          },
-        })
-
-        if (!response.ok) {
-          throw new Error("Failed to fetch PDFs")
-        }
-
-        const data: Pdf[] = await response.json()
-        setPdfs(data)
-      } catch (err: any) {
-        setError(err.message)
-      } finally {
-        setLoading(false)
+    const params = new URLSearchParams({ limit: String(PAGE_SIZE) })
+    if (cursor) params.set("cursor", cursor)
+
+    if (cursor) setLoadingMore(true)
+    try {
+      const response = await fetch(`https://studdy-buddy-4.onrender.com/fetch_your_pdfs?${params}`, {
+        method: "GET",
+        headers: {
+          Authorization: `Bearer ${token}`,
+        },
+      })
+
+      if (!response.ok) {
+        throw new Error("Failed to fetch PDFs")
       }
-    }
 
-    fetchPdfs()
+      const data: { items: Pdf[]; next_cursor: string | null } = await response.json()
+      setPdfs((prev) => (cursor ? [...prev, ...data.items] : data.items))
+      setNextCursor(data.next_cursor)
+    } catch (err: any) {
+      setError(err.message)
+    } finally {
+      setLoading(false)
+      setLoadingMore(false)
+    }
   }, [router])
 
+  useEffect(() => {
+    fetchPdfs(null)
+  }, [fetchPdfs])
+
   if (loading) return (
     <div className="flex items-center justify-center min-h-screen bg-gradient-to-br from-slate-50 via-blue-50 to-indigo-100">
       <div className="animate-pulse flex flex-col items-center bg-white/70 backdrop-blur-sm rounded-3xl p-12 shadow-2xl border border-white/20">
@@ -114,7 +129,7 @@ export default function PdfList() {
                     <div className="flex items-center justify-center lg:justify-start mt-4">
                       <span className="flex items-center text-white/90 bg-white/10 px-4 py-2 rounded-full backdrop-blur-sm">
                         <FiBook className="mr-2" /> 
-                        {pdfs.length} Document{pdfs.length !== 1 ? 's' : ''} Available
+                        {pdfs.length}{nextCursor ? '+' : ''} Document{pdfs.length !== 1 ? 's' : ''} Available
                       </span>
                     </div>
                   </div>
@@ -192,6 +207,19 @@ export default function PdfList() {
                   ))}
                 </div>
               )}
+
+              {nextCursor && (
+                <div className="mt-10 text-center">
+                  <button
+                    onClick={() => fetchPdfs(nextCursor)}
+                    disabled={loadingMore}
+                    className="inline-flex items-center px-8 py-4 bg-white/70 text-blue-700 border border-blue-200 rounded-xl hover:bg-blue-50 transition-all duration-200 font-semibold shadow-lg hover:shadow-xl disabled:opacity-60"
+                  >
+                    {loadingMore && <FiLoader className="mr-2 text-lg animate-spin" />}
+                    {loadingMore ? "Loading..." : "Load more"}
+                  </button>
+                </div>
+              )}
             </div>
           </div>
 
@@ -0,0 +1,79 @@
+"use client";
+
+import { useEffect, useMemo, useRef, useState } from "react";
+import { Document, Page, pdfjs } from "react-pdf";
+import { FiChevronLeft, FiChevronRight } from "react-icons/fi";
+import "react-pdf/dist/Page/AnnotationLayer.css";
+import "react-pdf/dist/Page/TextLayer.css";
+
+// the worker has to be the pdf.js build react-pdf was made with, not the
+// older one @react-pdf-viewer pulls in at the top of node_modules
+pdfjs.GlobalWorkerOptions.workerSrc = `https://unpkg.com/pdfjs-dist@${pdfjs.version}/build/pdf.worker.min.mjs`;
+
+// pdf.js asks the server for byte ranges and only fetches the parts the shown
+// page needs; auto fetch and streaming would pull in the whole file anyway
+const PDF_OPTIONS = { disableAutoFetch: true, disableStream: true };
+
+type PdfViewerProps = {
+  url: string;
+  token: string;
+  onError?: (message: string) => void;
+};
+
+export default function PdfViewer({ url, token, onError }: PdfViewerProps) {
+  const [numPages, setNumPages] = useState(0);
+  const [pageNumber, setPageNumber] = useState(1);
+  const [width, setWidth] = useState<number>();
+  const containerRef = useRef<HTMLDivElement>(null);
+
+  // a new object on every render would make react-pdf load the file again
+  const file = useMemo(() => ({ url, httpHeaders: { Authorization: `Bearer ${token}` } }), [url, token]);
+
+  useEffect(() => {
+    const container = containerRef.current;
+    if (!container) return;
+    const observer = new ResizeObserver(([entry]) => setWidth(entry.contentRect.width));
+    observer.observe(container);
+    return () => observer.disconnect();
+  }, []);
+
+  return (
+    <div className="h-full flex flex-col">
+      <div ref={containerRef} className="flex-1 overflow-y-auto bg-slate-100">
+        <Document
+          file={file}
+          options={PDF_OPTIONS}
+          onLoadSuccess={({ numPages }) => {
+            setNumPages(numPages);
+            setPageNumber(1);
+          }}
+          onLoadError={() => onError?.("Failed to fetch PDF file")}
+          loading={<p className="p-6 text-center text-slate-500">Loading document...</p>}
+        >
+          <Page pageNumber={pageNumber} width={width} />
+        </Document>
+      </div>
+      {numPages > 0 && (
+        <div className="flex items-center justify-center gap-4 py-3 bg-white/80 border-t border-slate-200">
+          <button
+            onClick={() => setPageNumber((page) => Math.max(page - 1, 1))}
+            disabled={pageNumber <= 1}
+            className="p-2 rounded-lg bg-slate-100 hover:bg-slate-200 disabled:opacity-50 disabled:cursor-not-allowed"
+          >
+            <FiChevronLeft />
+          </button>
+          <span className="text-sm font-medium text-slate-700">
+            Page {pageNumber} of {numPages}
+          </span>
+          <button
+            onClick={() => setPageNumber((page) => Math.min(page + 1, numPages))}
+            disabled={pageNumber >= numPages}
+            className="p-2 rounded-lg bg-slate-100 hover:bg-slate-200 disabled:opacity-50 disabled:cursor-not-allowed"
+          >
+            <FiChevronRight />
+          </button>
+        </div>
+      )}
+    </div>
+  );
+}